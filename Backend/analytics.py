@@ -0,0 +1,188 @@
+"""
+Vectorized per-configuration statistics
+
+A project's results are loaded as NumPy columns (NULL -> NaN) and every
+statistic is computed for all configurations at once with group-by passes
+over the sorted columns, instead of one Python list per configuration and
+metric. NaN-aware throughout: NULLs are left out of every statistic, the same
+way SQL aggregates ignore them.
+
+/get_analytics_data returns the full set. The combined and stability graphs
+only need one statistic each and still aggregate in SQL.
+"""
+
+import numpy as np
+from database import get_conn
+
+# Column in results -> name in the response
+RESULT_METRICS = [
+    ("number_of_fixes", "fixes"),
+    ("duration", "duration"),
+    ("detected_errors", "detected_errors"),
+    ("high_quality_errors", "high_quality_errors"),
+    ("false_positives", "false_positives"),
+]
+
+PERCENTILES = (25, 75, 90)
+
+
+class Groups:
+    """
+    Rows sorted by group. `codes` are the group numbers of the original rows,
+    numbered in order of first appearance, so results keep the input order.
+    """
+
+    def __init__(self, codes, n_groups):
+        self.n_groups = n_groups
+        self.order = np.argsort(codes, kind="stable")
+        self.sorted_codes = codes[self.order]
+        self.sizes = np.bincount(codes, minlength=n_groups)
+        self.starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+
+    def reduce(self, ufunc, values):
+        """ufunc.reduceat over each group of already-sorted values (groups are never empty)."""
+        return ufunc.reduceat(values, self.starts) if len(values) else np.zeros(0)
+
+
+def encode_groups(keys):
+    """Group numbers for any hashable keys (ids, None, strings), in order of first appearance."""
+    index = {}
+    codes = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.intp)
+    return codes, list(index)
+
+
+def column(values):
+    """Float column from a sequence that may contain None (None -> NaN)."""
+    return np.array(values, dtype=float).reshape(-1)
+
+
+def metric_stats(groups: Groups, values, percentiles=PERCENTILES):
+    """count / mean / std / min / max / median / percentiles of one column, per group."""
+    v = values[groups.order]
+    valid = ~np.isnan(v)
+    count = groups.reduce(np.add, valid.astype(np.int64))
+    total = groups.reduce(np.add, np.where(valid, v, 0.0))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+        # Two-pass variance around the group mean (stable for large values)
+        deviation = np.where(valid, v - mean[groups.sorted_codes], 0.0)
+        squares = groups.reduce(np.add, deviation * deviation)
+        std = np.where(count > 1, np.sqrt(squares / np.maximum(count - 1, 1)), np.nan)
+
+    minimum = groups.reduce(np.fmin, v)
+    maximum = groups.reduce(np.fmax, v)
+
+    # Sort values inside each group (NaN last) and interpolate ranks, like numpy.percentile
+    within = np.lexsort((v, groups.sorted_codes))
+    ranked = v[within]
+    quantiles = {}
+    for q in (50,) + tuple(percentiles):
+        position = (q / 100.0) * np.maximum(count - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+        fraction = position - lower
+        base = groups.starts
+        with np.errstate(invalid="ignore"):
+            value = ranked[base + lower] * (1 - fraction) + ranked[base + upper] * fraction if len(ranked) else np.zeros(0)
+        quantiles[q] = np.where(count > 0, value, np.nan)
+
+    stats = {
+        "count": count,
+        "mean": mean,
+        "median": quantiles[50],
+        "std": std,
+        "min": minimum,
+        "max": maximum,
+    }
+    for q in percentiles:
+        stats[f"p{q}"] = quantiles[q]
+    return stats
+
+
+def group_stats(keys, columns, percentiles=PERCENTILES):
+    """
+    Statistics of every column for every group.
+    keys: one group key per row; columns: {name: sequence of values (None allowed)}.
+    Returns (group keys in first-appearance order, rows per group, {name: {stat: array}}).
+    """
+    codes, group_keys = encode_groups(keys)
+    if not group_keys:
+        return [], np.zeros(0, dtype=np.int64), {name: {} for name in columns}
+    groups = Groups(codes, len(group_keys))
+    stats = {name: metric_stats(groups, column(values), percentiles) for name, values in columns.items()}
+    return group_keys, groups.sizes, stats
+
+
+def to_python_list(values):
+    """NumPy array -> JSON-friendly list of Python values, NaN as None."""
+    return [None if v != v else v for v in values.tolist()]
+
+
+#Loads the counted runs of a project (run_time != 0) as columns, plus error fix counts per configuration
+def load_project_results(project_id):
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+        f"""
+        SELECT configuration_id, {", ".join(col for col, _ in RESULT_METRICS)}
+        FROM results
+        WHERE project_id = %s
+        AND NOT (
+        run_time = 0
+        )
+        ORDER BY configuration_id, results_id
+        """,
+        (project_id,)
+        )
+        rows = cur.fetchall()
+        cur.execute(
+        """
+        SELECT configuration_id, COUNT(*), COUNT(*) FILTER (WHERE was_fixed)
+        FROM error_records
+        WHERE project_id = %s
+        GROUP BY configuration_id
+        """,
+        (project_id,)
+        )
+        fix_counts = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+    if rows:
+        table = np.array(rows, dtype=float)   # None -> NaN
+        config_ids = [row[0] for row in rows]
+        columns = {name: table[:, i + 1] for i, (_, name) in enumerate(RESULT_METRICS)}
+    else:
+        config_ids, columns = [], {name: [] for _, name in RESULT_METRICS}
+    return config_ids, columns, fix_counts
+
+
+def build_analytics(config_ids, columns, fix_counts, percentiles=PERCENTILES):
+    group_keys, sizes, stats = group_stats(config_ids, columns, percentiles)
+    # Convert whole columns once, then only index Python lists per configuration
+    stats = {
+        name: [(stat, to_python_list(values)) for stat, values in metric.items()]
+        for name, metric in stats.items()
+    }
+    configs = []
+    for g, (configid, runs) in enumerate(zip(group_keys, sizes.tolist())):
+        errors, fixed = fix_counts.get(configid, (0, 0))
+        configs.append({
+            "configid": configid,
+            "runs": runs,
+            "fix_rate": fixed / errors if errors else None,
+            "metrics": {
+                name: {stat: values[g] for stat, values in metric}
+                for name, metric in stats.items()
+            },
+        })
+    return configs
+
+
+#Gets every per-configuration statistic of a project
+def get_project_analytics(project_id: int):
+    return build_analytics(*load_project_results(project_id))
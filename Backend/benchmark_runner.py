@@ -0,0 +1,182 @@
+"""
+Benchmark runner
+
+Runs every system prompt of a benchmark for N test rounds against the MCP
+tool, concurrently. Each run's debug report is pulled out of the agent's
+answer, validated and saved with run_time = round number, so a whole
+prompt x round matrix needs no manual saving from Send_to_Mcp.
+
+All runs are started at once and an asyncio.Semaphore keeps at most
+`concurrency` MCP calls in flight, so the matrix takes about as long as
+its slowest runs instead of the sum of all of them.
+
+BENCHMARK_CONCURRENCY   default concurrent MCP calls, default 4
+BENCHMARK_MAX_CONCURRENCY  upper bound a request may ask for, default 16
+"""
+
+import asyncio
+import json
+import os
+import re
+from typing import List, Optional
+
+from fastapi import APIRouter
+from pydantic import BaseModel, Field, ValidationError
+
+from database import run_db
+from ingest_service import save_system_prompt, save_config_run
+from mcp.mcp_client import get_mcp_client
+from response_cache import invalidate_project
+from upload_ai_data import DebugReport
+
+router = APIRouter(prefix="/api/benchmark")
+
+FENCED_JSON = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+ARTIFACT = re.compile(r"<artifact[^>]*>(.*?)</artifact>", re.DOTALL)
+
+
+class BenchmarkRequest(BaseModel):
+    project_id: int
+    prompts: List[str] = Field(min_length=1)
+    rounds: int = Field(default=1, ge=1, le=100)
+    tool_name: str = "github-code-fixer"
+    model: Optional[str] = ""
+    concurrency: Optional[int] = None
+
+
+def default_concurrency():
+    return int(os.getenv("BENCHMARK_CONCURRENCY", "4"))
+
+
+def clamp_concurrency(value):
+    limit = int(os.getenv("BENCHMARK_MAX_CONCURRENCY", "16"))
+    return max(1, min(value or default_concurrency(), limit))
+
+
+#Candidate JSON strings in an agent answer: fenced blocks, artifacts, then the outermost braces
+def report_candidates(text):
+    candidates = FENCED_JSON.findall(text) + ARTIFACT.findall(text)
+    first, last = text.find("{"), text.rfind("}")
+    if first != -1 and last > first:
+        candidates.append(text[first:last + 1])
+    return candidates
+
+
+#Text blocks of a stringified array of agent messages ([{"role": ..., "content": [{"type": "text", "text": ...}]}]), last first
+def transcript_texts(text):
+    stripped = text.strip()
+    if not stripped.startswith("["):
+        return []
+    try:
+        messages = json.loads(stripped)
+    except json.JSONDecodeError:
+        return []
+    if not isinstance(messages, list):
+        return []
+    texts = []
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            continue
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text" and isinstance(block.get("text"), str):
+                texts.append(block["text"])
+    return list(reversed(texts))
+
+
+def _first_report(text) -> Optional[DebugReport]:
+    # The report is usually the last thing the agent writes, so try the later blocks first
+    for candidate in reversed(report_candidates(text)):
+        candidate = candidate.strip()
+        start, end = candidate.find("{"), candidate.rfind("}")
+        if start == -1 or end <= start:
+            continue
+        try:
+            return DebugReport.model_validate(json.loads(candidate[start:end + 1]))
+        except (json.JSONDecodeError, ValidationError):
+            continue
+    return None
+
+
+#Returns the first candidate that is a valid DebugReport, or None.
+#Like extractReportJsonFromTextBlocks in Send_to_Mcp.jsx, a transcript (JSON array of messages) is searched block by block.
+def extract_report(text) -> Optional[DebugReport]:
+    if not text:
+        return None
+    for block in transcript_texts(text):
+        report = _first_report(block)
+        if report is not None:
+            return report
+    return _first_report(text)
+
+
+#Text of an MCP call_tool result ("" when the tool returned nothing)
+def result_text(result):
+    if not result:
+        return ""
+    return "".join(block.get("text", "") for block in result["result"]["content"])
+
+
+async def run_one(client, semaphore, request: BenchmarkRequest, prompt_index, config_id, round_number):
+    """Run one prompt for one round, then save its report. Never raises; failures are reported."""
+    outcome = {"prompt_index": prompt_index, "config_id": config_id, "round": round_number}
+    try:
+        async with semaphore:
+            result = await client.call_tool(request.tool_name, request.prompts[prompt_index])
+        report = extract_report(result_text(result))
+        if report is None:
+            return {**outcome, "success": False, "error": "No valid debug report in the agent's answer"}
+        saved = await run_db(
+            save_config_run,
+            request.project_id,
+            config_id,
+            report.number_of_fixes,
+            report.total_time_spent_minutes,
+            round_number,
+            [error.model_dump() for error in report.errors],
+        )
+        return {**outcome, "success": True, **saved}
+    except Exception as e:
+        print(f"[benchmark] Prompt {prompt_index} round {round_number} failed: {str(e)}")
+        return {**outcome, "success": False, "error": str(e)}
+
+
+async def run_benchmark(request: BenchmarkRequest, client=None):
+    """
+    Create one configuration per prompt, then run every prompt x round
+    concurrently. Returns one outcome per run, ordered by prompt and round.
+    """
+    client = client or get_mcp_client()
+    semaphore = asyncio.Semaphore(clamp_concurrency(request.concurrency))
+
+    config_ids = []
+    for prompt in request.prompts:
+        saved = await run_db(save_system_prompt, request.project_id, prompt, request.model or "")
+        config_ids.append(saved["config_id"])
+
+    runs = [
+        run_one(client, semaphore, request, index, config_id, round_number)
+        for index, config_id in enumerate(config_ids)
+        for round_number in range(1, request.rounds + 1)
+    ]
+    try:
+        return await asyncio.gather(*runs)
+    finally:
+        invalidate_project(request.project_id)
+
+
+@router.post("/run")
+async def run_benchmark_endpoint(request: BenchmarkRequest):
+    try:
+        outcomes = await run_benchmark(request)
+        succeeded = sum(1 for o in outcomes if o["success"])
+        return {
+            "success": succeeded == len(outcomes),
+            "project_id": request.project_id,
+            "runs": len(outcomes),
+            "succeeded": succeeded,
+            "results": outcomes,
+        }
+    except Exception as e:
+        print(f"[/api/benchmark/run] Error: {str(e)}")
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,69 @@
+"""
+Synthetic data for the benchmarks, shaped like the rows the endpoints handle.
+A fixed seed keeps every run on the same data.
+"""
+
+import random
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+# Rows per configuration, about what a prompt gets over a few test rounds
+ROWS_PER_CONFIG = 10
+
+
+def _rng(seed):
+    return random.Random(seed)
+
+
+#(config_rows, run_rows) as dashboard_info.build_dashboard receives them; n is the number of runs
+def dashboard_rows(n, seed=3):
+    rng = _rng(seed)
+    configs = max(1, n // ROWS_PER_CONFIG)
+    config_rows = [
+        (
+            configid, ROWS_PER_CONFIG,
+            rng.uniform(0, 20), rng.uniform(1, 120), rng.uniform(0, 40), rng.uniform(0, 15),
+            rng.uniform(0, 3), rng.uniform(0, 5), rng.uniform(0, 6), rng.uniform(0, 2),
+        )
+        for configid in range(configs)
+    ]
+    run_rows = [
+        (
+            results_id, results_id % configs, True, "Fix the failing tests", "model-a",
+            rng.randint(0, 20), rng.uniform(1, 120), rng.randint(0, 15), rng.randint(0, 40),
+            "model-a", 1 + results_id // configs,
+        )
+        for results_id in range(n)
+    ]
+    return config_rows, run_rows
+
+
+#Tuples as CONFIG_RESULTS_SQL returns them, for the row-to-dict mappers
+def config_result_rows(n, seed=4):
+    rng = _rng(seed)
+    configs = max(1, n // ROWS_PER_CONFIG)
+    return [
+        (
+            results_id % configs, "Fix the failing tests", "model-a",
+            rng.randint(0, 20), rng.uniform(1, 120), rng.randint(0, 15), rng.randint(0, 40),
+            results_id, rng.uniform(0, 15), rng.uniform(0, 40), "model-a",
+            1 + results_id // configs,
+        )
+        for results_id in range(n)
+    ]
+
+
+#(config_ids, columns, fix_counts) as analytics.build_analytics receives them from load_project_results
+def analytics_columns(n, seed=5):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    configs = max(1, n // ROWS_PER_CONFIG)
+    config_ids = np.sort(rng.integers(0, configs, n)).tolist()
+    columns = {}
+    for name, high in (("fixes", 20), ("duration", 120), ("detected_errors", 40),
+                       ("high_quality_errors", 15), ("false_positives", 10)):
+        values = rng.uniform(0, high, n)
+        values[rng.random(n) < 0.02] = np.nan
+        columns[name] = values
+    fix_counts = {c: (40, int(rng.integers(0, 40))) for c in range(configs)}
+    return config_ids, columns, fix_counts
@@ -0,0 +1,171 @@
+"""
+Microbenchmarks for the aggregation and row-mapping code
+
+Times the pure-Python paths the dashboard endpoints spend their CPU in, on
+synthetic data (benchmarks/data.py), and reports throughput (rows/s) and
+peak memory (tracemalloc) per case and size.
+
+Run from the Backend folder:
+
+    python -m benchmarks.run_benchmarks                    # 1k and 100k rows
+    python -m benchmarks.run_benchmarks --sizes 1k 100k 1m
+    python -m benchmarks.run_benchmarks --save-baseline    # write benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --check            # exit 1 on a regression
+
+--check compares against baseline.json: a case fails when its throughput
+drops more than --max-slowdown or its peak memory grows more than
+--max-memory-growth. Timings depend on the machine, so save the baseline on
+the machine that runs the check.
+
+The per-configuration grouping of /api/results/detected_errors and
+/api/results/high_quality_errors now runs in SQL (GROUP BY); the Python side
+of those series is dashboard_info.build_dashboard, which is measured here.
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from dashboard_info import build_dashboard
+from results_and_configuration_info import config_result_row
+from streaming import json_array_stream
+from analytics import build_analytics
+from benchmarks import data
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = ["1k", "100k"]
+
+
+def _map_rows(rows):
+    return [config_result_row(row) for row in rows]
+
+
+def _stream_rows(rows):
+    for _ in json_array_stream(rows, config_result_row):
+        pass
+
+
+# name -> (make data for n rows, function taking that data)
+CASES = {
+    "build_dashboard": (data.dashboard_rows, lambda rows: build_dashboard(*rows)),
+    "config_result_row": (data.config_result_rows, _map_rows),
+    "json_array_stream": (data.config_result_rows, _stream_rows),
+    "build_analytics": (data.analytics_columns, lambda rows: build_analytics(*rows)),
+}
+
+
+def measure(func, payload, rows, repeat):
+    """Best wall time of `repeat` runs, then one traced run for peak memory."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func(payload)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "seconds": round(best, 6),
+        "rows_per_sec": round(rows / best) if best > 0 else None,
+        "peak_bytes": peak,
+    }
+
+
+def run(sizes, cases=None, repeat=3):
+    """Results as {case: {size: measurement}}."""
+    results = {}
+    for name in cases or CASES:
+        make_data, func = CASES[name]
+        results[name] = {}
+        for size in sizes:
+            rows = data.SIZES[size]
+            payload = make_data(rows)
+            # 1M-row cases are slow enough that a single timed run is representative
+            results[name][size] = measure(func, payload, rows, repeat if rows < 1_000_000 else 1)
+            del payload
+    return results
+
+
+def compare(results, baseline, max_slowdown, max_memory_growth):
+    """Regression messages for every case / size that also exists in the baseline."""
+    failures = []
+    for name, by_size in results.items():
+        for size, current in by_size.items():
+            base = baseline.get(name, {}).get(size)
+            if not base:
+                continue
+            if base.get("rows_per_sec") and current["rows_per_sec"] is not None:
+                floor = base["rows_per_sec"] * (1 - max_slowdown)
+                if current["rows_per_sec"] < floor:
+                    failures.append(
+                        f"{name} [{size}]: {current['rows_per_sec']} rows/s, "
+                        f"baseline {base['rows_per_sec']} (allowed down to {round(floor)})"
+                    )
+            if base.get("peak_bytes"):
+                ceiling = base["peak_bytes"] * (1 + max_memory_growth)
+                if current["peak_bytes"] > ceiling:
+                    failures.append(
+                        f"{name} [{size}]: peak {current['peak_bytes']} bytes, "
+                        f"baseline {base['peak_bytes']} (allowed up to {round(ceiling)})"
+                    )
+    return failures
+
+
+def print_table(results):
+    print(f"{'case':<22}{'size':>6}{'rows/s':>14}{'seconds':>11}{'peak MiB':>11}")
+    for name, by_size in results.items():
+        for size, m in by_size.items():
+            print(
+                f"{name:<22}{size:>6}{m['rows_per_sec'] or 0:>14,}"
+                f"{m['seconds']:>11.4f}{m['peak_bytes'] / 1048576:>11.2f}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the aggregation and row-mapping code")
+    parser.add_argument("--sizes", nargs="+", choices=list(data.SIZES), default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=None)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case, best one counts")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail when slower / bigger than the baseline")
+    parser.add_argument("--max-slowdown", type=float, default=0.30, help="allowed throughput drop, default 0.30")
+    parser.add_argument("--max-memory-growth", type=float, default=0.50, help="allowed peak memory growth, default 0.50")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.cases, args.repeat)
+    print_table(results)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        failures = compare(results, json.loads(args.baseline.read_text()), args.max_slowdown, args.max_memory_growth)
+        if failures:
+            print("\nRegressions:")
+            for failure in failures:
+                print(f"  {failure}")
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
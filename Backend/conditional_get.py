@@ -0,0 +1,121 @@
+"""
+ETag / If-None-Match support for the project-scoped GET endpoints.
+
+A project's data only changes when results or error records are added, so a
+cheap version (max id + row count of both tables) identifies its state. The
+version is sent as the ETag; when the browser sends it back in If-None-Match
+and nothing changed, we answer 304 Not Modified without running the endpoint.
+Only answers the response cache would keep get an ETag: handlers report
+failures as {"error": ...} with status 200, and a tagged error would be
+revalidated with 304s and shown until the project changes.
+"""
+
+import re
+from fastapi import Request, Response
+from database import get_conn, run_db
+from response_cache import response_cache, project_generation, store_if_current, track_cacheable
+
+PROJECT_SCOPED_PATHS = {
+    "/get_config_data",
+    "/get_config_data_new",
+    "/get_config_data_forResults",
+    "/get_stability_data",
+    "/get_combined_data",
+    "/get_analytics_data",
+    "/get_significance_data",
+    "/get_performance_data",
+    "/api/results/detected_errors",
+    "/api/results/high_quality_errors",
+    "/api/results/compare_ai_models",
+    "/fixed_errors_summary",
+}
+DASHBOARD_PATH = re.compile(r"^/api/dashboard/(\d+)$")
+
+
+#Returns a short string that changes whenever results or error records of the project change
+def get_project_version(project_id):
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+        """
+        SELECT
+            (SELECT COALESCE(MAX(results_id), 0) FROM results WHERE project_id = %s),
+            (SELECT COUNT(*) FROM results WHERE project_id = %s),
+            (SELECT COALESCE(MAX(error_id), 0) FROM error_records WHERE project_id = %s),
+            (SELECT COUNT(*) FROM error_records WHERE project_id = %s)
+        """,
+        (project_id, project_id, project_id, project_id)
+        )
+        row = cur.fetchone()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+    return "-".join(str(v) for v in row)
+
+
+def version_key(project_id):
+    return ("project_version", project_id, ())
+
+
+#Project version from the response cache, or from the database (then cached) on a miss
+async def cached_project_version(project_id):
+    hit, version = response_cache.get(version_key(project_id))
+    if hit:
+        return version
+    generation = project_generation(project_id)
+    version = await run_db(get_project_version, project_id)
+    store_if_current(version_key(project_id), version, generation)
+    return version
+
+
+def project_id_from_request(request: Request):
+    """Project id of a project-scoped GET request, or None for every other request."""
+    if request.method != "GET":
+        return None
+    path = request.url.path
+    match = DASHBOARD_PATH.match(path)
+    if match:
+        return int(match.group(1))
+    if path not in PROJECT_SCOPED_PATHS:
+        return None
+    value = request.query_params.get("project_id", request.query_params.get("projectid"))
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compare ignoring the weak prefix, as If-None-Match uses weak comparison
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+async def conditional_get_middleware(request: Request, call_next):
+    project_id = project_id_from_request(request)
+    if project_id is None:
+        return await call_next(request)
+
+    try:
+        version = await cached_project_version(project_id)
+    except Exception as e:
+        # Without a version just serve the request normally
+        print(f"[conditional_get] Could not read project version: {str(e)}")
+        return await call_next(request)
+
+    etag = f'W/"p{project_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    served = track_cacheable()
+    response = await call_next(request)
+    if response.status_code == 200 and served["cacheable"]:
+        response.headers.update(headers)
+    return response
@@ -0,0 +1,289 @@
+"""
+Per-configuration rollups
+
+config_rollups keeps a running summary (count, mean, M2 = sum of squared
+deviations from the mean) of fixes and duration for every configuration.
+insert_fixes and save_error_records update it in the same transaction as
+their insert, so averages and standard deviations can be read in
+O(#configurations) instead of re-scanning results. Unlike a sum of squares,
+M2 does not lose precision when the spread is small next to the mean.
+
+Run this script to rebuild the table from results / error_records.
+"""
+
+import math
+from database import get_conn, close_pool
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS config_rollups (
+    configuration_id INTEGER PRIMARY KEY,
+    project_id INTEGER,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    fixes_count INTEGER NOT NULL DEFAULT 0,
+    mean_fixes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    m2_fixes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    duration_count INTEGER NOT NULL DEFAULT 0,
+    mean_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    m2_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    fixed_error_count INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# M2 (sum of squared deviations from the mean) is VAR_SAMP * (n - 1)
+REBUILD_SQL = """
+INSERT INTO config_rollups (
+    configuration_id, project_id, run_count,
+    fixes_count, mean_fixes, m2_fixes,
+    duration_count, mean_duration, m2_duration,
+    error_count, fixed_error_count
+)
+SELECT
+    c.configuration_id,
+    c.project_id,
+    COALESCE(r.run_count, 0),
+    COALESCE(r.fixes_count, 0), COALESCE(r.mean_fixes, 0), COALESCE(r.m2_fixes, 0),
+    COALESCE(r.duration_count, 0), COALESCE(r.mean_duration, 0), COALESCE(r.m2_duration, 0),
+    COALESCE(e.error_count, 0), COALESCE(e.fixed_error_count, 0)
+FROM configuration c
+LEFT JOIN (
+    SELECT
+        configuration_id,
+        COUNT(*) AS run_count,
+        COUNT(number_of_fixes) AS fixes_count,
+        AVG(number_of_fixes::float8) AS mean_fixes,
+        VAR_SAMP(number_of_fixes::float8) * (COUNT(number_of_fixes) - 1) AS m2_fixes,
+        COUNT(duration) AS duration_count,
+        AVG(duration::float8) AS mean_duration,
+        VAR_SAMP(duration::float8) * (COUNT(duration) - 1) AS m2_duration
+    FROM results
+    WHERE run_time IS NOT NULL AND run_time != 0
+    GROUP BY configuration_id
+) r ON r.configuration_id = c.configuration_id
+LEFT JOIN (
+    SELECT
+        configuration_id,
+        COUNT(*) AS error_count,
+        COUNT(*) FILTER (WHERE was_fixed) AS fixed_error_count
+    FROM error_records
+    GROUP BY configuration_id
+) e ON e.configuration_id = c.configuration_id
+"""
+
+# Schema version 2 of the table, which kept running sums and sums of squares.
+# Only migration 2 uses it; migration 7 converts it to CREATE_TABLE_SQL.
+SUMS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS config_rollups (
+    configuration_id INTEGER PRIMARY KEY,
+    project_id INTEGER,
+    run_count INTEGER NOT NULL DEFAULT 0,
+    fixes_count INTEGER NOT NULL DEFAULT 0,
+    sum_fixes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sumsq_fixes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    duration_count INTEGER NOT NULL DEFAULT 0,
+    sum_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sumsq_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    fixed_error_count INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+SUMS_REBUILD_SQL = """
+INSERT INTO config_rollups (
+    configuration_id, project_id, run_count,
+    fixes_count, sum_fixes, sumsq_fixes,
+    duration_count, sum_duration, sumsq_duration,
+    error_count, fixed_error_count
+)
+SELECT
+    c.configuration_id,
+    c.project_id,
+    COALESCE(r.run_count, 0),
+    COALESCE(r.fixes_count, 0), COALESCE(r.sum_fixes, 0), COALESCE(r.sumsq_fixes, 0),
+    COALESCE(r.duration_count, 0), COALESCE(r.sum_duration, 0), COALESCE(r.sumsq_duration, 0),
+    COALESCE(e.error_count, 0), COALESCE(e.fixed_error_count, 0)
+FROM configuration c
+LEFT JOIN (
+    SELECT
+        configuration_id,
+        COUNT(*) AS run_count,
+        COUNT(number_of_fixes) AS fixes_count,
+        SUM(number_of_fixes::float8) AS sum_fixes,
+        SUM(number_of_fixes::float8 * number_of_fixes) AS sumsq_fixes,
+        COUNT(duration) AS duration_count,
+        SUM(duration::float8) AS sum_duration,
+        SUM(duration::float8 * duration) AS sumsq_duration
+    FROM results
+    WHERE run_time IS NOT NULL AND run_time != 0
+    GROUP BY configuration_id
+) r ON r.configuration_id = c.configuration_id
+LEFT JOIN (
+    SELECT
+        configuration_id,
+        COUNT(*) AS error_count,
+        COUNT(*) FILTER (WHERE was_fixed) AS fixed_error_count
+    FROM error_records
+    GROUP BY configuration_id
+) e ON e.configuration_id = c.configuration_id
+"""
+
+
+#Migration 2: creates the running-sums table, and fills it from existing data the first time
+def create_rollup_table(cur):
+    cur.execute("SELECT to_regclass('config_rollups') IS NULL")
+    is_new = cur.fetchone()[0]
+    cur.execute(SUMS_TABLE_SQL)
+    if is_new:
+        cur.execute(SUMS_REBUILD_SQL)
+        print(f"[config_rollups] Created and backfilled {cur.rowcount} rows")
+
+
+#Recomputes every rollup row from results and error_records
+def rebuild_rollups(conn):
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(CREATE_TABLE_SQL)
+            # Block concurrent ingests so no increment is lost between DELETE and INSERT
+            cur.execute("LOCK TABLE config_rollups IN EXCLUSIVE MODE")
+            cur.execute("DELETE FROM config_rollups")
+            cur.execute(REBUILD_SQL)
+            return cur.rowcount
+
+
+#Adds one result row to its configuration's totals; call with the insert's cursor
+def record_result(cur, project_id, config_id, run_time, number_of_fixes, duration):
+    # run_time = 0 rows are placeholders, the read endpoints never count them
+    if not run_time or config_id is None:
+        return
+    # Chan et al.'s merge of two (count, mean, M2) summaries, here the stored one and
+    # the new row's; a NULL value has count 0 and leaves its metric unchanged
+    cur.execute(
+        """
+        INSERT INTO config_rollups (
+            configuration_id, project_id, run_count,
+            fixes_count, mean_fixes, m2_fixes,
+            duration_count, mean_duration, m2_duration
+        )
+        VALUES (%s, %s, 1, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (configuration_id) DO UPDATE SET
+            run_count = config_rollups.run_count + 1,
+            fixes_count = config_rollups.fixes_count + EXCLUDED.fixes_count,
+            mean_fixes = config_rollups.mean_fixes
+                + (EXCLUDED.mean_fixes - config_rollups.mean_fixes) * EXCLUDED.fixes_count
+                / GREATEST(config_rollups.fixes_count + EXCLUDED.fixes_count, 1),
+            m2_fixes = config_rollups.m2_fixes + EXCLUDED.m2_fixes
+                + (EXCLUDED.mean_fixes - config_rollups.mean_fixes) ^ 2
+                * config_rollups.fixes_count * EXCLUDED.fixes_count
+                / GREATEST(config_rollups.fixes_count + EXCLUDED.fixes_count, 1),
+            duration_count = config_rollups.duration_count + EXCLUDED.duration_count,
+            mean_duration = config_rollups.mean_duration
+                + (EXCLUDED.mean_duration - config_rollups.mean_duration) * EXCLUDED.duration_count
+                / GREATEST(config_rollups.duration_count + EXCLUDED.duration_count, 1),
+            m2_duration = config_rollups.m2_duration + EXCLUDED.m2_duration
+                + (EXCLUDED.mean_duration - config_rollups.mean_duration) ^ 2
+                * config_rollups.duration_count * EXCLUDED.duration_count
+                / GREATEST(config_rollups.duration_count + EXCLUDED.duration_count, 1)
+        """,
+        (config_id, project_id, *_moments(number_of_fixes), *_moments(duration))
+    )
+
+
+#Adds a batch of error records to its configuration's totals; call with the insert's cursor
+def record_errors(cur, project_id, config_id, error_count, fixed_error_count):
+    if config_id is None or error_count == 0:
+        return
+    cur.execute(
+        """
+        INSERT INTO config_rollups (configuration_id, project_id, error_count, fixed_error_count)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (configuration_id) DO UPDATE SET
+            error_count = config_rollups.error_count + EXCLUDED.error_count,
+            fixed_error_count = config_rollups.fixed_error_count + EXCLUDED.fixed_error_count
+        """,
+        (config_id, project_id, error_count, fixed_error_count)
+    )
+
+
+def _moments(value):
+    """(count, mean, M2) of one possibly-NULL value"""
+    if value is None:
+        return 0, 0.0, 0.0
+    return 1, float(value), 0.0
+
+
+def rollup_mean(count, mean):
+    if count == 0:
+        return None
+    return mean
+
+
+def rollup_stdev(count, m2):
+    # Sample standard deviation from M2, NULL below two values like STDDEV_SAMP
+    if count < 2:
+        return None
+    return math.sqrt(m2 / (count - 1))
+
+
+#Fetches the rollups of a project and turns them into averages / std devs.
+#Runs without a configuration have no rollup row and are summed up from results, listed last.
+def get_config_rollups(project_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(
+    """
+    SELECT
+        configuration_id, run_count,
+        fixes_count, mean_fixes, m2_fixes,
+        duration_count, mean_duration, m2_duration,
+        error_count, fixed_error_count
+    FROM config_rollups
+    WHERE project_id = %s
+    AND run_count > 0
+    UNION ALL
+    SELECT
+        NULL, COUNT(*),
+        COUNT(number_of_fixes), COALESCE(AVG(number_of_fixes::float8), 0),
+        COALESCE(VAR_SAMP(number_of_fixes::float8) * (COUNT(number_of_fixes) - 1), 0),
+        COUNT(duration), COALESCE(AVG(duration::float8), 0),
+        COALESCE(VAR_SAMP(duration::float8) * (COUNT(duration) - 1), 0),
+        (SELECT COUNT(*) FROM error_records WHERE project_id = %s AND configuration_id IS NULL),
+        (SELECT COUNT(*) FROM error_records WHERE project_id = %s AND configuration_id IS NULL AND was_fixed)
+    FROM results
+    WHERE project_id = %s
+    AND configuration_id IS NULL
+    AND run_time IS NOT NULL AND run_time != 0
+    HAVING COUNT(*) > 0
+    ORDER BY configuration_id ASC NULLS LAST
+    """,
+    (project_id, project_id, project_id, project_id)
+    )
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+
+    rollups = []
+    for row in rows:
+        (configid, runs, n_fixes, mean_fixes, m2_fixes,
+         n_duration, mean_duration, m2_duration, errors, fixed) = row
+        rollups.append({
+            "configid": configid,
+            "runs": runs,
+            "avg_fixes": rollup_mean(n_fixes, mean_fixes),
+            "std_fixes": rollup_stdev(n_fixes, m2_fixes),
+            "avg_duration": rollup_mean(n_duration, mean_duration),
+            "std_duration": rollup_stdev(n_duration, m2_duration),
+            "error_count": errors,
+            "fixed_error_count": fixed,
+            "fix_rate": fixed / errors if errors else None,
+        })
+    return rollups
+
+
+if __name__ == "__main__":
+    conn = get_conn()
+    try:
+        count = rebuild_rollups(conn)
+        print(f"Rebuilt {count} configuration rollups.")
+    finally:
+        conn.close()
+        close_pool()
@@ -0,0 +1,138 @@
+from database import get_conn
+from stability_info import stability_row
+
+# Every dashboard chart only looks at real test runs; run_time = 0 rows are
+# placeholder results created by /upload_system_prompt.
+RUN_FILTER = "r.run_time IS NOT NULL AND r.run_time != 0"
+
+
+#Gets every chart series of the dashboard from one database snapshot
+def get_dashboard_data(project_id: int):
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        # Both queries below see the same data even if a report is saved in between
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+        #Per-configuration aggregates
+        cur.execute(
+        f"""
+        SELECT
+            r.configuration_id,
+            COUNT(*) AS runs,
+            AVG(r.number_of_fixes)::float8 AS avg_fixes,
+            AVG(r.duration)::float8 AS avg_duration,
+            AVG(r.detected_errors)::float8 AS avg_detected_errors,
+            AVG(r.high_quality_errors)::float8 AS avg_hq_errors,
+            STDDEV_SAMP(r.false_positives)::float8 AS std_false_positives,
+            STDDEV_SAMP(r.number_of_fixes)::float8 AS std_fixes,
+            STDDEV_SAMP(r.detected_errors)::float8 AS std_detected_errors,
+            STDDEV_SAMP(r.high_quality_errors)::float8 AS std_hq_errors
+        FROM results r
+        WHERE r.project_id = %s
+        AND {RUN_FILTER}
+        GROUP BY r.configuration_id
+        ORDER BY r.configuration_id ASC
+        """,
+        (project_id,)
+        )
+        config_rows = cur.fetchall()
+
+        #Per-run rows
+        cur.execute(
+        f"""
+        SELECT
+            r.results_id,
+            r.configuration_id,
+            c.configuration_id IS NOT NULL AS has_config,
+            c.system_prompt,
+            c.model,
+            r.number_of_fixes,
+            r.duration,
+            r.high_quality_errors,
+            r.detected_errors,
+            r.model,
+            r.run_time
+        FROM results r
+        LEFT JOIN configuration c ON c.configuration_id = r.configuration_id
+        WHERE r.project_id = %s
+        AND {RUN_FILTER}
+        ORDER BY r.results_id ASC
+        """,
+        (project_id,)
+        )
+        run_rows = cur.fetchall()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+
+    return build_dashboard(config_rows, run_rows)
+
+
+#Shapes the two query results into the series each chart expects
+def build_dashboard(config_rows, run_rows):
+    aggregates = {}
+    detected_errors = []
+    high_quality_errors = []
+    performance_data = []
+    combined_data = []
+    stability_data = []
+
+    for row in config_rows:
+        configid, runs, fixes, duration, detected, high_quality = row[:6]
+        aggregates[configid] = row
+
+        detected_errors.append({"configid": configid, "error": detected})
+        high_quality_errors.append({"configid": configid, "high-quality": high_quality})
+        performance_data.append({"config_id": configid, "fixes": fixes, "duration": duration})
+        combined_data.append({
+            "configid": configid,
+            "fixes": fixes,
+            "errors": detected,
+            "high-quality": high_quality,
+            "time": duration,
+        })
+        # Same rule as /get_stability_data: a spread needs at least two runs
+        if runs > 1:
+            stability_data.append(stability_row(configid, runs, row[6:]))
+
+    config_data = []
+    config_data_new = []
+    for row in run_rows:
+        (results_id, configid, has_config, prompt, model, fixes, duration,
+         hq_errors, detected, r_model, run_time) = row
+
+        config_data_new.append({
+            "results_id": results_id,
+            "model": r_model,
+            "fixes": fixes,
+        })
+
+        if not has_config:
+            continue
+        agg = aggregates.get(configid)
+        config_data.append({
+            "configid": configid,
+            "prompt": prompt or "",
+            "model": model,
+            "fixes": fixes,
+            "duration": duration,
+            "high_quality_errors": hq_errors,
+            "detected_errors": detected,
+            "results_id": results_id,
+            "avg_hq_errors": agg[5] if agg else None,
+            "avg_detected_errors": agg[4] if agg else None,
+            "r-model": r_model,
+            "run_time": run_time,
+        })
+
+    return {
+        "detected_errors": detected_errors,
+        "high_quality_errors": high_quality_errors,
+        "config_data": config_data,
+        "performance_data": performance_data,
+        "config_data_new": config_data_new,
+        "combined_data": combined_data,
+        "stability_data": stability_data,
+    }
@@ -1,22 +1,307 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
 from contextlib import contextmanager
+from functools import partial
+import anyio
+from dotenv import load_dotenv
+from pathlib import Path
 import os
+import threading
+import time
+from metrics import TimingCursor
 
 
 DB_CONFIG = {
     'dbname': '',
-    'user': '',  
-    'password': '',      
+    'user': '',
+    'password': '',
     'host': 'localhost',
     'port': 5432
 }
 
-def get_conn():
-    return psycopg2.connect(
+
+class PoolTimeout(PoolError):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a psycopg2 connection handed out by ConnectionPool.
+    Behaves like the real connection, except close() gives it back to the pool.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._conn, name)
+
+    # `with conn:` keeps psycopg2 semantics (commit / rollback, no close)
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._pool.putconn(conn)
+
+    def __del__(self):
+        # Safety net for callers that forget to close on an error path
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    - keeps at least `minconn` connections open and never more than `maxconn`
+    - getconn() waits up to `timeout` seconds for a free connection
+    - connections idle longer than `check_interval` are pinged before reuse
+    """
+
+    def __init__(self, minconn, maxconn, timeout, check_interval, **connect_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self._connect_kwargs = connect_kwargs
+        self._idle = []          # list of (conn, returned_at)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Counters for /metrics
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+        for _ in range(minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        return psycopg2.connect(**self._connect_kwargs)
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.maxconn:
+                    conn, returned_at = None, None
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f"no database connection available after {self.timeout}s "
+                        f"(pool max={self.maxconn})"
+                    )
+                self._cond.wait(remaining)
+            self.checkouts += 1
+            self.wait_seconds += time.monotonic() - started
+
+        # Connecting / pinging happens outside the lock
+        try:
+            if conn is not None and not self._is_healthy(conn, returned_at):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn):
+        # Never hand out a connection with a half-finished transaction
+        if not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn)
+
+        with self._cond:
+            self._in_use -= 1
+            if conn.closed or self._closed or len(self._idle) >= self.maxconn:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds": self.wait_seconds,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pool_max():
+    return int(os.getenv("DB_POOL_MAX", "10"))
+
+
+def _build_pool():
+    load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
+    return ConnectionPool(
+        minconn=int(os.getenv("DB_POOL_MIN", "1")),
+        maxconn=_pool_max(),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        check_interval=float(os.getenv("DB_POOL_CHECK_INTERVAL", "30")),
         host=os.getenv("POSTGRES_HOST"),
         port=os.getenv("POSTGRES_PORT"),
         dbname=os.getenv("POSTGRES_DB"),
         user=os.getenv("POSTGRES_USER"),
         password=os.getenv("POSTGRES_PASSWORD"),
-    )
\ No newline at end of file
+        # Times every statement for /metrics (see metrics.TimingCursor)
+        cursor_factory=TimingCursor,
+    )
+
+
+def get_pool():
+    """Return the shared pool, creating it on first use (after .env is loaded)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _build_pool()
+    return _pool
+
+
+def pool_stats():
+    """Counters of the shared pool, or None before it has been created."""
+    return _pool.stats() if _pool is not None else None
+
+
+def get_conn():
+    """
+    Borrow a connection from the shared pool.
+    Call conn.close() when done to return it to the pool.
+    """
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+@contextmanager
+def connection():
+    """`with connection() as conn:` borrows a pooled connection and always returns it."""
+    conn = get_conn()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+_db_limiter = None
+
+
+def _get_db_limiter():
+    # Created lazily because anyio limiters belong to the running event loop
+    global _db_limiter
+    if _db_limiter is None:
+        _db_limiter = anyio.CapacityLimiter(_pool_max())
+    return _db_limiter
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Await a blocking database helper from an async endpoint.
+    The helper runs in a worker thread, so the event loop keeps serving other
+    requests (and MCP streams) while the query is in flight. At most one thread
+    per pooled connection is used; extra calls wait here without holding a thread.
+    """
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs), limiter=_get_db_limiter())
+
+
+_STREAM_DONE = object()
+
+
+async def stream_db(chunks):
+    """
+    Async iterator over a blocking generator that holds a pooled connection
+    while it runs (e.g. a server-side cursor export), for a StreamingResponse.
+    One run_db limiter token is held for the whole stream, so slow clients
+    count against the pool size instead of draining it behind run_db's back.
+    """
+    async with _get_db_limiter():
+        try:
+            while True:
+                chunk = await anyio.to_thread.run_sync(next, chunks, _STREAM_DONE)
+                if chunk is _STREAM_DONE:
+                    break
+                yield chunk
+        finally:
+            # Closing the generator gives its connection back to the pool
+            with anyio.CancelScope(shield=True):
+                await anyio.to_thread.run_sync(chunks.close)
+
+
+def close_pool():
+    """Close every pooled connection. Called on application shutdown."""
+    global _pool, _db_limiter
+    with _pool_lock:
+        pool, _pool = _pool, None
+        _db_limiter = None
+    if pool is not None:
+        pool.closeall()
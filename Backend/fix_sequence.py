@@ -7,25 +7,11 @@ Run this script when you get errors like:
 This resets all sequences to match the actual maximum IDs in the tables.
 """
 
-import os
-from dotenv import load_dotenv
-import psycopg2
-
-load_dotenv()
-
-def connect_to_db():
-    conn = psycopg2.connect(
-        host=os.getenv("POSTGRES_HOST"),
-        port=os.getenv("POSTGRES_PORT"),
-        dbname=os.getenv("POSTGRES_DB"),
-        user=os.getenv("POSTGRES_USER"),
-        password=os.getenv("POSTGRES_PASSWORD")
-    )
-    return conn
+from database import get_conn, close_pool
 
 def fix_sequence(table_name, id_column, sequence_name):
     """Fix a single sequence by setting it to MAX(id) + 1"""
-    conn = connect_to_db()
+    conn = get_conn()
     cur = conn.cursor()
     
     try:
@@ -79,3 +65,5 @@ if __name__ == "__main__":
         print("1. Backend/.env file exists with correct database credentials")
         print("2. PostgreSQL database is running")
         print("3. You have permission to modify the database")
+    finally:
+        close_pool()
@@ -1,29 +1,82 @@
+import anyio
+from functools import partial
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from results_and_configuration_info import get_config_results,get_config_resultnew, get_config_results_forResult
+from results_and_configuration_info import stream_config_results, stream_config_resultnew, stream_config_results_forResult
 from stability_info import get_stability_results
 from combined_info import get_all_results_data
+from analytics import get_project_analytics, load_project_results
+from significance import significance_results, DEFAULT_RESAMPLES, MAX_RESAMPLES
+from database import run_db, stream_db
+from response_cache import cached_response
+from pagination import clamp_limit, decode_cursor, build_page
 
 router = APIRouter()
 
 @router.get("/get_config_data")
-async def get_configurations(project_id: int):
-   configurations = get_config_results(project_id)
+@cached_response("config_data")
+async def get_configurations(project_id: int, stream: bool = False):
+   # ?stream=true sends the rows as they are read instead of building the whole list first
+   if stream:
+      return StreamingResponse(stream_db(stream_config_results(project_id)), media_type="application/json")
+   configurations = await run_db(get_config_results, project_id)
    return configurations
 
-@router.get("/get_stability_data") 
-def get_stability(project_id):
+@router.get("/get_stability_data")
+@cached_response("stability_data")
+def get_stability(project_id: int):
     stability = get_stability_results(project_id)
     return stability
 
 @router.get("/get_combined_data")
+@cached_response("combined_data")
 def get_combined(project_id: int):
     combined = get_all_results_data(project_id)
-    print(combined)
     return combined
 
+@router.get("/get_analytics_data")
+@cached_response("analytics_data")
+async def get_analytics(project_id: int):
+    """
+    Per configuration: runs, fix rate, and count / mean / median / std / min /
+    max / percentiles of fixes, duration, detected, high-quality and false-positive errors.
+    """
+    try:
+        return await run_db(get_project_analytics, project_id)
+    except Exception as e:
+        print(f"[/get_analytics_data] Error: {str(e)}")
+        return {"error": str(e)}
+
+@router.get("/get_significance_data")
+@cached_response("significance_data")
+async def get_significance(project_id: int, resamples: int = DEFAULT_RESAMPLES, confidence: float = 0.95,
+                           baseline: Optional[int] = None, seed: int = 0):
+    """
+    Bootstrap confidence intervals and p-values for the difference in mean
+    fixes, duration and false positives between configurations.
+    With ?baseline=<configid> every configuration is compared to that one only;
+    the fixed default seed keeps repeated requests (and their ETags) identical.
+    """
+    try:
+        resamples = max(100, min(resamples, MAX_RESAMPLES))
+        confidence = min(max(confidence, 0.5), 0.999)
+        config_ids, columns, _ = await run_db(load_project_results, project_id)
+        # The bootstrap is CPU work: run it without holding a database limiter token
+        return await anyio.to_thread.run_sync(
+            partial(significance_results, config_ids, columns, resamples, confidence, baseline, seed)
+        )
+    except Exception as e:
+        print(f"[/get_significance_data] Error: {str(e)}")
+        return {"error": str(e)}
+
 @router.get("/get_config_data_new")
-async def get_configurationsnew(project_id: int):
-    configurations = get_config_resultnew(project_id)
+@cached_response("config_data_new")
+async def get_configurationsnew(project_id: int, stream: bool = False):
+    if stream:
+        return StreamingResponse(stream_db(stream_config_resultnew(project_id)), media_type="application/json")
+    configurations = await run_db(get_config_resultnew, project_id)
     return configurations
 
 # @router.get("/errors")
@@ -39,6 +92,15 @@ async def get_configurationsnew(project_id: int):
    
    
 @router.get("/get_config_data_forResults")
-async def get_configurations(project_id: int):
-   configurations = get_config_results_forResult(project_id)
-   return configurations
+@cached_response("config_data_forResults")
+async def get_configurations_forResults(project_id: int, cursor: Optional[str] = None, limit: Optional[int] = None, stream: bool = False):
+   """
+   One page of a project's results, oldest first.
+   Pass the returned next_cursor back as ?cursor= to get the next page.
+   With ?stream=true every row of the project is streamed as one JSON array instead.
+   """
+   if stream:
+      return StreamingResponse(stream_db(stream_config_results_forResult(project_id)), media_type="application/json")
+   limit = clamp_limit(limit)
+   rows = await run_db(get_config_results_forResult, project_id, decode_cursor(cursor), limit + 1)
+   return build_page(rows, limit, "results_id")
@@ -0,0 +1,257 @@
+import json
+import tempfile
+from database import get_conn
+from projects_info import find_or_create_project, remember_project
+from results_and_configuration_info import insert_configuration_row, insert_result_row
+from store_error_info import insert_error_rows, ERROR_BATCH_SIZE
+from report_stream import ReportStreamParser
+
+# Bytes read from an uploaded report file at a time
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+def ingest_report(cur, project_name, github_url, number_of_errors, prompt,
+                  number_of_fixes, duration, run_time, errors, model=""):
+    """
+    Write one debug report (project, configuration, result and error records)
+    on the caller's cursor. Nothing is committed here.
+    """
+    project_id = find_or_create_project(cur, project_name, github_url, number_of_errors)
+    config_id = insert_configuration_row(cur, prompt, model, project_id)
+    results_id = insert_result_row(cur, number_of_fixes, duration, 0, project_id, config_id, run_time)
+    inserted_errors = insert_error_rows(cur, errors or [], project_id, config_id, run_time)
+
+    return {
+        "project_id": project_id,
+        "config_id": config_id,
+        "results_id": results_id,
+        "inserted_errors": inserted_errors,
+    }
+
+
+def save_report(project_name, github_url, number_of_errors, prompt,
+                number_of_fixes, duration, run_time, errors, model=""):
+    """
+    Save one debug report on a single connection in a single transaction.
+    If any insert fails, nothing from the report is kept.
+    """
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                saved = ingest_report(
+                    cur, project_name, github_url, number_of_errors, prompt,
+                    number_of_fixes, duration, run_time, errors, model
+                )
+        remember_project(github_url, saved["project_id"])
+        return saved
+    finally:
+        conn.close()
+
+
+def save_system_prompt(project_id, prompt, model=""):
+    """
+    Save a new system prompt for a project together with its run_time = 0
+    placeholder result, in one transaction.
+    """
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                config_id = insert_configuration_row(cur, prompt, model, project_id)
+                results_id = insert_result_row(cur, 0, 0, 0, project_id, config_id, 0)
+                return {"config_id": config_id, "results_id": results_id}
+    finally:
+        conn.close()
+
+
+def save_config_run(project_id, config_id, number_of_fixes, duration, run_time, errors):
+    """
+    Save one more test round (result row and error records) of an existing
+    configuration in one transaction. Used by the benchmark runner, where every
+    round of a prompt belongs to the same configuration.
+    """
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                results_id = insert_result_row(cur, number_of_fixes, duration, 0, project_id, config_id, run_time)
+                inserted_errors = insert_error_rows(cur, errors or [], project_id, config_id, run_time)
+                return {"results_id": results_id, "inserted_errors": inserted_errors}
+    finally:
+        conn.close()
+
+
+def save_reports(reports):
+    """
+    Save a batch of reports (dicts of ingest_report keyword arguments) in one
+    transaction. Each report runs inside its own savepoint, so one bad report
+    is rolled back on its own without losing the rest of the batch.
+    Returns one {"success": ...} entry per report, in order.
+    """
+    outcomes = []
+    saved_projects = []
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                for report in reports:
+                    cur.execute("SAVEPOINT report")
+                    try:
+                        saved = ingest_report(cur, **report)
+                    except Exception as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT report")
+                        outcomes.append({"success": False, "error": str(e)})
+                        continue
+                    cur.execute("RELEASE SAVEPOINT report")
+                    outcomes.append({"success": True, **saved})
+                    saved_projects.append((report.get("github_url"), saved["project_id"]))
+        # Only ids of a committed batch may be cached
+        for github_url, project_id in saved_projects:
+            remember_project(github_url, project_id)
+    finally:
+        conn.close()
+    return outcomes
+
+
+class StreamingReportWriter:
+    """
+    Saves a report whose fields and errors arrive one at a time (see
+    report_stream.ReportStreamParser) on the caller's cursor, in one transaction.
+
+    Errors are written ERROR_BATCH_SIZE at a time as soon as the project is
+    known. Errors that arrive before the project fields are spooled to a
+    temporary file instead of memory, so memory use does not grow with the
+    number of errors.
+    """
+
+    # Fields needed before the project / configuration rows can be created
+    PROJECT_FIELDS = ("project_name", "project_github_url", "number_of_errors_from_raygun")
+
+    def __init__(self, cur, prompt, model=""):
+        self.cur = cur
+        self.prompt = prompt
+        self.model = model
+        self.fields = {}
+        self.project_id = None
+        self.config_id = None
+        self.run_time_used = None
+        self.pending = []
+        self.spool = None
+        self.total_errors = 0
+        self.inserted_errors = 0
+
+    def add_field(self, key, value):
+        self.fields[key] = value
+        if self.config_id is None and all(f in self.fields for f in self.PROJECT_FIELDS):
+            self._start_report()
+
+    def add_error(self, error):
+        self.total_errors += 1
+        if self.config_id is None:
+            if self.spool is None:
+                self.spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+", encoding="utf-8")
+            self.spool.write(json.dumps(error) + "\n")
+            return
+        self.pending.append(error)
+        if len(self.pending) >= ERROR_BATCH_SIZE:
+            self._flush_errors()
+
+    def finish(self):
+        """Insert the result row once every field is known. Returns the same summary as ingest_report."""
+        if self.config_id is None:
+            self._start_report()
+        self._flush_errors()
+
+        run_time = self.fields.get("run_time")
+        # run_time can come after the errors in the file; fix the rows written so far
+        if self.inserted_errors and (int(run_time) if run_time else None) != self.run_time_used:
+            self.cur.execute(
+                "UPDATE error_records SET run_time = %s WHERE configuration_id = %s",
+                (int(run_time) if run_time else None, self.config_id)
+            )
+
+        results_id = insert_result_row(
+            self.cur,
+            self.fields.get("number_of_fixes"),
+            self.fields.get("total_time_spent_minutes"),
+            0,
+            self.project_id,
+            self.config_id,
+            run_time,
+        )
+        return {
+            "project_id": self.project_id,
+            "config_id": self.config_id,
+            "results_id": results_id,
+            "inserted_errors": self.inserted_errors,
+            "total_errors": self.total_errors,
+        }
+
+    def _start_report(self):
+        self.project_id = find_or_create_project(
+            self.cur,
+            self.fields.get("project_name"),
+            self.fields.get("project_github_url"),
+            self.fields.get("number_of_errors_from_raygun"),
+        )
+        self.config_id = insert_configuration_row(self.cur, self.prompt, self.model, self.project_id)
+        run_time = self.fields.get("run_time")
+        self.run_time_used = int(run_time) if run_time else None
+
+        if self.spool is not None:
+            self.spool.seek(0)
+            for line in self.spool:
+                self.pending.append(json.loads(line))
+                if len(self.pending) >= ERROR_BATCH_SIZE:
+                    self._flush_errors()
+            self.spool.close()
+            self.spool = None
+
+    def _flush_errors(self):
+        if self.pending:
+            self.inserted_errors += insert_error_rows(
+                self.cur, self.pending, self.project_id, self.config_id, self.run_time_used
+            )
+            self.pending = []
+
+    def close(self):
+        if self.spool is not None:
+            self.spool.close()
+            self.spool = None
+
+
+def save_report_stream(fileobj, prompt, model=""):
+    """
+    Parse a report file incrementally and save it in one transaction.
+    Errors go to the database in batches while the file is still being read,
+    so peak memory does not depend on the size of the report.
+    """
+    parser = ReportStreamParser()
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                writer = StreamingReportWriter(cur, prompt, model)
+                try:
+                    while True:
+                        chunk = fileobj.read(UPLOAD_CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        apply_report_events(writer, parser.feed(chunk))
+                    apply_report_events(writer, parser.close())
+                    saved = writer.finish()
+                finally:
+                    writer.close()
+        remember_project(writer.fields.get("project_github_url"), saved["project_id"])
+        return saved
+    finally:
+        conn.close()
+
+
+def apply_report_events(writer, events):
+    for event in events:
+        if event[0] == "error":
+            writer.add_error(event[1])
+        else:
+            writer.add_field(event[1], event[2])
@@ -1,27 +1,71 @@
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from pathlib import Path
 
+# -----------------------------------
+# Load environment variables
+# (before the local imports, some modules read settings at import time)
+# -----------------------------------
+env_path = Path(__file__).resolve().parent / ".env"
+load_dotenv(dotenv_path=env_path)
+
 # Import your routers
 import upload_ai_data
 import get_ai_data
+import benchmark_runner
 from mcp import mcp_router
+from mcp.mcp_client import close_mcp_client
+from mcp.mcp_jobs import job_queue
 from project_routes import router as project_router  # Projects router
 
-from database import get_conn
-import statistics
+from database import get_conn, get_pool, close_pool, connection, pool_stats
+from dashboard_info import get_dashboard_data
+from config_rollups import get_config_rollups
+from migrate import run_migrations, require_unique_project_index, MigrationRequired
+from response_cache import cached_response, cache_stats
+from conditional_get import conditional_get_middleware
+from metrics import metrics_middleware, registry as metrics_registry
+from slow_queries import slow_query_log
+from significance import close_process_pool
+from pagination import clamp_limit, decode_cursor, build_page
+from contextlib import asynccontextmanager
 
 # -----------------------------------
-# Load environment variables
+# App lifespan: open the DB pool on startup, close it on exit
 # -----------------------------------
-env_path = Path(__file__).resolve().parent / ".env"
-load_dotenv(dotenv_path=env_path)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        get_pool()
+        with connection() as conn:
+            if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "1") != "0":
+                run_migrations(conn, allow_manual=False)
+            # Also when migrations are run by hand: every ingest needs this index
+            with conn:
+                with conn.cursor() as cur:
+                    require_unique_project_index(cur)
+    except MigrationRequired as e:
+        # Duplicate projects to merge, or no unique github_url index: refuse to start
+        print(f"[startup] {str(e)}")
+        raise
+    except Exception as e:
+        # Keep the API up; the pool is retried lazily on the first request
+        print(f"[startup] Database pool not ready: {str(e)}")
+    # Background workers for /api/mcp/jobs
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await close_mcp_client()
+    close_process_pool()
+    close_pool()
 
 # -----------------------------------
 # Create FastAPI app
 # -----------------------------------
-app = FastAPI(title="Backend API")
+app = FastAPI(title="Backend API", lifespan=lifespan)
 
 # Helper function to safely convert to int
 def safe_int(value):
@@ -33,6 +77,18 @@ def safe_int(value):
     except (ValueError, TypeError):
         return 0
 
+# -----------------------------------
+# Conditional GET: 304 Not Modified for unchanged project data
+# (registered before CORS so CORS headers are also added to 304 responses)
+# -----------------------------------
+app.middleware("http")(conditional_get_middleware)
+
+# -----------------------------------
+# Metrics: latency / status / in-flight / DB time per route, served on /metrics
+# (registered after conditional GET so 304 responses are counted too)
+# -----------------------------------
+app.middleware("http")(metrics_middleware)
+
 # Define CORS allowed origins
 # -----------------------------------
 # CORS settings
@@ -57,74 +113,44 @@ app.include_router(upload_ai_data.router)
 app.include_router(get_ai_data.router)
 app.include_router(project_router)      # Projects endpoint
 app.include_router(mcp_router.router)
+app.include_router(benchmark_runner.router)
 
 # =============================================
 # Endpoint: Get detected errors from results table
 # =============================================
 @app.get("/api/results/detected_errors")
+@cached_response("detected_errors")
 def get_detected_errors(projectid:int):
     """
-    Fetch detected errors from results table.
-    Returns data sorted oldest to newest (reversed from query order).
+    Average detected errors per configuration, in the order configurations
+    were first run. NULL values are ignored by the average.
     """
     try:
         conn = get_conn()
         cur = conn.cursor()
-        
-        # Query results table ordered by result_id DESC
+
         cur.execute("""
-            SELECT detected_errors, configuration_id
+            SELECT configuration_id, AVG(detected_errors)::float8
             FROM results
             WHERE project_id = %s
             AND NOT (
             run_time = 0
             )
-            ORDER BY results_id ASC
+            GROUP BY configuration_id
+            ORDER BY MIN(results_id) ASC
         """, (projectid,))
-        
-        rows = cur.fetchall()
-        data = []
-        for r in rows:
-            data.append({
-                "error":r[0],
-                "configid":r[1],
-            })
 
+        rows = cur.fetchall()
         cur.close()
         conn.close()
 
-        configs = {}
-        for d in data:
-            error = d.get("error")
-            config = d.get("configid")
-
-            if config not in configs:
-                configs[config] = []
-            configs[config].append(error)
-        
-        averages = []
-        for config, errors in configs.items():
-            error = statistics.mean(errors)
-            averages.append({
-                "configid": config,
-                "error": error
-            })
-
-        
-        
-        # Reverse to show oldest to newest
-        # rows = list(reversed(rows))
-        
-        # Format for chart: convert null values to 0, create x-axis index
-        # result = [
-        #     {
-        #         "x": idx + 1,
-        #         "detected_errors": safe_int(row[0])
-        #     }
-        #     for idx, row in enumerate(rows)
-        # ]
-        
-        return averages
+        return [
+            {
+                "configid": r[0],
+                "error": r[1],
+            }
+            for r in rows
+        ]
     except Exception as e:
         print(f"[/api/results/detected-errors] Error: {str(e)}")
         return {"error": str(e)}
@@ -134,71 +160,38 @@ def get_detected_errors(projectid:int):
 # Endpoint: Get high quality errors from results table
 # =============================================
 @app.get("/api/results/high_quality_errors")
+@cached_response("high_quality_errors")
 def get_high_quality_errors(projectid:int):
     """
-    Fetch high quality errors from results table.
-    Returns data sorted oldest to newest (reversed from query order).
+    Average high quality errors per configuration, in the order configurations
+    were first run. NULL values are ignored by the average.
     """
     try:
         conn = get_conn()
         cur = conn.cursor()
-        
-        # Query results table ordered by result_id DESC
+
         cur.execute("""
-            SELECT high_quality_errors, configuration_id
+            SELECT configuration_id, AVG(high_quality_errors)::float8
             FROM results
             WHERE project_id = %s
             AND NOT (
             run_time = 0
             )
-            ORDER BY results_id ASC
+            GROUP BY configuration_id
+            ORDER BY MIN(results_id) ASC
         """, (projectid,))
-        
+
         rows = cur.fetchall()
         cur.close()
         conn.close()
 
-        data = []
-        for r in rows:
-            data.append({
-                "error":r[0],
-                "configid":r[1],
-            })
-
-        configs = {}
-        for d in data:
-            error = d.get("error")
-            config = d.get("configid")
-
-            if config not in configs:
-                configs[config] = []
-            configs[config].append(error)
-
-        averages = []
-        for config, errors in configs.items():
-            error = statistics.mean(errors)
-            averages.append({
-                "configid": config,
-                "high-quality": error
-            })
-
-        
-
-
-        
-        # Reverse to show oldest to newest
-        # rows = list(reversed(rows))
-        
-        # Format for chart: convert null values to 0, create x-axis index
-        # result = [
-        #     {
-        #         "x": idx + 1,
-        #         "high_quality_errors": safe_int(row[0])
-        #     }
-        #     for idx, row in enumerate(rows)
-        # ]
-        
-        return averages
+        return [
+            {
+                "configid": r[0],
+                "high-quality": r[1],
+            }
+            for r in rows
+        ]
     except Exception as e:
         print(f"[/api/results/high_quality_errors] Error: {str(e)}")
         return {"error": str(e)}
@@ -209,6 +202,7 @@ def get_high_quality_errors(projectid:int):
 # Endpoint: Compare ai models
 # =============================================
 @app.get("/api/results/compare_ai_models")
+@cached_response("compare_ai_models")
 def compare_ai_models(project_id: int, limit: int = 50):
     """
     Compare runs across AI models for one project.
@@ -271,7 +265,13 @@ app.include_router(project_router)
 # Endpoint: list error records
 # -----------------------------------
 @app.get("/api/errors")
-def list_errors(configuration_id: int = None, run_time:int = None):
+def list_errors(configuration_id: int = None, run_time:int = None, cursor: str = None, limit: int = None):
+    """
+    One page of error records, ordered by error_id.
+    Pass the returned next_cursor back as ?cursor= to get the next page.
+    """
+    limit = clamp_limit(limit)
+    after_id = decode_cursor(cursor)
     try:
         conn = get_conn()
         cur = conn.cursor()
@@ -281,21 +281,25 @@ def list_errors(configuration_id: int = None, run_time:int = None):
                 SELECT error_id, error_type, was_fixed, project_id, configuration_id
                 FROM error_records
                 WHERE configuration_id = %s AND run_time = %s
+                AND error_id > %s
                 ORDER BY error_id
+                LIMIT %s
     """,
-    (configuration_id, run_time))
+    (configuration_id, run_time, after_id, limit + 1))
         else:
             cur.execute("""
                 SELECT error_id, error_type, was_fixed, project_id, configuration_id
                 FROM error_records
+                WHERE error_id > %s
                 ORDER BY error_id
-            """)
+                LIMIT %s
+            """, (after_id, limit + 1))
         
         rows = cur.fetchall()
         cur.close()
         conn.close()
 
-        return [
+        return build_page([
             {
                 "error_id": r[0],
                 "error_type": r[1],
@@ -304,7 +308,7 @@ def list_errors(configuration_id: int = None, run_time:int = None):
                 "configuration_id": r[4]
             }
             for r in rows
-        ]
+        ], limit, "error_id")
     except Exception as e:
         print(f"[/api/errors] Error: {str(e)}")
         raise
@@ -316,39 +320,86 @@ def get_config_data_test(project_id: int):
 # Endpoint: get project-level performance data
 # -----------------------------------
 @app.get("/get_performance_data")
+@cached_response("performance_data")
 def get_performance_data(project_id: int):
     """
     Returns average performance metrics per prompt (configuration) for a project.
     Each point in the chart = one prompt with averaged number of fixes and duration.
+    Read from config_rollups, so the cost depends on the number of prompts, not runs.
+    Runs without a configuration are summed up separately and come last, with config_id null.
     """
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT 
-                configuration_id,
-                AVG(number_of_fixes) AS avg_fixes,
-                AVG(duration) AS avg_duration
-            FROM results
-            WHERE project_id = %s
-            AND (run_time IS NOT NULL AND run_time != 0)
-            GROUP BY configuration_id
-            ORDER BY configuration_id
-        """, (project_id,))
-        
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-
         return [
             {
-                "config_id": r[0],
-                "fixes": r[1],
-                "duration": r[2]
+                "config_id": r["configid"],
+                "fixes": r["avg_fixes"],
+                "duration": r["avg_duration"],
+                "fixes_std_dev": r["std_fixes"],
+                "duration_std_dev": r["std_duration"],
+                "runs": r["runs"],
             }
-            for r in rows
+            for r in get_config_rollups(project_id)
         ]
 
     except Exception as e:
         print(f"[/get_performance_data] Error: {str(e)}")
         return {"error": str(e)}
+
+
+# -----------------------------------
+# Endpoint: every dashboard chart series in one response
+# -----------------------------------
+@app.get("/api/dashboard/{project_id}")
+@cached_response("dashboard")
+def get_dashboard(project_id: int):
+    """
+    Returns all series the dashboard page draws for a project, computed from
+    one database snapshot instead of seven separate requests.
+    """
+    try:
+        return get_dashboard_data(project_id)
+    except Exception as e:
+        print(f"[/api/dashboard] Error: {str(e)}")
+        return {"error": str(e)}
+
+
+# -----------------------------------
+# Endpoint: response cache counters
+# -----------------------------------
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    return cache_stats()
+
+
+# -----------------------------------
+# Endpoint: Prometheus-style metrics
+# -----------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(
+        metrics_registry.render(pool_stats(), cache_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+# -----------------------------------
+# Endpoint: slowest recent SQL statements (with plans if SLOW_QUERY_EXPLAIN=1)
+# Statements, parameters and plans can contain report data, so the endpoints
+# only exist with DEBUG_ENDPOINTS=1
+# -----------------------------------
+def require_debug_endpoints():
+    if os.getenv("DEBUG_ENDPOINTS", "0") != "1":
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/debug/slow_queries")
+def get_slow_queries():
+    require_debug_endpoints()
+    return {"threshold_ms": float(os.getenv("SLOW_QUERY_MS", "500")), "queries": slow_query_log.entries()}
+
+
+@app.delete("/debug/slow_queries")
+def clear_slow_queries():
+    require_debug_endpoints()
+    slow_query_log.clear()
+    return {"success": True}
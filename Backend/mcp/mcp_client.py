@@ -1,18 +1,68 @@
 import httpx
 import json
-from typing import Dict, Any
+import os
+from typing import AsyncIterator, Dict, Any, Optional
 import time
 
+
+#Builds the shared HTTP client settings from the environment
+#MCP_MAX_CONNECTIONS / MCP_MAX_KEEPALIVE   connection pool size / idle connections kept open;
+#                                         the size defaults to BENCHMARK_MAX_CONCURRENCY + MCP_JOB_WORKERS
+#MCP_KEEPALIVE_EXPIRY                     seconds an idle connection is kept
+#MCP_CONNECT_TIMEOUT / MCP_READ_TIMEOUT   seconds; the read timeout covers a whole agent run
+#MCP_POOL_TIMEOUT                         seconds a call waits for a free connection, default MCP_READ_TIMEOUT
+#MCP_HTTP2=1                              use HTTP/2 when the h2 package is installed
+def client_settings():
+    http2 = os.getenv("MCP_HTTP2", "0") == "1"
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("[mcp] MCP_HTTP2=1 but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+    # Enough for a benchmark at its largest concurrency while the job queue runs
+    default_connections = int(os.getenv("BENCHMARK_MAX_CONCURRENCY", "16")) + int(os.getenv("MCP_JOB_WORKERS", "4"))
+    read_timeout = float(os.getenv("MCP_READ_TIMEOUT", "1800"))
+    return {
+        "limits": httpx.Limits(
+            max_connections=int(os.getenv("MCP_MAX_CONNECTIONS", str(default_connections))),
+            max_keepalive_connections=int(os.getenv("MCP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("MCP_KEEPALIVE_EXPIRY", "30")),
+        ),
+        # Every connection can be busy with an agent run, so a call waiting for
+        # one may have to wait for a run to finish, not just for a connect
+        "timeout": httpx.Timeout(
+            read_timeout,
+            connect=float(os.getenv("MCP_CONNECT_TIMEOUT", "10")),
+            pool=float(os.getenv("MCP_POOL_TIMEOUT", str(read_timeout))),
+        ),
+        "http2": http2,
+    }
+
+
 # MCP class
 class MCPClient:
     # constructor
-    def __init__(self, url, token):
+    # One MCPClient keeps one pooled httpx client, so calls reuse open
+    # (keep-alive) connections instead of a new TCP/TLS handshake each time
+    def __init__(self, url, token, http_client: Optional[httpx.AsyncClient] = None):
         self.url=url
         self.token=token
-    
-    
-    async def call_tool(self, tool_name, prompt)->Dict[str,Any]:
-        
+        self._client = http_client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(**client_settings())
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+    def _request(self, tool_name, prompt):
         # Construct the payload
         payload={
             "jsonrpc":"2.0",
@@ -23,65 +73,95 @@ class MCPClient:
                 "arguments":{
                     "prompt":prompt
                 }
-                
+
             }
-            
+
         }
         # set headers
         headers = {
             "Content-Type" : "application/json",
+            "Accept" : "application/json, text/event-stream",
             "Authorization" : f"Bearer {self.token}"
         }
-      
-        # send requests
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.url,
-                json=payload,
-                headers=headers,
-                timeout=1800.0
-            )
-            
-            
-            # print("Status Code:", response.status_code)
-            # print("Response body:", response.text)
+        return payload, headers
+
+    async def stream_tool(self, tool_name, prompt) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Call a tool and yield every JSON-RPC message of its SSE response as soon
+        as it arrives, instead of waiting for the whole agent run to finish.
+        """
+        payload, headers = self._request(tool_name, prompt)
+        async with self.client.stream("POST", self.url, json=payload, headers=headers) as response:
             response.raise_for_status()
-            
-            rawtext=response.text
-            all_messages = [] 
-            
-            for line in rawtext.split('\n'):
-                if line.startswith('data:'):
-                    json_str = line[5:].strip() 
-                    # result=json.loads (json_str)
-                    # =========
-                    if json_str:
-                        try:
-                            result = json.loads(json_str)
-                  
-                            if 'result' in result and 'content' in result['result']:
-                                all_messages.append(result)
-                        except json.JSONDecodeError:
-                            continue
-        
-       
-            if all_messages:
-           
-                combined_text = ""
-                for msg in all_messages:
-                     combined_text += msg['result']['content'][0]['text'] + "\n\n"
-            
-                return {
-                "result": {
-                    "content": [{
-                        "type": "text",
-                        "text": combined_text
-                    }]
-                    }
+            async for data in iter_sse_data(response.aiter_lines()):
+                try:
+                    yield json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+
+    async def call_tool(self, tool_name, prompt)->Dict[str,Any]:
+        # Only the text of each result message is kept, not the raw response
+        texts = []
+        async for message in self.stream_tool(tool_name, prompt):
+            if is_result_message(message):
+                texts.append(message['result']['content'][0]['text'])
+
+        if texts:
+            combined_text = "".join(text + "\n\n" for text in texts)
+
+            return {
+            "result": {
+                "content": [{
+                    "type": "text",
+                    "text": combined_text
+                }]
                 }
-                    
-                    
-                    
-            #         return result
-            # raise Exception("No data found in SSE response")
-          
\ No newline at end of file
+            }
+
+        # raise Exception("No data found in SSE response")
+
+
+#True for a message carrying tool output (result.content)
+def is_result_message(message):
+    return isinstance(message, dict) and isinstance(message.get('result'), dict) and 'content' in message['result']
+
+
+async def iter_sse_data(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Yield the data of each Server-Sent Event from an async iterator of lines.
+    An event ends at a blank line; several data: lines of one event are joined with newlines.
+    """
+    data_lines = []
+    async for line in lines:
+        if line == "":
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+        elif line.startswith("data:"):
+            value = line[5:]
+            data_lines.append(value[1:] if value.startswith(" ") else value)
+        # event:, id:, retry: and comment lines carry nothing we use
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+_shared_client: Optional[MCPClient] = None
+
+
+#Returns the app-wide MCPClient, created from MCP_SERVER_URL / MCP_BEARER_TOKEN on first use
+def get_mcp_client() -> MCPClient:
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = MCPClient(
+            url = os.getenv("MCP_SERVER_URL"),
+            token = os.getenv("MCP_BEARER_TOKEN")
+        )
+    return _shared_client
+
+
+#Closes the shared client's connections; called on app shutdown
+async def close_mcp_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -0,0 +1,263 @@
+"""
+Background jobs for long-running MCP tool calls
+
+POST /api/mcp/jobs stores the call in mcp_jobs and returns its job id at once.
+A fixed number of worker tasks take job ids from an asyncio queue and run
+MCPClient.call_tool, so no HTTP request stays open while the agent works.
+Status and result are written back to mcp_jobs, and the browser polls
+GET /api/mcp/jobs/{job_id} (or keeps one connection on .../stream).
+
+A worker claims a job with FOR UPDATE SKIP LOCKED and holds a lease on it:
+worker_id names the process and heartbeat_at is refreshed while the tool call
+runs. Only running jobs whose lease expired (their process died) are queued
+again, on startup and by a periodic sweep, so a rolling restart or a second
+API process never runs a live job twice. Queued jobs are picked up on startup
+as well; whichever process claims one first runs it.
+
+MCP_JOB_WORKERS        concurrent tool calls run by the queue, default 4
+MCP_JOB_LEASE_SECONDS  lease without a heartbeat before a running job is retried, default 60
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from typing import Optional
+from psycopg2.extras import Json
+
+from database import get_conn, run_db
+from .mcp_client import get_mcp_client
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Identifies this process in mcp_jobs.worker_id
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+#Stores a new queued job and returns its id
+def create_job(tool_name, prompt):
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "INSERT INTO mcp_jobs (tool_name, prompt) VALUES (%s, %s) RETURNING job_id",
+                    (tool_name, prompt)
+                )
+                return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+#Claims a queued job for this worker and returns (tool_name, prompt), or None if it was already taken
+def start_job(job_id, worker_id):
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE mcp_jobs
+                    SET status = 'running', started_at = now(), worker_id = %s, heartbeat_at = now()
+                    WHERE job_id = (
+                        SELECT job_id FROM mcp_jobs
+                        WHERE job_id = %s AND status = 'queued'
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING tool_name, prompt
+                    """,
+                    (worker_id, job_id)
+                )
+                return cur.fetchone()
+    finally:
+        conn.close()
+
+
+#Renews this worker's lease on a running job
+def heartbeat_job(job_id, worker_id):
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE mcp_jobs SET heartbeat_at = now()
+                    WHERE job_id = %s AND worker_id = %s AND status = 'running'
+                    """,
+                    (job_id, worker_id)
+                )
+    finally:
+        conn.close()
+
+
+#Stores the outcome of a job: its result, or the error that ended it. Ignored if
+#the job is no longer leased by this worker (its lease expired and it was retried).
+def finish_job(job_id, worker_id, result=None, error=None):
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE mcp_jobs
+                    SET status = %s, result = %s, error = %s, finished_at = now()
+                    WHERE job_id = %s AND worker_id = %s AND status = 'running'
+                    """,
+                    ("failed" if error else "succeeded", Json(result) if result is not None else None, error, job_id, worker_id)
+                )
+    finally:
+        conn.close()
+
+
+#Fetches one job as a dict, or None when the id is unknown
+def get_job(job_id):
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT job_id, tool_name, status, result, error, created_at, started_at, finished_at
+            FROM mcp_jobs
+            WHERE job_id = %s
+            """,
+            (job_id,)
+        )
+        row = cur.fetchone()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {
+        "job_id": row[0],
+        "tool_name": row[1],
+        "status": row[2],
+        "result": row[3],
+        "error": row[4],
+        "created_at": row[5].isoformat() if row[5] else None,
+        "started_at": row[6].isoformat() if row[6] else None,
+        "finished_at": row[7].isoformat() if row[7] else None,
+    }
+
+
+#Puts running jobs whose lease expired back to queued and returns their ids
+def requeue_expired_jobs(lease_seconds):
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE mcp_jobs
+                    SET status = 'queued', started_at = NULL, worker_id = NULL, heartbeat_at = NULL
+                    WHERE job_id IN (
+                        SELECT job_id FROM mcp_jobs
+                        WHERE status = 'running'
+                        AND COALESCE(heartbeat_at, started_at, created_at) < now() - make_interval(secs => %s)
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING job_id
+                    """,
+                    (lease_seconds,)
+                )
+                return sorted(row[0] for row in cur.fetchall())
+    finally:
+        conn.close()
+
+
+#Requeues jobs with an expired lease and returns every queued id, oldest first
+def requeue_unfinished_jobs(lease_seconds):
+    requeue_expired_jobs(lease_seconds)
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT job_id FROM mcp_jobs WHERE status = 'queued' ORDER BY job_id")
+        rows = cur.fetchall()
+        cur.close()
+        conn.commit()
+    finally:
+        conn.close()
+    return [row[0] for row in rows]
+
+
+class JobQueue:
+    """asyncio queue of job ids worked off by a bounded number of worker tasks."""
+
+    def __init__(self, workers=None, client=None, lease_seconds=None, worker_id=WORKER_ID):
+        self.workers = workers or int(os.getenv("MCP_JOB_WORKERS", "4"))
+        self.lease_seconds = lease_seconds or float(os.getenv("MCP_JOB_LEASE_SECONDS", "60"))
+        self.worker_id = worker_id
+        self.client = client
+        self.queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+        try:
+            for job_id in await run_db(requeue_unfinished_jobs, self.lease_seconds):
+                self.queue.put_nowait(job_id)
+        except Exception as e:
+            print(f"[mcp_jobs] Could not requeue unfinished jobs: {str(e)}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, tool_name, prompt):
+        job_id = await run_db(create_job, tool_name, prompt)
+        self.queue.put_nowait(job_id)
+        return job_id
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception as e:
+                print(f"[mcp_jobs] Job {job_id} could not be updated: {str(e)}")
+            finally:
+                self.queue.task_done()
+
+    async def _sweep(self):
+        # Picks up jobs of processes that died while this one keeps running
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                for job_id in await run_db(requeue_expired_jobs, self.lease_seconds):
+                    print(f"[mcp_jobs] Job {job_id} lost its worker, queued again")
+                    self.queue.put_nowait(job_id)
+            except Exception as e:
+                print(f"[mcp_jobs] Could not requeue expired jobs: {str(e)}")
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await run_db(heartbeat_job, job_id, self.worker_id)
+            except Exception as e:
+                print(f"[mcp_jobs] Job {job_id} heartbeat failed: {str(e)}")
+
+    async def run_job(self, job_id):
+        job = await run_db(start_job, job_id, self.worker_id)
+        if job is None:
+            return
+        tool_name, prompt = job
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            client = self.client or get_mcp_client()
+            result = await client.call_tool(tool_name, prompt)
+        except Exception as e:
+            print(f"[mcp_jobs] Job {job_id} failed: {str(e)}")
+            await run_db(finish_job, job_id, self.worker_id, None, str(e) or type(e).__name__)
+            return
+        finally:
+            heartbeat.cancel()
+        await run_db(finish_job, job_id, self.worker_id, result)
+
+
+job_queue = JobQueue()
@@ -1,8 +1,12 @@
+import json
 from pydantic import BaseModel
-from .mcp_client import MCPClient
-import os
+from .mcp_client import get_mcp_client
+from .mcp_jobs import job_queue, get_job, FINISHED_STATUSES
+from database import run_db
+import asyncio
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
 
 router = APIRouter(prefix="/api/mcp")
@@ -16,10 +20,7 @@ class MCPRequest(BaseModel):
 @router.post("/call_tool")
 async def call_mcp_tool(request:MCPRequest):
     try: 
-        client = MCPClient(
-        url = os.getenv("MCP_SERVER_URL"),
-        token =os.getenv("MCP_BEARER_TOKEN") 
-    )
+        client = get_mcp_client()
      
         result = await client.call_tool(request.tool_name,request.prompt)
    
@@ -34,5 +35,84 @@ async def call_mcp_tool(request:MCPRequest):
         import traceback
         traceback.print_exc() 
         raise HTTPException(status_code=500, detail=str(e))
- 
-    
\ No newline at end of file
+
+
+@router.post("/call_tool/stream")
+async def stream_mcp_tool(request:MCPRequest):
+    """
+    Same call as /call_tool, but every MCP message is forwarded to the browser
+    as a Server-Sent Event as soon as it arrives. The stream ends with an
+    "event: done" (or "event: error") message.
+    """
+    client = get_mcp_client()
+
+    async def events():
+        try:
+            async for message in client.stream_tool(request.tool_name, request.prompt):
+                yield f"data: {json.dumps(message)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            print(f"[/api/mcp/call_tool/stream] Error: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    # X-Accel-Buffering stops proxies such as nginx from holding back the events
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs")
+async def submit_mcp_job(request:MCPRequest):
+    """
+    Queue a tool call and return its job id straight away. The call runs in a
+    background worker; poll /api/mcp/jobs/{job_id} for its status and result.
+    """
+    try:
+        job_id = await job_queue.submit(request.tool_name, request.prompt)
+        return {"success": True, "job_id": job_id, "status": "queued"}
+    except Exception as e:
+        print(f"[/api/mcp/jobs] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+async def get_mcp_job(job_id: int):
+    job = await run_db(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+# Seconds between status checks of /jobs/{job_id}/stream
+JOB_STREAM_POLL_SECONDS = 2.0
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_mcp_job(job_id: int):
+    """
+    Server-Sent Events with the job's status, sent whenever it changes; the
+    last event carries the finished job including its result.
+    """
+    job = await run_db(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def events():
+        current = job
+        last_status = None
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield f"data: {json.dumps(current)}\n\n"
+            if current["status"] in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(JOB_STREAM_POLL_SECONDS)
+            current = await run_db(get_job, job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
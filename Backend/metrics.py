@@ -0,0 +1,256 @@
+"""
+Request and database metrics, served by /metrics in the Prometheus text format.
+
+metrics_middleware records, per route template (e.g. /api/dashboard/{project_id}):
+  http_requests_total             count by method, route and status
+  http_request_duration_seconds   latency histogram (until the response starts)
+  http_requests_in_flight         requests whose response is not fully sent yet
+  http_request_db_seconds         time spent in SQL per request, histogram
+  http_request_db_queries_total   statements executed
+
+The DB totals are observed once the response body has been sent, so SQL run
+while a StreamingResponse is produced (stream_db exports) counts too.
+
+Every pooled connection uses TimingCursor, which adds the duration of each
+statement to the current request's totals through a context variable. The
+variable is copied into run_db worker threads, so offloaded queries count too.
+Statements over SLOW_QUERY_MS also go to the slow-query log (slow_queries.py).
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from bisect import bisect_left
+
+from psycopg2 import extensions
+from starlette.routing import Match
+
+import slow_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram; not locked, the registry holds the lock."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestDbTime:
+    """DB time and statement count of one request."""
+    __slots__ = ("seconds", "queries")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+
+
+_request_db_time: ContextVar = ContextVar("request_db_time", default=None)
+
+
+class TimingCursor(extensions.cursor):
+    """
+    psycopg2 cursor that adds every statement's duration to the current request
+    and reports slow ones to the slow-query log.
+    """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, vars)
+        except Exception:
+            record_query(time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+        record_query(elapsed)
+        _check_slow(self, query, vars, elapsed)
+        return result
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            result = super().executemany(query, vars_list)
+        except Exception:
+            record_query(time.perf_counter() - started)
+            raise
+        elapsed = time.perf_counter() - started
+        record_query(elapsed)
+        _check_slow(self, query, None, elapsed)
+        return result
+
+
+def _check_slow(cursor, query, params, seconds):
+    # Logging must never fail the query it is reporting on
+    try:
+        slow_queries.check(cursor, query, params, seconds)
+    except Exception as e:
+        print(f"[slow_query] Error: {str(e)}")
+
+
+def record_query(seconds):
+    current = _request_db_time.get()
+    if current is not None:
+        current.seconds += seconds
+        current.queries += 1
+    registry.observe_query(seconds)
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}       # (method, route, status) -> count
+        self.latency = {}        # (method, route) -> Histogram
+        self.db_time = {}        # (method, route) -> Histogram
+        self.db_queries = {}     # (method, route) -> count
+        self.in_flight = {}      # route -> gauge
+        self.queries = Histogram(DB_TIME_BUCKETS)
+
+    def start(self, route):
+        with self._lock:
+            self.in_flight[route] = self.in_flight.get(route, 0) + 1
+
+    def finish(self, method, route, status, seconds, db):
+        key = (method, route)
+        with self._lock:
+            self.in_flight[route] -= 1
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.db_time.setdefault(key, Histogram(DB_TIME_BUCKETS)).observe(db.seconds)
+            self.db_queries[key] = self.db_queries.get(key, 0) + db.queries
+
+    def observe_query(self, seconds):
+        with self._lock:
+            self.queries.observe(seconds)
+
+    def reset(self):
+        self.__init__()
+
+    def render(self, pool_stats=None, cache_stats=None):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            _counter(lines, "http_requests_total", "HTTP requests handled",
+                     ((_labels(method=m, route=r, status=s), v) for (m, r, s), v in sorted(self.requests.items())))
+            _histograms(lines, "http_request_duration_seconds", "Time until the response starts",
+                        self.latency)
+            _gauge(lines, "http_requests_in_flight", "Requests whose response is not fully sent",
+                   ((_labels(route=r), v) for r, v in sorted(self.in_flight.items())))
+            _histograms(lines, "http_request_db_seconds", "Time spent in SQL per request, streamed bodies included",
+                        self.db_time)
+            _counter(lines, "http_request_db_queries_total", "SQL statements run by requests",
+                     ((_labels(method=m, route=r), v) for (m, r), v in sorted(self.db_queries.items())))
+            _histograms(lines, "db_query_duration_seconds", "Duration of every SQL statement",
+                        {(): self.queries})
+
+        if pool_stats:
+            _gauge(lines, "db_pool_connections", "Pooled connections by state",
+                   [(_labels(state="idle"), pool_stats["idle"]), (_labels(state="in_use"), pool_stats["in_use"])])
+            _gauge(lines, "db_pool_max_connections", "Pool size limit", [("", pool_stats["max"])])
+            _counter(lines, "db_pool_checkouts_total", "Connections borrowed", [("", pool_stats["checkouts"])])
+            _counter(lines, "db_pool_timeouts_total", "Checkouts that timed out", [("", pool_stats["timeouts"])])
+            _counter(lines, "db_pool_wait_seconds_total", "Time spent waiting for a connection",
+                     [("", pool_stats["wait_seconds"])])
+        if cache_stats:
+            _counter(lines, "response_cache_hits_total", "Response cache hits", [("", cache_stats["hits"])])
+            _counter(lines, "response_cache_misses_total", "Response cache misses", [("", cache_stats["misses"])])
+            _gauge(lines, "response_cache_entries", "Cached responses", [("", cache_stats["size"])])
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _header(lines, name, help_text, kind):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _counter(lines, name, help_text, samples):
+    _header(lines, name, help_text, "counter")
+    lines.extend(f"{name}{labels} {_format(value)}" for labels, value in samples)
+
+
+def _gauge(lines, name, help_text, samples):
+    _header(lines, name, help_text, "gauge")
+    lines.extend(f"{name}{labels} {_format(value)}" for labels, value in samples)
+
+
+def _histograms(lines, name, help_text, histograms):
+    _header(lines, name, help_text, "histogram")
+    for key, histogram in sorted(histograms.items()):
+        base = dict(zip(("method", "route"), key))
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{_labels(**base, le=bound)} {count}")
+        suffix = _labels(**base) if base else ""
+        lines.append(f"{name}_sum{suffix} {_format(histogram.sum)}")
+        lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+registry = MetricsRegistry()
+
+
+#Route template of a request (so /api/dashboard/7 and /api/dashboard/8 share one series)
+def route_label(request):
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+async def _finish_after(body, finish):
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        finish()
+
+
+async def metrics_middleware(request, call_next):
+    route = route_label(request)
+    db = RequestDbTime()
+    token = _request_db_time.set(db)
+    registry.start(route)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        registry.finish(request.method, route, "500", time.perf_counter() - started, db)
+        raise
+    finally:
+        # The endpoint runs in its own copy of the context, which keeps adding to db
+        _request_db_time.reset(token)
+    latency = time.perf_counter() - started
+
+    def finish():
+        registry.finish(request.method, route, str(response.status_code), latency, db)
+
+    # Streamed bodies run their SQL after the response starts: count it when the body is done
+    response.body_iterator = _finish_after(response.body_iterator, finish)
+    return response
@@ -0,0 +1,341 @@
+"""
+Versioned database migrations
+
+Every schema change is a numbered step in MIGRATIONS. Applied versions are
+recorded in schema_migrations, so running this again only applies the new
+steps. All steps use IF NOT EXISTS, so they are also safe on a database that
+was created by hand before this script existed.
+
+Run it from the CLI:
+
+    cd Backend
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied / pending versions
+
+The API also runs it on startup unless RUN_MIGRATIONS_ON_STARTUP=0. Steps in
+MANUAL_MIGRATIONS can rewrite or delete existing rows: startup applies them
+only when their check finds nothing to change (e.g. no duplicate projects),
+and otherwise refuses to start until `python migrate.py` has been run by hand.
+"""
+
+import argparse
+from database import get_conn, close_pool
+from config_rollups import create_rollup_table
+
+# Any constant works; it only has to be the same for every process running migrations
+MIGRATION_LOCK_ID = 4_207_311
+
+CREATE_MIGRATIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+BASE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id SERIAL PRIMARY KEY,
+    project_name TEXT,
+    github_url TEXT,
+    number_of_errors INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS configuration (
+    configuration_id SERIAL PRIMARY KEY,
+    system_prompt TEXT,
+    model TEXT,
+    project_id INTEGER REFERENCES projects (project_id)
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    results_id SERIAL PRIMARY KEY,
+    number_of_fixes INTEGER,
+    duration DOUBLE PRECISION,
+    tokens INTEGER,
+    project_id INTEGER REFERENCES projects (project_id),
+    configuration_id INTEGER REFERENCES configuration (configuration_id),
+    run_time INTEGER,
+    model TEXT,
+    high_quality_errors INTEGER,
+    detected_errors INTEGER,
+    false_positives INTEGER,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS error_records (
+    error_id SERIAL PRIMARY KEY,
+    error_name TEXT NOT NULL,
+    error_type TEXT NOT NULL,
+    was_fixed BOOLEAN NOT NULL DEFAULT FALSE,
+    project_id INTEGER REFERENCES projects (project_id),
+    configuration_id INTEGER REFERENCES configuration (configuration_id),
+    run_time INTEGER
+);
+"""
+
+# Indexes for the read paths:
+#   results filtered by project (and configuration / run_time), ordered by results_id
+#   error_records filtered by configuration_id + run_time, and paged by error_id
+# The partial indexes skip the run_time = 0 placeholder rows the endpoints never read.
+INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS results_project_results_idx
+    ON results (project_id, results_id);
+CREATE INDEX IF NOT EXISTS results_project_config_run_idx
+    ON results (project_id, configuration_id, results_id)
+    WHERE run_time <> 0;
+CREATE INDEX IF NOT EXISTS results_config_run_time_idx
+    ON results (configuration_id, run_time);
+CREATE INDEX IF NOT EXISTS configuration_project_idx
+    ON configuration (project_id, configuration_id);
+CREATE INDEX IF NOT EXISTS error_records_config_run_time_idx
+    ON error_records (configuration_id, run_time) INCLUDE (was_fixed);
+CREATE INDEX IF NOT EXISTS error_records_project_error_idx
+    ON error_records (project_id, error_id);
+CREATE INDEX IF NOT EXISTS config_rollups_project_idx
+    ON config_rollups (project_id);
+"""
+
+# Older databases can hold several projects for one github_url (the old
+# SELECT-then-INSERT could race). Keep the lowest project_id, move every row
+# of the duplicates onto it, then enforce uniqueness.
+MERGE_DUPLICATE_PROJECTS_SQL = """
+CREATE TEMP TABLE project_merge ON COMMIT DROP AS
+SELECT project_id AS old_id,
+       MIN(project_id) OVER (PARTITION BY github_url) AS new_id
+FROM projects
+WHERE github_url IS NOT NULL;
+
+DELETE FROM project_merge WHERE old_id = new_id;
+
+UPDATE configuration t SET project_id = m.new_id FROM project_merge m WHERE t.project_id = m.old_id;
+UPDATE results t SET project_id = m.new_id FROM project_merge m WHERE t.project_id = m.old_id;
+UPDATE error_records t SET project_id = m.new_id FROM project_merge m WHERE t.project_id = m.old_id;
+UPDATE config_rollups t SET project_id = m.new_id FROM project_merge m WHERE t.project_id = m.old_id;
+DELETE FROM projects p USING project_merge m WHERE p.project_id = m.old_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS projects_github_url_key ON projects (github_url);
+"""
+
+
+DUPLICATE_PROJECTS_SQL = """
+SELECT github_url, array_agg(project_id ORDER BY project_id)
+FROM projects
+WHERE github_url IS NOT NULL
+GROUP BY github_url
+HAVING COUNT(*) > 1
+"""
+
+
+#Returns (github_url, project ids) for every github_url held by more than one project
+def duplicate_projects(cur):
+    cur.execute(DUPLICATE_PROJECTS_SQL)
+    return cur.fetchall()
+
+
+#Merges duplicate projects (logging every merge), then makes sure the sequences are past every id the merge kept
+def merge_duplicate_projects(cur):
+    for github_url, project_ids in duplicate_projects(cur):
+        print(f"[migrate] Merging projects {project_ids[1:]} into {project_ids[0]} ({github_url})")
+    cur.execute(MERGE_DUPLICATE_PROJECTS_SQL)
+    sync_sequences(cur)
+
+
+# Long-running MCP tool calls submitted through /api/mcp/jobs (see mcp/mcp_jobs.py)
+MCP_JOBS_SQL = """
+CREATE TABLE IF NOT EXISTS mcp_jobs (
+    job_id SERIAL PRIMARY KEY,
+    tool_name TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS mcp_jobs_unfinished_idx
+    ON mcp_jobs (job_id)
+    WHERE status IN ('queued', 'running');
+"""
+
+# Leases on running jobs: the worker process that claimed a job and its last
+# heartbeat, so only jobs of a process that stopped heart-beating are retried
+MCP_JOB_LEASES_SQL = """
+ALTER TABLE mcp_jobs ADD COLUMN IF NOT EXISTS worker_id TEXT;
+ALTER TABLE mcp_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+"""
+
+# Rollups kept as (count, mean, M2) instead of running sums and sums of
+# squares, whose difference loses precision. Recomputed from results.
+ROLLUP_MOMENTS_SQL = """
+ALTER TABLE config_rollups
+    ADD COLUMN IF NOT EXISTS mean_fixes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS m2_fixes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS mean_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS m2_duration DOUBLE PRECISION NOT NULL DEFAULT 0;
+UPDATE config_rollups t SET
+    run_count = r.run_count,
+    fixes_count = r.fixes_count,
+    mean_fixes = COALESCE(r.mean_fixes, 0),
+    m2_fixes = COALESCE(r.m2_fixes, 0),
+    duration_count = r.duration_count,
+    mean_duration = COALESCE(r.mean_duration, 0),
+    m2_duration = COALESCE(r.m2_duration, 0)
+FROM (
+    SELECT
+        configuration_id,
+        COUNT(*) AS run_count,
+        COUNT(number_of_fixes) AS fixes_count,
+        AVG(number_of_fixes::float8) AS mean_fixes,
+        VAR_SAMP(number_of_fixes::float8) * (COUNT(number_of_fixes) - 1) AS m2_fixes,
+        COUNT(duration) AS duration_count,
+        AVG(duration::float8) AS mean_duration,
+        VAR_SAMP(duration::float8) * (COUNT(duration) - 1) AS m2_duration
+    FROM results
+    WHERE run_time IS NOT NULL AND run_time != 0
+    GROUP BY configuration_id
+) r
+WHERE t.configuration_id = r.configuration_id;
+ALTER TABLE config_rollups
+    DROP COLUMN IF EXISTS sum_fixes,
+    DROP COLUMN IF EXISTS sumsq_fixes,
+    DROP COLUMN IF EXISTS sum_duration,
+    DROP COLUMN IF EXISTS sumsq_duration;
+"""
+
+# (version, name, step); a step is SQL text or a function taking the cursor.
+# Never edit or reorder an applied step, add a new one instead.
+MIGRATIONS = [
+    (1, "base tables", BASE_TABLES_SQL),
+    (2, "config rollups", create_rollup_table),
+    (3, "read path indexes", INDEXES_SQL),
+    (4, "unique project github_url", merge_duplicate_projects),
+    (5, "mcp jobs", MCP_JOBS_SQL),
+    (6, "mcp job leases", MCP_JOB_LEASES_SQL),
+    (7, "config rollup moments", ROLLUP_MOMENTS_SQL),
+]
+
+# Steps that can merge or delete existing rows -> check returning the rows they would change.
+# Startup applies such a step only when its check returns nothing; otherwise use the CLI.
+MANUAL_MIGRATIONS = {4: duplicate_projects}
+
+
+class MigrationRequired(RuntimeError):
+    """A pending migration changes data and has to be applied by hand."""
+
+
+# Tables whose SERIAL sequence is moved past MAX(id) by steps that move rows
+SEQUENCE_COLUMNS = [
+    ("projects", "project_id"),
+    ("configuration", "configuration_id"),
+    ("results", "results_id"),
+    ("error_records", "error_id"),
+]
+
+
+#Refuses to go on without the unique index ingest relies on (projects_info.find_or_create_project)
+def require_unique_project_index(cur):
+    cur.execute("SELECT to_regclass('projects_github_url_key') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        raise MigrationRequired(
+            "The unique index projects_github_url_key is missing, so reports cannot be saved; "
+            "run `python migrate.py` from Backend first"
+        )
+
+
+#Returns the set of migration versions already recorded in the database
+def applied_versions(cur):
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+#Returns the migrations that still have to run, in order
+def pending_migrations(applied, migrations=MIGRATIONS):
+    return [m for m in sorted(migrations, key=lambda m: m[0]) if m[0] not in applied]
+
+
+#Moves every SERIAL sequence past the table's MAX(id). Only ever forward: another
+#process may already hold higher nextval()s for rows it has not committed yet.
+#Only call it from a migration step, under the migration lock.
+def sync_sequences(cur):
+    for table, column in SEQUENCE_COLUMNS:
+        cur.execute(
+            f"""
+            SELECT setval(
+                seq,
+                GREATEST(
+                    COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1,
+                    COALESCE(pg_sequence_last_value(seq::regclass) + 1, 1)
+                ),
+                false
+            )
+            FROM (SELECT pg_get_serial_sequence('{table}', '{column}') AS seq) s
+            WHERE seq IS NOT NULL
+            """
+        )
+
+
+def run_migrations(conn, migrations=MIGRATIONS, allow_manual=True):
+    """
+    Apply every pending migration in one transaction and return their versions.
+    A transaction-level advisory lock makes concurrent callers (several API
+    workers starting at once) wait instead of applying a step twice.
+    With allow_manual=False (startup) a MANUAL_MIGRATIONS step whose check finds
+    rows to change stops the run: the steps before it are committed, then
+    MigrationRequired is raised.
+    """
+    applied_now = []
+    blocked = None
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cur.execute(CREATE_MIGRATIONS_TABLE_SQL)
+            for version, name, step in pending_migrations(applied_versions(cur), migrations):
+                if not allow_manual and version in MANUAL_MIGRATIONS:
+                    affected = MANUAL_MIGRATIONS[version](cur)
+                    if affected:
+                        blocked = (version, name, len(affected))
+                        break
+                if callable(step):
+                    step(cur)
+                else:
+                    cur.execute(step)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                applied_now.append(version)
+                print(f"[migrate] Applied {version}: {name}")
+    if blocked:
+        raise MigrationRequired(
+            f"Migration {blocked[0]} ({blocked[1]}) would change existing data ({blocked[2]} affected); "
+            "back up the database and run `python migrate.py` from Backend first"
+        )
+    return applied_now
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations only")
+    args = parser.parse_args()
+
+    conn = get_conn()
+    try:
+        if args.status:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(CREATE_MIGRATIONS_TABLE_SQL)
+                    applied = applied_versions(cur)
+            for version, name, _ in MIGRATIONS:
+                print(f"{version:>4}  {'applied' if version in applied else 'pending':<8} {name}")
+            return
+        applied_now = run_migrations(conn)
+        print(f"Applied {len(applied_now)} migration(s); database is up to date.")
+    finally:
+        conn.close()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are read with `WHERE id > last_id ORDER BY id LIMIT n + 1`, which costs
+the same on the first page as on the millionth, unlike OFFSET. The client gets
+an opaque next_cursor token and passes it back as ?cursor= for the next page.
+"""
+
+import base64
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+
+def clamp_limit(limit):
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Id to continue after; 0 (start of the table) when there is no cursor."""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_page(rows, limit, id_key):
+    """
+    Turn up to limit + 1 fetched rows into {"items", "next_cursor"}.
+    The extra row only tells us whether another page exists.
+    """
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1][id_key]) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
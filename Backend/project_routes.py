@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from projects_info import insert_project
 from database import get_conn
+from response_cache import cached_response
 
 router = APIRouter()
 
@@ -36,9 +37,11 @@ def fetch_projects():
 
 # --- Fixed Errors Summary Endpoint ---
 @router.get("/fixed_errors_summary")
+@cached_response("fixed_errors_summary")
 def fixed_errors_summary(project_id: int):
     """
     Returns total fixed errors per system prompt and model for a given project.
+    Fixed error counts come from config_rollups instead of scanning error_records.
     """
     conn = get_conn()
     try:
@@ -47,11 +50,10 @@ def fixed_errors_summary(project_id: int):
             SELECT
                 c.model,
                 c.system_prompt,
-                COUNT(e.error_id) AS total_fixed_errors
+                COALESCE(SUM(cr.fixed_error_count), 0)::int AS total_fixed_errors
             FROM configuration c
-            LEFT JOIN error_records e
-                ON c.configuration_id = e.configuration_id
-                AND e.was_fixed = TRUE
+            LEFT JOIN config_rollups cr
+                ON c.configuration_id = cr.configuration_id
             WHERE c.project_id = %s
             GROUP BY c.model, c.system_prompt
             ORDER BY total_fixed_errors DESC
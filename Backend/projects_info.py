@@ -1,39 +1,61 @@
-from database import get_conn 
+import os
+from database import get_conn
+from response_cache import TTLCache
+
+# github_url -> project_id for projects known to be committed; ingests of a
+# repository seen before skip the database lookup entirely. Only filled by
+# remember_project after the caller's transaction has committed.
+project_id_cache = TTLCache(maxsize=int(os.getenv("PROJECT_ID_CACHE_SIZE", "1024")))
 
 def insert_project(project_name, github_url, number_of_errors):
     """
     Ensure same github_url always maps to the same project_id.
-    If the github_url already exists, return the existing project_id (do NOT insert).
-    Otherwise insert a new row and return its project_id.
+    Returns the id of the existing project for that github_url (its name and
+    error count are left as they are), or inserts a new row and returns its id.
     """
     conn = get_conn()
     try:
         with conn:
             with conn.cursor() as cur:
-                # 1) try find existing project_id by github_url
-                cur.execute(
-                    """
-                    SELECT project_id
-                    FROM projects
-                    WHERE github_url = %s
-                    ORDER BY project_id
-                    LIMIT 1
-                    """,
-                    (github_url,)
-                )
-                row = cur.fetchone()
-                if row:
-                    return row[0]
-
-                # 2) not found -> insert new
-                cur.execute(
-                    """
-                    INSERT INTO projects (project_name, github_url, number_of_errors)
-                    VALUES (%s, %s, %s)
-                    RETURNING project_id;
-                    """,
-                    (project_name, github_url, number_of_errors)
-                )
-                return cur.fetchone()[0]
+                project_id = find_or_create_project(cur, project_name, github_url, number_of_errors)
+        remember_project(github_url, project_id)
+        return project_id
     finally:
         conn.close()
+
+
+def find_or_create_project(cur, project_name, github_url, number_of_errors):
+    """
+    Same as insert_project, but runs on the caller's cursor and does not commit.
+    Relies on the unique index on projects.github_url (migration 4), so two
+    concurrent uploads of a new repository still end up with one project.
+    The id is not cached here: the caller passes it to remember_project once its
+    transaction has committed, so a rolled-back batch cannot leave a dangling id.
+    """
+    if github_url is not None:
+        hit, project_id = project_id_cache.get(github_url)
+        if hit:
+            return project_id
+
+    # DO NOTHING neither writes nor locks an existing row; it returns no row on a
+    # conflict, and the SELECT then sees the committed winner
+    cur.execute(
+        """
+        INSERT INTO projects (project_name, github_url, number_of_errors)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (github_url) DO NOTHING
+        RETURNING project_id;
+        """,
+        (project_name, github_url, number_of_errors)
+    )
+    row = cur.fetchone()
+    if row is None:
+        cur.execute("SELECT project_id FROM projects WHERE github_url = %s", (github_url,))
+        row = cur.fetchone()
+    return row[0]
+
+
+#Caches a github_url -> project_id pair; call only after the transaction that found or created it committed
+def remember_project(github_url, project_id):
+    if github_url is not None and project_id is not None:
+        project_id_cache.set(github_url, project_id)
@@ -0,0 +1,217 @@
+"""
+Incremental parser for uploaded debug report files.
+
+The report is a single JSON object. Instead of json.loads on the whole file,
+ReportStreamParser is fed the file chunk by chunk and returns:
+
+  ("field", key, value)   for every top-level key except the errors array
+  ("error", error)        for every element of the top-level "errors" array
+
+so the errors can be written to the database while the file is still being
+read. Only the current element is ever held in memory.
+
+A value is only decoded once its closing bracket or quote has arrived. How
+far the pending value has been scanned is kept between chunks, so a large
+element costs one pass over its text however many chunks it spans.
+"""
+
+import codecs
+import json
+import re
+
+# Largest single top-level value / error element we are willing to buffer
+MAX_PENDING_CHARS = 16 * 1024 * 1024
+
+WHITESPACE = " \t\n\r"
+
+# What can open or close a nested value, outside and inside a string
+STRUCTURE = re.compile(r'["{}\[\]]')
+STRING_SPECIAL = re.compile(r'["\\]')
+# Where a number or literal ends
+SCALAR_END = re.compile(r'[\s,\]}]')
+
+
+class ReportStreamParser:
+
+    def __init__(self, array_key="errors"):
+        self.array_key = array_key
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "start"
+        self._pos = 0
+        self._key = None
+        self._eof = False
+        # Scan progress in the pending value: (offset from its start, depth, inside a string)
+        self._scan = (0, 0, False)
+
+    def feed(self, data: bytes):
+        """Add the next chunk of the file and return the events it completes."""
+        self._buffer += self._utf8.decode(data)
+        events = self._parse()
+        if len(self._buffer) > MAX_PENDING_CHARS:
+            raise ValueError(f"JSON value larger than {MAX_PENDING_CHARS} characters")
+        return events
+
+    def close(self):
+        """Signal end of file; returns the last events or raises if the JSON is incomplete."""
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._eof = True
+        events = self._parse()
+        if self._buffer.strip(WHITESPACE):
+            raise ValueError("Unexpected data after end of report")
+        if self._state != "done":
+            raise ValueError("Report JSON ended unexpectedly")
+        return events
+
+    # -- internals --------------------------------------------------------
+
+    def _parse(self):
+        # Work with an index into the buffer and drop the consumed part once at the end
+        self._pos = 0
+        try:
+            return self._parse_tokens()
+        finally:
+            self._buffer = self._buffer[self._pos:]
+
+    def _peek(self):
+        """Skip whitespace and return the next character ('' if the buffer is used up)."""
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and buffer[pos] in WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buffer[pos:pos + 1]
+
+    def _value_complete(self):
+        """Whether the value starting at the current position has fully arrived."""
+        buffer = self._buffer
+        if buffer[self._pos] not in '"{[':
+            # A number / literal running to the end of the buffer may continue in the next chunk
+            return self._eof or SCALAR_END.search(buffer, self._pos) is not None
+
+        offset, depth, in_string = self._scan
+        i = self._pos + offset
+        while True:
+            match = (STRING_SPECIAL if in_string else STRUCTURE).search(buffer, i)
+            if match is None:
+                i = len(buffer)
+                break
+            char, i = match.group(), match.end()
+            if char == "\\":
+                if i == len(buffer):
+                    # The escaped character is in the next chunk: rescan from the backslash
+                    i -= 1
+                    break
+                i += 1
+            elif char == '"':
+                in_string = not in_string
+                if not in_string and depth == 0:
+                    return True
+            elif char in "{[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return True
+        self._scan = (i - self._pos, depth, in_string)
+        return False
+
+    def _decode_value(self):
+        """Decode one complete JSON value at the current position, or None if more data is needed."""
+        if not self._value_complete():
+            if self._eof:
+                raise ValueError("Report JSON ended unexpectedly")
+            return None
+        self._scan = (0, 0, False)
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            # The whole value is here, so this is a syntax error, not a short read
+            raise ValueError("Invalid JSON in report")
+        self._pos = end
+        return (value,)
+
+    def _decode_key(self, head):
+        if head != '"':
+            self._expect("object key")
+        decoded = self._decode_value()
+        if decoded is not None:
+            self._key = decoded[0]
+            self._state = "colon"
+        return decoded
+
+    def _expect(self, what):
+        raise ValueError(f"Invalid report JSON: expected {what}")
+
+    def _parse_tokens(self):
+        events = []
+        while True:
+            head = self._peek()
+            if not head or self._state == "done":
+                return events
+
+            if self._state == "start":
+                if head != "{":
+                    self._expect("'{'")
+                self._pos += 1
+                self._state = "first_key"
+
+            elif self._state == "first_key":
+                if head == "}":
+                    self._pos += 1
+                    self._state = "done"
+                elif self._decode_key(head) is None:
+                    return events
+
+            elif self._state == "key":
+                if head == "}":
+                    self._pos += 1
+                    self._state = "done"
+                elif head == ",":
+                    self._pos += 1
+                    self._state = "key_after_comma"
+                else:
+                    self._expect("',' or '}'")
+
+            elif self._state == "key_after_comma":
+                if self._decode_key(head) is None:
+                    return events
+
+            elif self._state == "colon":
+                if head != ":":
+                    self._expect("':'")
+                self._pos += 1
+                self._state = "value"
+
+            elif self._state == "value":
+                if self._key == self.array_key and head == "[":
+                    self._pos += 1
+                    self._state = "first_item"
+                    continue
+                decoded = self._decode_value()
+                if decoded is None:
+                    return events
+                events.append(("field", self._key, decoded[0]))
+                self._state = "key"
+
+            elif self._state == "first_item" and head == "]":
+                self._pos += 1
+                self._state = "key"
+
+            elif self._state == "item":
+                if head == "]":
+                    self._pos += 1
+                    self._state = "key"
+                elif head == ",":
+                    self._pos += 1
+                    self._state = "item_after_comma"
+                else:
+                    self._expect("',' or ']'")
+
+            else:  # first_item / item_after_comma: an array element
+                decoded = self._decode_value()
+                if decoded is None:
+                    return events
+                events.append(("error", decoded[0]))
+                self._state = "item"
@@ -0,0 +1,197 @@
+"""
+In-process cache for the project-scoped read endpoints.
+
+Dashboard data only changes when a report is ingested, so identical answers are
+kept per (endpoint, project_id, other params) for a short TTL and dropped as
+soon as an ingest touches the project.
+
+RESPONSE_CACHE_SIZE  max cached responses (LRU eviction), default 256
+RESPONSE_CACHE_TTL   seconds before an entry expires, default 60 (0 disables the cache)
+"""
+
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from functools import wraps
+from starlette.responses import Response
+
+
+class TTLCache:
+    """Thread-safe LRU cache with an optional time-to-live per entry."""
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_where(self, predicate):
+        """Drop every entry whose key matches; returns how many were removed."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                del self._data[k]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+response_cache = TTLCache(
+    maxsize=int(os.getenv("RESPONSE_CACHE_SIZE", "256")) if _ttl > 0 else 0,
+    ttl=_ttl,
+)
+
+PROJECT_PARAMS = ("project_id", "projectid")
+
+
+def _cache_key(endpoint, kwargs):
+    project_id = next((kwargs[p] for p in PROJECT_PARAMS if p in kwargs), None)
+    others = tuple(sorted((k, v) for k, v in kwargs.items() if k not in PROJECT_PARAMS))
+    return (endpoint, project_id, others)
+
+
+def _cacheable(result):
+    # Handlers report failures as {"error": ...}; never keep those.
+    # Response objects (e.g. streamed exports) can only be sent once.
+    if isinstance(result, Response):
+        return False
+    return not (isinstance(result, dict) and "error" in result)
+
+
+# Set by conditional_get around a project-scoped request; the wrapper records
+# whether the handler's answer was cacheable, as only those may get an ETag
+_served = ContextVar("served", default=None)
+
+
+def track_cacheable():
+    """Start tracking the current request; returns a dict whose "cacheable" the handler fills in."""
+    served = {"cacheable": False}
+    _served.set(served)
+    return served
+
+
+def _note_served(cacheable):
+    served = _served.get()
+    if served is not None:
+        served["cacheable"] = cacheable
+
+
+# project_id -> number of invalidations so far. A miss notes the generation
+# before running its handler and only stores the result if no invalidation
+# happened meanwhile, so a result computed from pre-ingest data is never cached.
+_generations = {}
+_generation_lock = threading.Lock()
+
+
+def project_generation(project_id):
+    with _generation_lock:
+        return _generations.get(project_id, 0)
+
+
+def store_if_current(key, value, generation):
+    """Cache value under key unless its project was invalidated since `generation` was read."""
+    with _generation_lock:
+        if _generations.get(key[1], 0) == generation:
+            response_cache.set(key, value)
+
+
+def cached_response(endpoint):
+    """
+    Cache a project-scoped endpoint handler. The handler must take its project
+    id as `project_id` or `projectid`; FastAPI passes every parameter by keyword.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(**kwargs):
+                key = _cache_key(endpoint, kwargs)
+                hit, value = response_cache.get(key)
+                if hit:
+                    _note_served(True)
+                    return value
+                generation = project_generation(key[1])
+                result = await func(**kwargs)
+                _note_served(_cacheable(result))
+                if _cacheable(result):
+                    store_if_current(key, result, generation)
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(**kwargs):
+            key = _cache_key(endpoint, kwargs)
+            hit, value = response_cache.get(key)
+            if hit:
+                _note_served(True)
+                return value
+            generation = project_generation(key[1])
+            result = func(**kwargs)
+            _note_served(_cacheable(result))
+            if _cacheable(result):
+                store_if_current(key, result, generation)
+            return result
+        return wrapper
+    return decorator
+
+
+def invalidate_project(project_id):
+    """Drop every cached response of a project. Called by the ingest endpoints."""
+    if project_id is None:
+        return 0
+    project_id = int(project_id)
+    with _generation_lock:
+        _generations[project_id] = _generations.get(project_id, 0) + 1
+        return response_cache.delete_where(lambda key: key[1] == project_id)
+
+
+def cache_stats():
+    return response_cache.stats()
@@ -1,54 +1,47 @@
-import os
-from dotenv import load_dotenv
-import psycopg2
-
-load_dotenv()
-
-#Connects to the database
-def connect_to_db():
-    conn = psycopg2.connect(
-    host=os.getenv("POSTGRES_HOST"),
-    port=os.getenv("POSTGRES_PORT"),
-    dbname=os.getenv("POSTGRES_DB"),
-    user=os.getenv("POSTGRES_USER"),
-    password=os.getenv("POSTGRES_PASSWORD")
-    )
-    return conn
+from database import get_conn
+from config_rollups import record_result
+from streaming import iter_server_side_rows, json_array_stream
 
 #Inserts a configuration into the database
 def insert_configurations(system_prompt, model, project_id):
-    conn = connect_to_db()
+    conn = get_conn()
     cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO configuration (system_prompt, model, project_id) VALUES (%s, %s, %s) RETURNING configuration_ID;",
-        (system_prompt, model, project_id)
-    )
-    config_id = cur.fetchone()[0]
+    config_id = insert_configuration_row(cur, system_prompt, model, project_id)
     conn.commit()
     cur.close()
     conn.close()
     return config_id
 
+#Inserts a configuration on the caller's cursor, without committing
+def insert_configuration_row(cur, system_prompt, model, project_id):
+    cur.execute(
+        "INSERT INTO configuration (system_prompt, model, project_id) VALUES (%s, %s, %s) RETURNING configuration_ID;",
+        (system_prompt, model, project_id)
+    )
+    return cur.fetchone()[0]
+
 #Inserts a result into the database
 def insert_fixes(number_of_fixes, duration, tokens, project_id, config_id, run_time):
-    conn = connect_to_db()
+    conn = get_conn()
     cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO results (number_of_fixes, duration, tokens, project_id, configuration_id, run_time) VALUES (%s, %s, %s, %s, %s,%s) RETURNING results_id;",
-        (number_of_fixes, duration, tokens, project_id, config_id, run_time)
-    )
-    new_id = cur.fetchone()[0]
+    new_id = insert_result_row(cur, number_of_fixes, duration, tokens, project_id, config_id, run_time)
     conn.commit()
     cur.close()
     conn.close()
     print(f"Inserted row with result_id {new_id}")
+    return new_id
 
-#Fetches configurations of a project from database and returns it as an array
-def get_config_results(project_id):
-    conn = connect_to_db()
-    cur = conn.cursor()
+#Inserts a result and updates its rollup on the caller's cursor, without committing
+def insert_result_row(cur, number_of_fixes, duration, tokens, project_id, config_id, run_time):
     cur.execute(
-    """
+        "INSERT INTO results (number_of_fixes, duration, tokens, project_id, configuration_id, run_time) VALUES (%s, %s, %s, %s, %s,%s) RETURNING results_id;",
+        (number_of_fixes, duration, tokens, project_id, config_id, run_time)
+    )
+    new_id = cur.fetchone()[0]
+    record_result(cur, project_id, config_id, run_time, number_of_fixes, duration)
+    return new_id
+
+CONFIG_RESULTS_SQL = """
     SELECT 
         c.configuration_ID,
         c.system_prompt,
@@ -67,40 +60,9 @@ def get_config_results(project_id):
     WHERE c.project_id = %s
     AND (r.run_time IS NOT NULL AND r.run_time != 0)
     ORDER BY r.results_id 
-    """,
-    (project_id,)
-)
-    rows = cur.fetchall()
-
-    configAndResults =[]
-    for row in rows:
-        configAndResults.append({
-            "configid": row[0],
-            "prompt":row[1] or "",
-            "model": row[2],
-            "fixes":row[3],
-            "duration": row[4],
-            "high_quality_errors":row[5],
-            "detected_errors":row[6],
-            "results_id":row[7],
-            "avg_hq_errors": row[8],
-            "avg_detected_errors":row[9],
-            "r-model":row[10],
-            "run_time":row[11]
-            
-        })
-    cur.close()
-    conn.close()
-    return configAndResults
-    
-    
-
-def get_config_resultnew(project_id):
-    
-    conn = connect_to_db()
-    cur = conn.cursor()
-    cur.execute(
     """
+
+CONFIG_RESULT_NEW_SQL = """
     SELECT 
         r.results_id,
         r."model",
@@ -109,28 +71,9 @@ def get_config_resultnew(project_id):
     WHERE r.project_id = %s
     AND (r.run_time IS NOT NULL AND r.run_time != 0)
     ORDER BY r.results_id
-    """,
-    (project_id,)
-    )
-    rows = cur.fetchall()
-
-    configAndResults = []
-    for row in rows:
-        configAndResults.append({
-            "results_id": row[0],
-            "model": row[1],
-            "fixes": row[2],
-        })
-    cur.close()
-    conn.close()
-    return configAndResults   
-    
-    #Fetches configurations of a project from database and returns it as an array
-def get_config_results_forResult(project_id):
-    conn = connect_to_db()
-    cur = conn.cursor()
-    cur.execute(
     """
+
+CONFIG_RESULTS_FOR_RESULT_SQL = """
     SELECT 
         r.configuration_ID,
         r.number_of_fixes,
@@ -144,27 +87,92 @@ def get_config_results_forResult(project_id):
     FROM results r
     LEFT JOIN configuration c ON c.configuration_ID = r.configuration_id
     WHERE r.project_id = %s
+    AND r.results_id > %s
     ORDER BY r.results_id 
-    """,
-    (project_id,)
-)
+    LIMIT %s
+    """
+
+#Maps one CONFIG_RESULTS_SQL row to the dict the frontend expects
+def config_result_row(row):
+    return {
+        "configid": row[0],
+        "prompt":row[1] or "",
+        "model": row[2],
+        "fixes":row[3],
+        "duration": row[4],
+        "high_quality_errors":row[5],
+        "detected_errors":row[6],
+        "results_id":row[7],
+        "avg_hq_errors": row[8],
+        "avg_detected_errors":row[9],
+        "r-model":row[10],
+        "run_time":row[11]
+    }
+
+#Maps one CONFIG_RESULT_NEW_SQL row
+def config_resultnew_row(row):
+    return {
+        "results_id": row[0],
+        "model": row[1],
+        "fixes": row[2],
+    }
+
+#Maps one CONFIG_RESULTS_FOR_RESULT_SQL row
+def config_result_forResult_row(row):
+    return {
+        "configid": row[0],
+        "fixes": row[1],
+        "duration": row[2],
+        "high_quality_errors":row[3],
+        "detected_errors":row[4],
+        "results_id":row[5],
+        "model":row[6],
+        "run_time":row[7],
+        "prompt":row[8]
+    }
+
+#Fetches configurations of a project from database and returns it as an array
+def get_config_results(project_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(CONFIG_RESULTS_SQL, (project_id,))
     rows = cur.fetchall()
+    configAndResults = [config_result_row(row) for row in rows]
+    cur.close()
+    conn.close()
+    return configAndResults
+
+def get_config_resultnew(project_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(CONFIG_RESULT_NEW_SQL, (project_id,))
+    rows = cur.fetchall()
+    configAndResults = [config_resultnew_row(row) for row in rows]
+    cur.close()
+    conn.close()
+    return configAndResults   
 
-    configAndResults =[]
-    for row in rows:
-        configAndResults.append({
-            "configid": row[0],
-            "fixes": row[1],
-            "duration": row[2],
-            "high_quality_errors":row[3],
-            "detected_errors":row[4],
-            "results_id":row[5],
-            "model":row[6],
-            "run_time":row[7],
-            "prompt":row[8]
-            
-        })
+#Fetches configurations of a project from database and returns it as an array
+#after_id / limit give one keyset page (results_id > after_id); limit None returns every row
+def get_config_results_forResult(project_id, after_id=0, limit=None):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(CONFIG_RESULTS_FOR_RESULT_SQL, (project_id, after_id, limit))
+    rows = cur.fetchall()
+    configAndResults = [config_result_forResult_row(row) for row in rows]
     cur.close()
     conn.close()
     return configAndResults
-    
\ No newline at end of file
+
+#Streaming versions: JSON array bytes read through a server-side cursor, for StreamingResponse
+def stream_config_results(project_id):
+    rows = iter_server_side_rows(CONFIG_RESULTS_SQL, (project_id,))
+    return json_array_stream(rows, config_result_row)
+
+def stream_config_resultnew(project_id):
+    rows = iter_server_side_rows(CONFIG_RESULT_NEW_SQL, (project_id,))
+    return json_array_stream(rows, config_resultnew_row)
+
+def stream_config_results_forResult(project_id):
+    rows = iter_server_side_rows(CONFIG_RESULTS_FOR_RESULT_SQL, (project_id, 0, None))
+    return json_array_stream(rows, config_result_forResult_row)
@@ -0,0 +1,236 @@
+"""
+Bootstrap significance tests between configurations
+
+For every configuration and metric the runs are resampled with replacement
+`resamples` times, all at once as a (resamples x runs) index matrix, giving a
+bootstrap distribution of the mean. Each configuration is resampled once and
+every pairwise comparison is then a vectorized difference of two of those
+distributions, so many configurations stay cheap.
+
+For a pair (a, b) the result holds the observed difference of means (a - b),
+its percentile confidence interval and a two-sided bootstrap p-value
+(twice the share of resampled differences on the other side of zero).
+
+The cost is dominated by the number of pairs. Above SIGNIFICANCE_MAX_PAIRS
+all-pairs requests compare every configuration to the one with the most runs
+instead (the response names the baseline used).
+
+SIGNIFICANCE_WORKERS    processes for large projects, default 0 (in-process)
+SIGNIFICANCE_MAX_PAIRS  most configuration pairs compared all-against-all, default 5000
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+from analytics import Groups, column, encode_groups
+
+# Metric name in analytics columns -> name in the response
+SIGNIFICANCE_METRICS = [
+    ("fixes", "fixes"),
+    ("duration", "duration"),
+    ("false_positives", "false_positives"),
+]
+
+DEFAULT_RESAMPLES = 2000
+MAX_RESAMPLES = 20000
+# Resampled values generated per block, bounds memory for configurations with many runs
+BLOCK_VALUES = 2_000_000
+# Below this many resampled values in total, a process pool costs more than it saves
+POOL_MIN_VALUES = 20_000_000
+
+_process_pool = None
+
+
+def bootstrap_means(values, resamples, seed):
+    """Means of `resamples` resamples (with replacement) of values, as an array."""
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    means = np.empty(resamples)
+    block = max(1, BLOCK_VALUES // n)
+    for start in range(0, resamples, block):
+        stop = min(start + block, resamples)
+        picks = rng.integers(0, n, size=(stop - start, n))
+        means[start:stop] = values[picks].mean(axis=1)
+    return means
+
+
+def _workers():
+    return int(os.getenv("SIGNIFICANCE_WORKERS", "0"))
+
+
+def _max_pairs():
+    return int(os.getenv("SIGNIFICANCE_MAX_PAIRS", "5000"))
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        # Never fork the server: the child would inherit its pooled connections,
+        # held locks and threads
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _process_pool = ProcessPoolExecutor(max_workers=_workers(), mp_context=multiprocessing.get_context(method))
+    return _process_pool
+
+
+def close_process_pool():
+    """Shut down the worker processes; called on app shutdown."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+
+def bootstrap_all(samples, resamples, seed):
+    """
+    Bootstrap distributions of the mean for every (config, metric) sample.
+    samples: {key: 1-d array}. Uses the process pool for large workloads when enabled.
+    """
+    keys = list(samples)
+    seeds = np.random.SeedSequence(seed).spawn(len(keys))
+    total_values = resamples * sum(len(v) for v in samples.values())
+    if _workers() > 1 and len(keys) > 1 and total_values >= POOL_MIN_VALUES:
+        pool = _get_process_pool()
+        futures = [pool.submit(bootstrap_means, samples[k], resamples, s) for k, s in zip(keys, seeds)]
+        return {k: f.result() for k, f in zip(keys, futures)}
+    return {k: bootstrap_means(samples[k], resamples, s) for k, s in zip(keys, seeds)}
+
+
+def group_samples(config_ids, columns, metrics=SIGNIFICANCE_METRICS):
+    """
+    Configurations in first-appearance order and {(configid, metric): values without NaN},
+    keeping only samples with at least two runs.
+    """
+    codes, order = encode_groups(config_ids)
+    if not order:
+        return order, {}
+    groups = Groups(codes, len(order))
+    bounds = np.append(groups.starts, len(codes))
+    samples = {}
+    for column_name, metric in metrics:
+        values = column(columns[column_name])[groups.order]
+        for g, configid in enumerate(order):
+            sample = values[bounds[g]:bounds[g + 1]]
+            sample = sample[~np.isnan(sample)]
+            if len(sample) >= 2:
+                samples[(configid, metric)] = sample
+    return order, samples
+
+
+def pair_statistics(left, right, confidence):
+    """
+    CI bounds and two-sided p-values of left - right, one row per pair.
+    left, right: (pairs x resamples) bootstrap means.
+    """
+    tail = (1 - confidence) / 2
+    diffs = np.sort(left - right, axis=1)
+    # Linear interpolation between order statistics, like numpy.percentile
+    positions = np.array([tail, 1 - tail]) * (diffs.shape[1] - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, diffs.shape[1] - 1)
+    fraction = positions - lower
+    low, high = (diffs[:, lower] * (1 - fraction) + diffs[:, upper] * fraction).T
+    below = np.count_nonzero(diffs <= 0, axis=1) / diffs.shape[1]
+    above = np.count_nonzero(diffs >= 0, axis=1) / diffs.shape[1]
+    return low, high, np.minimum(1.0, 2 * np.minimum(below, above))
+
+
+def pair_block_statistics(distributions, left, right, confidence):
+    """
+    pair_statistics for many pairs, in batches that keep the (pairs x resamples)
+    differences within BLOCK_VALUES. distributions: (configs x resamples);
+    left, right: row numbers of the two sides of every pair.
+    """
+    batch = max(1, BLOCK_VALUES // distributions.shape[1])
+    parts = [
+        pair_statistics(distributions[left[i:i + batch]], distributions[right[i:i + batch]], confidence)
+        for i in range(0, len(left), batch)
+    ]
+    if not parts:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    return tuple(np.concatenate(values) for values in zip(*parts))
+
+
+def all_pair_statistics(distributions, left, right, confidence):
+    """Splits the pairs across the process pool when enabled and worth it."""
+    workers = _workers()
+    if workers > 1 and len(left) * distributions.shape[1] >= POOL_MIN_VALUES:
+        pool = _get_process_pool()
+        splits = np.array_split(np.arange(len(left)), workers)
+        futures = [pool.submit(pair_block_statistics, distributions, left[s], right[s], confidence) for s in splits]
+        parts = [f.result() for f in futures]
+        return tuple(np.concatenate(values) for values in zip(*parts))
+    return pair_block_statistics(distributions, left, right, confidence)
+
+
+def default_baseline(order, samples):
+    """The configuration with the most usable runs over all metrics (first one on a tie), or None."""
+    runs = {}
+    for (configid, _), sample in samples.items():
+        runs[configid] = runs.get(configid, 0) + len(sample)
+    return max((c for c in order if c in runs), key=lambda c: runs[c], default=None)
+
+
+def compare_configurations(config_ids, columns, resamples=DEFAULT_RESAMPLES, confidence=0.95,
+                           baseline=None, seed=0):
+    """
+    Pairwise bootstrap comparisons of every metric. With `baseline`, only
+    baseline-vs-other pairs are compared (k - 1 instead of k(k-1)/2).
+    Returns (baseline used, comparisons).
+    """
+    order, samples = group_samples(config_ids, columns)
+    if baseline is not None and baseline not in order:
+        raise ValueError(f"Configuration {baseline} has no results in this project")
+    if baseline is None and len(order) * (len(order) - 1) // 2 > _max_pairs():
+        baseline = default_baseline(order, samples)
+    distributions = bootstrap_all(samples, resamples, seed)
+
+    if baseline is not None:
+        pairs = [(baseline, other) for other in order if other != baseline]
+    else:
+        pairs = list(combinations(order, 2))
+
+    comparisons = []
+    for _, metric in SIGNIFICANCE_METRICS:
+        present = [configid for configid in order if (configid, metric) in samples]
+        if len(present) < 2:
+            continue
+        row = {configid: i for i, configid in enumerate(present)}
+        metric_pairs = [(a, b) for a, b in pairs if a in row and b in row]
+        left = np.array([row[a] for a, _ in metric_pairs], dtype=np.intp)
+        right = np.array([row[b] for _, b in metric_pairs], dtype=np.intp)
+        matrix = np.stack([distributions[(configid, metric)] for configid in present])
+        low, high, p_values = all_pair_statistics(matrix, left, right, confidence)
+
+        sizes = [len(samples[(configid, metric)]) for configid in present]
+        means = [float(samples[(configid, metric)].mean()) for configid in present]
+        for (a, b), i, j, ci_low, ci_high, p_value in zip(
+            metric_pairs, left.tolist(), right.tolist(), low.tolist(), high.tolist(), p_values.tolist()
+        ):
+            comparisons.append({
+                "metric": metric,
+                "config_a": a,
+                "config_b": b,
+                "n_a": sizes[i],
+                "n_b": sizes[j],
+                "mean_a": means[i],
+                "mean_b": means[j],
+                "diff": means[i] - means[j],
+                "ci_low": ci_low,
+                "ci_high": ci_high,
+                "p_value": p_value,
+            })
+    return baseline, comparisons
+
+
+#Gets bootstrap comparisons of the configurations of a project from its loaded results (see load_project_results)
+def significance_results(config_ids, columns, resamples=DEFAULT_RESAMPLES, confidence=0.95, baseline=None, seed=0):
+    baseline, comparisons = compare_configurations(config_ids, columns, resamples, confidence, baseline, seed)
+    return {
+        "resamples": resamples,
+        "confidence": confidence,
+        "baseline": baseline,
+        "comparisons": comparisons,
+    }
@@ -0,0 +1,188 @@
+"""
+Slow-query log
+
+metrics.TimingCursor hands every statement's duration to check(). Statements
+slower than SLOW_QUERY_MS are printed with their parameters and kept in a
+small ring buffer of distinct statements, served by /debug/slow_queries.
+
+With SLOW_QUERY_EXPLAIN=1 the plan of a slow read-only SELECT is captured with
+EXPLAIN (ANALYZE, BUFFERS) the first time it is seen and again whenever it gets
+slower. ANALYZE runs the query a second time, which is why it is opt-in, and
+why only plain SELECTs are explained (never anything that writes).
+
+Bound parameters can hold uploaded report content, so they are only printed
+and kept with SLOW_QUERY_LOG_PARAMS=1. Statements are logged and told apart
+by their template: execute_values sends every row inlined into one bytes
+statement, so everything from VALUES on is cut off and quoted literals are
+masked. /debug/slow_queries itself is only served with DEBUG_ENDPOINTS=1.
+
+SLOW_QUERY_MS          threshold in milliseconds, default 500 (negative disables the log)
+SLOW_QUERY_EXPLAIN     1 to capture plans, default 0
+SLOW_QUERY_BUFFER      distinct statements kept, default 50
+SLOW_QUERY_LOG_PARAMS  1 to keep bound parameters, default 0 (redacted)
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from psycopg2 import extensions, sql
+
+# Statement text kept / used to tell statements apart; long VALUES lists are cut off
+STATEMENT_CHARS = 2000
+KEY_CHARS = 300
+PARAMS_CHARS = 500
+
+READ_ONLY = re.compile(r"^\s*select\b", re.IGNORECASE)
+# Functions with side effects that may appear in a SELECT
+# (FOR UPDATE / FOR SHARE row locks would outlive the EXPLAIN's savepoint)
+SIDE_EFFECTS = re.compile(
+    r"\b(setval|nextval|pg_advisory\w*|pg_terminate_backend|pg_cancel_backend)\b|\binto\b"
+    r"|\bfor\s+(update|share|no\s+key\s+update|key\s+share)\b",
+    re.IGNORECASE,
+)
+# Inlined data: a VALUES list (execute_values) and quoted string literals
+VALUES_LIST = re.compile(r"\bvalues\b", re.IGNORECASE)
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def _threshold_seconds():
+    return float(os.getenv("SLOW_QUERY_MS", "500")) / 1000
+
+
+def _params_enabled():
+    return os.getenv("SLOW_QUERY_LOG_PARAMS", "0") == "1"
+
+
+def redact_params(params):
+    """Parameters as logged: their repr when SLOW_QUERY_LOG_PARAMS=1, otherwise only how many there were."""
+    if params is None:
+        return None
+    if _params_enabled():
+        return repr(params)[:PARAMS_CHARS]
+    try:
+        return f"<{len(params)} redacted>"
+    except TypeError:
+        return "<redacted>"
+
+
+def _explain_enabled():
+    return os.getenv("SLOW_QUERY_EXPLAIN", "0") == "1"
+
+
+def statement_text(cursor, query):
+    if isinstance(query, bytes):
+        return query.decode("utf-8", "replace")
+    if isinstance(query, sql.Composable):
+        return query.as_string(cursor)
+    return str(query)
+
+
+def statement_template(text):
+    """Statement without inlined data: cut at VALUES, string literals masked."""
+    match = VALUES_LIST.search(text)
+    if match:
+        text = text[:match.start()] + "VALUES ..."
+    return STRING_LITERAL.sub("'?'", text)
+
+
+def statement_key(text):
+    return " ".join(text.split())[:KEY_CHARS]
+
+
+def can_explain(text):
+    """Only plain SELECTs without side effects are safe to run again under EXPLAIN ANALYZE."""
+    return bool(READ_ONLY.match(text)) and not SIDE_EFFECTS.search(text)
+
+
+class SlowQueryLog:
+    """Ring buffer of the most recent distinct slow statements."""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()   # statement key -> entry
+        self._lock = threading.Lock()
+
+    def record(self, text, params, seconds):
+        """Store one slow execution; returns True when its plan should be (re)captured."""
+        key = statement_key(text)
+        ms = round(seconds * 1000, 2)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "statement": text[:STATEMENT_CHARS],
+                    "count": 0,
+                    "max_ms": 0.0,
+                    "plan": None,
+                    "plan_ms": None,
+                }
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+            slower = ms > entry["max_ms"]
+            entry["count"] += 1
+            entry["last_ms"] = ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["last_params"] = redact_params(params)
+            entry["last_seen"] = time.time()
+            return slower
+
+    def set_plan(self, text, plan, ms):
+        with self._lock:
+            entry = self._entries.get(statement_key(text))
+            if entry is not None:
+                entry["plan"] = plan
+                entry["plan_ms"] = ms
+
+    def entries(self):
+        """Slowest first."""
+        with self._lock:
+            return sorted((dict(e) for e in self._entries.values()), key=lambda e: e["max_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(int(os.getenv("SLOW_QUERY_BUFFER", "50")))
+
+
+def check(cursor, query, params, seconds):
+    """Called by TimingCursor after every statement."""
+    threshold = _threshold_seconds()
+    if threshold < 0 or seconds < threshold:
+        return
+    text = statement_text(cursor, query)
+    template = statement_template(text)
+    print(f"[slow_query] {seconds * 1000:.1f} ms: {statement_key(template)} params={redact_params(params)}")
+    replan = slow_query_log.record(template, params, seconds)
+    # Server-side (named) cursors are still open; do not touch their transaction
+    if replan and _explain_enabled() and cursor.name is None and can_explain(text):
+        capture_plan(cursor, query, params, text, template, round(seconds * 1000, 2))
+
+
+def capture_plan(cursor, query, params, text, template, ms):
+    """Run EXPLAIN (ANALYZE, BUFFERS) inside a savepoint, so a failure cannot break the caller's transaction."""
+    conn = cursor.connection
+    if conn.autocommit or conn.get_transaction_status() != extensions.TRANSACTION_STATUS_INTRANS:
+        return
+    explain = sql.SQL("EXPLAIN (ANALYZE, BUFFERS) ") + (query if isinstance(query, sql.Composable) else sql.SQL(text))
+    # A plain cursor, so the EXPLAIN is neither timed nor logged itself
+    with conn.cursor(cursor_factory=extensions.cursor) as cur:
+        try:
+            cur.execute("SAVEPOINT slow_query_explain")
+            cur.execute(explain, params)
+            plan = "\n".join(row[0] for row in cur.fetchall())
+            cur.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            try:
+                cur.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            except Exception:
+                pass
+            print(f"[slow_query] Could not capture plan: {str(e)}")
+            return
+    slow_query_log.set_plan(template, plan, ms)
@@ -1,86 +1,47 @@
-import os
-from dotenv import load_dotenv
-import psycopg2
-import statistics
-import math
+from database import get_conn
 
-load_dotenv()
+# (results column, key in the response) for every metric we report stability on.
+# "std_dev" stays the false positives spread because that is what the stability graph plots.
+STABILITY_METRICS = [
+    ("false_positives", "std_dev"),
+    ("number_of_fixes", "fixes_std_dev"),
+    ("detected_errors", "detected_errors_std_dev"),
+    ("high_quality_errors", "high_quality_errors_std_dev"),
+]
 
-#Connects to the database
-def connect_to_db():
-    conn = psycopg2.connect(
-    host=os.getenv("POSTGRES_HOST"),
-    port=os.getenv("POSTGRES_PORT"),
-    dbname=os.getenv("POSTGRES_DB"),
-    user=os.getenv("POSTGRES_USER"),
-    password=os.getenv("POSTGRES_PASSWORD")
-    )
-    return conn
-#Gets data necessary for showing stability graph from db
+#Gets the standard deviations for the stability graph, computed per configuration in SQL
 def get_stability_results(project_id):
-    conn = connect_to_db()
+    conn = get_conn()
     cur = conn.cursor()
     cur.execute(
     """
-    SELECT  
-        number_of_fixes,
-        high_quality_errors,
-        detected_errors,
+    SELECT
         configuration_id,
-        false_positives
+        COUNT(*),
+        STDDEV_SAMP(false_positives)::float8,
+        STDDEV_SAMP(number_of_fixes)::float8,
+        STDDEV_SAMP(detected_errors)::float8,
+        STDDEV_SAMP(high_quality_errors)::float8
     FROM results
     WHERE project_id = %s
     AND NOT (
     run_time = 0
     )
+    GROUP BY configuration_id
+    HAVING COUNT(*) > 1
     ORDER BY configuration_id ASC
     """,
     (project_id,)
     )
     rows = cur.fetchall()
-
-    data=[]
-    for row in rows:
-        data.append({
-            "fixes":row[0],
-            "high-quality-errors":row[1],
-            "error":row[2],
-            "configid":row[3],
-            "false-positives":row[4]
-        })
     cur.close()
     conn.close()
-    print(calculate_stability(data))
-    return calculate_stability(data)
-
-#Calculates stability from data
-def calculate_stability(data):
-    #creates dictionary
-    configs = {}
-    for d in data:
-        config = d.get("configid")
-        false_positives = d.get("false-positives")
-
-        if config not in configs:
-            configs[config] = []
-        configs[config].append(false_positives)
 
-    #creates list
-    std_devs = []
-    for config, false_positives in configs.items():
-        if len(false_positives) > 1:
-           std_dev = statistics.stdev(false_positives)
-           std_devs.append({
-               "configid":config,
-               "std_dev":std_dev
-            })
-           
-        # else:
-        #     std_devs.append({
-        #         "configid":config,
-        #         "std_dev":0
-        #     })
-    return std_devs
-      
+    return [stability_row(row[0], row[1], row[2:]) for row in rows]
 
-        # If standard dev is < 0.5 = high stablility, > 3 = low stability
\ No newline at end of file
+#Builds one stability entry from a config id, its run count and the std devs in STABILITY_METRICS order
+def stability_row(configid, runs, std_devs):
+    row = {"configid": configid, "runs": runs}
+    for (_, name), value in zip(STABILITY_METRICS, std_devs):
+        row[name] = value
+    return row
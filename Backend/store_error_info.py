@@ -16,7 +16,53 @@ class ErrorRecord:
     config_id: int
     run_time : int
 
-from database import get_conn
+from psycopg2.extras import execute_values
+from config_rollups import record_errors
+
+# Rows per INSERT statement; a report with more errors is split into a few statements
+ERROR_BATCH_SIZE = 1000
+
+#Turns raw error dicts into error_records rows, skipping entries without a name or type
+def build_error_rows(errors, project_id=None, config_id=None, run_time=None):
+    project_id = int(project_id) if project_id else None
+    run_time = int(run_time) if run_time else None
+    rows = []
+    for e in errors:
+        if not isinstance(e, dict):
+            continue
+        error_name = e.get("error_id")
+        error_type = e.get("error_type")
+        if not error_name or not error_type:
+            continue
+        rows.append((str(error_name), str(error_type), bool(e.get("was_fixed", False)), project_id, config_id, run_time))
+    return rows
+
+def insert_error_rows(cur, errors, project_id=None, config_id: int = None, run_time: int = None) -> int:
+    """
+    Insert a list of errors with multi-row INSERT statements on an open cursor.
+    Does not commit, so callers can keep it in their own transaction.
+    Returns number of inserted rows.
+    """
+    rows = build_error_rows(errors, project_id, config_id, run_time)
+    if not rows:
+        return 0
+
+    inserted_flags = execute_values(
+        cur,
+        """
+        INSERT INTO error_records
+        (error_name, error_type, was_fixed, project_id, configuration_id, run_time)
+        VALUES %s
+        RETURNING was_fixed
+        """,
+        rows,
+        page_size=ERROR_BATCH_SIZE,
+        fetch=True,
+    )
+    inserted = len(inserted_flags)
+    fixed = sum(1 for (was_fixed,) in inserted_flags if was_fixed)
+    record_errors(cur, rows[0][3], config_id, inserted, fixed)
+    return inserted
 
 def save_error_records(errors: list, project_id = None, config_id: int = None, run_time : int=None) -> int:
     """
@@ -24,38 +70,14 @@ def save_error_records(errors: list, project_id = None, config_id: int = None, r
     Returns number of newly inserted rows.
     """
     conn = get_conn()
-    inserted = 0
-
     try:
         with conn:
             with conn.cursor() as cur:
-                for e in errors:
-                    error_name = e.get("error_id")
-                    error_type = e.get("error_type")
-                    was_fixed = e.get("was_fixed", False)
-                    configuration_id = config_id
-        
-                    print(f"Inserting: error_name={error_name}, error_type={error_type}")  
-                    if not error_name or not error_type:
-                        continue
-
-                    cur.execute(
-                        """
-                        INSERT INTO error_records
-                        (error_name, error_type, was_fixed, project_id, configuration_id,run_time)
-                        VALUES (%s, %s, %s, %s, %s,%s)
-                        """,
-                        (str(error_name), str(error_type), bool(was_fixed), int(project_id) if project_id else None, configuration_id, int(run_time) if run_time else None)
-                    )
-
-                    if cur.rowcount == 1:
-                        inserted += 1
-                        print(f"Insert successful, rowcount={cur.rowcount}") 
-                    else:
-                        print(f"Insert failed, rowcount={cur.rowcount}") 
+                inserted = insert_error_rows(cur, errors, project_id, config_id, run_time)
     finally:
         conn.close()
 
+    print(f"Inserted {inserted} of {len(errors)} error records")
     return inserted
 
 
@@ -0,0 +1,57 @@
+"""
+Streaming helpers for large result exports.
+
+iter_server_side_rows reads a query through a named (server-side) cursor, so
+Postgres hands rows over STREAM_FETCH_ROWS at a time instead of the whole
+result set at once. json_array_stream turns those rows into the bytes of a
+JSON array, a chunk at a time, for a StreamingResponse. Endpoints wrap the
+stream in database.stream_db, which holds a run_db limiter token until the
+export is done.
+"""
+
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from database import get_conn
+
+# Rows fetched from the server-side cursor per round trip / encoded per chunk
+STREAM_FETCH_ROWS = 2000
+
+
+def iter_server_side_rows(sql, params, itersize=STREAM_FETCH_ROWS):
+    """Yield the rows of a query without loading them all; the connection is held until done."""
+    conn = get_conn()
+    try:
+        with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cur:
+            cur.itersize = itersize
+            cur.execute(sql, params)
+            for row in cur:
+                yield row
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_array_stream(rows, mapper, chunk_rows=STREAM_FETCH_ROWS):
+    """Encode rows (mapped to dicts) as one JSON array, yielded in chunks of bytes."""
+    yield b"["
+    first = True
+    chunk = []
+    for row in rows:
+        chunk.append(json.dumps(mapper(row), default=_json_default))
+        if len(chunk) >= chunk_rows:
+            yield (("" if first else ",") + ",".join(chunk)).encode()
+            first = False
+            chunk = []
+    if chunk:
+        yield (("" if first else ",") + ",".join(chunk)).encode()
+    yield b"]"
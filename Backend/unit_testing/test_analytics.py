@@ -0,0 +1,44 @@
+import statistics
+import numpy as np
+import pytest
+from analytics import build_analytics, group_stats
+
+
+#Checks every statistic matches a plain per-group computation, with NULLs left out
+def test_group_stats_match_reference():
+    keys = [2, 1, 2, 1, 2, 3]
+    values = [4.0, 1.0, None, 3.0, 8.0, None]
+    configids, runs, stats = group_stats(keys, {"fixes": values})
+    fixes = stats["fixes"]
+
+    assert configids == [2, 1, 3]                 # first-appearance order
+    assert runs.tolist() == [3, 2, 1]
+    assert fixes["count"].tolist() == [2, 2, 0]
+    assert fixes["mean"][:2].tolist() == [6.0, 2.0]
+    assert fixes["std"][0] == pytest.approx(statistics.stdev([4.0, 8.0]))
+    assert fixes["median"][:2].tolist() == [6.0, 2.0]
+    assert fixes["min"][:2].tolist() == [4.0, 1.0]
+    assert fixes["max"][:2].tolist() == [8.0, 3.0]
+    assert np.isnan(fixes["mean"][2]) and np.isnan(fixes["median"][2])
+
+#Checks percentiles interpolate like numpy.percentile on each group
+def test_percentiles_match_numpy():
+    rng = np.random.default_rng(0)
+    keys = rng.integers(0, 5, 500).tolist()
+    values = rng.normal(10, 3, 500)
+    configids, _, stats = group_stats(keys, {"v": values}, percentiles=(25, 90))
+    for g, key in enumerate(configids):
+        group = values[np.array(keys) == key]
+        assert stats["v"]["p25"][g] == pytest.approx(np.percentile(group, 25))
+        assert stats["v"]["p90"][g] == pytest.approx(np.percentile(group, 90))
+        assert stats["v"]["median"][g] == pytest.approx(np.median(group))
+
+#Checks the response shape: JSON-friendly values, NaN as None, fix rate from error counts
+def test_build_analytics():
+    result = build_analytics([7, 7], {"fixes": [1, 3], "duration": [None, None]}, {7: (4, 1)})
+    assert result[0]["configid"] == 7
+    assert result[0]["runs"] == 2
+    assert result[0]["fix_rate"] == 0.25
+    assert result[0]["metrics"]["fixes"]["mean"] == 2.0
+    assert result[0]["metrics"]["duration"]["mean"] is None
+    assert build_analytics([], {"fixes": []}, {}) == []
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+import benchmark_runner
+from benchmark_runner import BenchmarkRequest, extract_report, run_benchmark
+
+REPORT = {
+    "project_name": "demo",
+    "project_github_url": "https://github.com/a/demo",
+    "number_of_fixes": 2,
+    "total_time_spent_minutes": 5,
+    "number_of_errors_from_raygun": 3,
+    "errors": [{"error_id": "E1", "error_type": "TypeError", "was_fixed": True}],
+}
+
+
+#Checks the report is found in a fenced block, an artifact, or bare text
+def test_extract_report_formats():
+    body = json.dumps(REPORT)
+    assert extract_report(f"Done.\n```json\n{body}\n```\nBye").number_of_fixes == 2
+    assert extract_report(f'<artifact type="json">{body}</artifact>').project_name == "demo"
+    assert extract_report(f"Report: {body}").number_of_errors_from_raygun == 3
+
+#Checks a stringified transcript is searched message by message, like the frontend does
+def test_extract_report_transcript():
+    transcript = json.dumps([
+        {"role": "user", "content": [{"type": "text", "text": "Fix the errors"}]},
+        {"role": "assistant", "content": [
+            {"type": "tool_use", "name": "git"},
+            {"type": "text", "text": "Done.\n```json\n" + json.dumps(REPORT) + "\n```"},
+        ]},
+    ])
+    report = extract_report(transcript)
+    assert report is not None and report.number_of_fixes == 2
+    assert extract_report(json.dumps([{"role": "assistant", "content": [{"type": "text", "text": "no report"}]}])) is None
+
+#Checks answers without a valid report are rejected
+def test_extract_report_invalid():
+    assert extract_report("") is None
+    assert extract_report("```json\n{\"project_name\": \"x\"}\n```") is None
+
+
+class FakeClient:
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+
+    async def call_tool(self, tool_name, prompt):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return {"result": {"content": [{"type": "text", "text": "```json\n" + json.dumps(REPORT) + "\n```"}]}}
+
+
+#Checks runs overlap up to the concurrency limit and each round is saved with its run_time
+def test_run_benchmark_concurrent(monkeypatch):
+    saved = []
+
+    async def fake_run_db(func, *args):
+        if func is benchmark_runner.save_system_prompt:
+            # One configuration per prompt; "a" -> 101, "bb" -> 102
+            return {"config_id": 100 + len(args[1])}
+        saved.append(args)
+        return {"results_id": len(saved), "inserted_errors": 1}
+
+    monkeypatch.setattr(benchmark_runner, "run_db", fake_run_db)
+    monkeypatch.setattr(benchmark_runner, "invalidate_project", lambda pid: 0)
+
+    client = FakeClient(delay=0.05)
+    request = BenchmarkRequest(project_id=1, prompts=["a", "bb"], rounds=3, concurrency=3)
+    started = time.perf_counter()
+    outcomes = asyncio.run(run_benchmark(request, client))
+    elapsed = time.perf_counter() - started
+
+    assert all(o["success"] for o in outcomes)
+    assert [(o["config_id"], o["round"]) for o in outcomes] == [
+        (101, 1), (101, 2), (101, 3), (102, 1), (102, 2), (102, 3)
+    ]
+    assert sorted(args[4] for args in saved) == [1, 1, 2, 2, 3, 3]
+    assert client.max_active == 3
+    assert elapsed < 6 * 0.05
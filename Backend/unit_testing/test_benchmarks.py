@@ -0,0 +1,21 @@
+from benchmarks import data, run_benchmarks
+from benchmarks.run_benchmarks import compare, run
+
+
+#Checks every case runs on a small data set and reports throughput and memory
+def test_every_case_runs(monkeypatch):
+    monkeypatch.setitem(data.SIZES, "tiny", 50)
+    results = run(["tiny"], repeat=1)
+    assert set(results) == set(run_benchmarks.CASES)
+    for by_size in results.values():
+        assert by_size["tiny"]["rows"] == 50
+        assert by_size["tiny"]["peak_bytes"] > 0
+
+#Checks slower or bigger results than the baseline are reported, within-threshold ones are not
+def test_compare_thresholds():
+    baseline = {"build_analytics": {"1k": {"rows_per_sec": 1000, "peak_bytes": 100}}}
+    ok = {"build_analytics": {"1k": {"rows_per_sec": 800, "peak_bytes": 140}}}
+    slow = {"build_analytics": {"1k": {"rows_per_sec": 600, "peak_bytes": 200}}}
+    assert compare(ok, baseline, 0.30, 0.50) == []
+    assert len(compare(slow, baseline, 0.30, 0.50)) == 2
+    assert compare({"other": {"1k": {"rows_per_sec": 1, "peak_bytes": 1}}}, baseline, 0.3, 0.5) == []
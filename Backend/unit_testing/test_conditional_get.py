@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+import conditional_get
+import get_ai_data
+from main import app
+from response_cache import response_cache, invalidate_project
+
+
+class TestConditionalGet:
+
+    #Checks a matching If-None-Match gets a 304 without running the endpoint
+    def test_not_modified(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(conditional_get, "get_project_version", lambda pid: "10-4-3-2")
+        monkeypatch.setattr(get_ai_data, "get_all_results_data", lambda pid: calls.append(pid) or [])
+        response_cache.clear()
+        client = TestClient(app)
+
+        first = client.get("/get_combined_data?project_id=3")
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+        assert etag == 'W/"p3-10-4-3-2"'
+
+        second = client.get("/get_combined_data?project_id=3", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert calls == [3]
+
+    #Checks a changed version serves the full response again
+    def test_changed_version(self, monkeypatch):
+        monkeypatch.setattr(conditional_get, "get_project_version", lambda pid: "11-5-3-2")
+        monkeypatch.setattr(get_ai_data, "get_all_results_data", lambda pid: [])
+        response_cache.clear()
+        client = TestClient(app)
+        response = client.get("/get_combined_data?project_id=3", headers={"If-None-Match": 'W/"p3-10-4-3-2"'})
+        assert response.status_code == 200
+
+    #Checks the version query runs once per ingest, not once per request
+    def test_version_is_cached_until_invalidated(self, monkeypatch):
+        lookups = []
+        monkeypatch.setattr(conditional_get, "get_project_version", lambda pid: lookups.append(pid) or f"v{len(lookups)}")
+        monkeypatch.setattr(get_ai_data, "get_all_results_data", lambda pid: [])
+        response_cache.clear()
+        client = TestClient(app)
+
+        assert client.get("/get_combined_data?project_id=3").headers["etag"] == 'W/"p3-v1"'
+        assert client.get("/get_combined_data?project_id=3").headers["etag"] == 'W/"p3-v1"'
+        assert lookups == [3]
+        invalidate_project(3)
+        assert client.get("/get_combined_data?project_id=3").headers["etag"] == 'W/"p3-v2"'
+        assert lookups == [3, 3]
+
+    #Checks an error answer is not tagged, so the browser asks again instead of keeping the error
+    def test_error_is_not_tagged(self, monkeypatch):
+        monkeypatch.setattr(conditional_get, "get_project_version", lambda pid: "10-4-3-2")
+        monkeypatch.setattr(get_ai_data, "get_all_results_data", lambda pid: {"error": "database down"})
+        response_cache.clear()
+        client = TestClient(app)
+
+        response = client.get("/get_combined_data?project_id=3")
+        assert response.json() == {"error": "database down"}
+        assert "etag" not in response.headers
+
+        monkeypatch.setattr(get_ai_data, "get_all_results_data", lambda pid: [])
+        response = client.get("/get_combined_data?project_id=3")
+        assert response.headers["etag"] == 'W/"p3-10-4-3-2"'
+
+    #Checks only project-scoped GET requests are versioned
+    def test_project_id_detection(self):
+        class FakeRequest:
+            def __init__(self, method, path, query):
+                self.method = method
+                self.url = type("U", (), {"path": path})()
+                self.query_params = query
+
+        detect = conditional_get.project_id_from_request
+        assert detect(FakeRequest("GET", "/api/dashboard/7", {})) == 7
+        assert detect(FakeRequest("GET", "/api/results/detected_errors", {"projectid": "4"})) == 4
+        assert detect(FakeRequest("GET", "/projects", {"project_id": "4"})) is None
+        assert detect(FakeRequest("POST", "/get_combined_data", {"project_id": "4"})) is None
@@ -0,0 +1,50 @@
+from dashboard_info import build_dashboard
+
+
+CONFIG_ROWS = [
+    (1, 2, 3.0, 60.0, 5.0, 2.0, 1.5, 1.4, 2.8, 1.4),
+    (2, 1, 1.0, 30.0, 4.0, None, None, None, None, None),
+]
+RUN_ROWS = [
+    (10, 1, True, "prompt one", "gpt-4", 2, 40, 1, 3, "gpt-4", 1),
+    (11, 1, True, "prompt one", "gpt-4", 4, 80, 3, 7, "gpt-4", 2),
+    (12, 2, False, None, None, 1, 30, None, 4, "", 1),
+]
+
+class TestBuildDashboard:
+
+    #Checks every chart series is present in the payload
+    def test_returns_every_series(self):
+        result = build_dashboard(CONFIG_ROWS, RUN_ROWS)
+        assert set(result.keys()) == {
+            "detected_errors", "high_quality_errors", "config_data",
+            "performance_data", "config_data_new", "combined_data", "stability_data",
+        }
+
+    #Checks per-config averages keep the keys of the old endpoints
+    def test_average_series(self):
+        result = build_dashboard(CONFIG_ROWS, RUN_ROWS)
+        assert result["detected_errors"][0] == {"configid": 1, "error": 5.0}
+        assert result["high_quality_errors"][1] == {"configid": 2, "high-quality": None}
+        assert result["performance_data"][0] == {"config_id": 1, "fixes": 3.0, "duration": 60.0}
+        assert result["combined_data"][0]["time"] == 60.0
+
+    #Checks configs without a standard deviation are left out of the stability series
+    def test_stability_skips_single_runs(self):
+        result = build_dashboard(CONFIG_ROWS, RUN_ROWS)
+        assert result["stability_data"] == [{
+            "configid": 1,
+            "runs": 2,
+            "std_dev": 1.5,
+            "fixes_std_dev": 1.4,
+            "detected_errors_std_dev": 2.8,
+            "high_quality_errors_std_dev": 1.4,
+        }]
+
+    #Checks per-run rows carry their configuration averages
+    def test_config_rows(self):
+        result = build_dashboard(CONFIG_ROWS, RUN_ROWS)
+        assert len(result["config_data_new"]) == 3
+        assert len(result["config_data"]) == 2
+        assert result["config_data"][0]["avg_detected_errors"] == 5.0
+        assert result["config_data"][0]["prompt"] == "prompt one"
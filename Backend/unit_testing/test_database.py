@@ -0,0 +1,63 @@
+import pytest
+from psycopg2 import extensions
+import database
+from database import ConnectionPool, PooledConnection, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_connect(monkeypatch):
+    created = []
+
+    def connect(**kwargs):
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(database.psycopg2, "connect", connect)
+    return created
+
+
+#Checks a returned connection is reused instead of opening a new one
+def test_connection_is_reused(fake_connect):
+    pool = ConnectionPool(minconn=0, maxconn=2, timeout=1, check_interval=30)
+    conn = PooledConnection(pool, pool.getconn())
+    conn.close()
+    conn = PooledConnection(pool, pool.getconn())
+    conn.close()
+    assert len(fake_connect) == 1
+
+#Checks checkout fails after the timeout when the pool is exhausted
+def test_checkout_timeout(fake_connect):
+    pool = ConnectionPool(minconn=0, maxconn=1, timeout=0.05, check_interval=30)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+#Checks closed connections are replaced on borrow
+def test_dead_connection_is_replaced(fake_connect):
+    pool = ConnectionPool(minconn=1, maxconn=1, timeout=1, check_interval=30)
+    fake_connect[0].closed = 1
+    conn = pool.getconn()
+    assert conn is fake_connect[1]
+
+#Checks closeall closes idle connections
+def test_closeall(fake_connect):
+    pool = ConnectionPool(minconn=2, maxconn=2, timeout=1, check_interval=30)
+    pool.closeall()
+    assert all(c.closed for c in fake_connect)
+    assert pool.stats()["idle"] == 0
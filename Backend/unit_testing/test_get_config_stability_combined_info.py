@@ -1,10 +1,12 @@
 import pytest
 import psycopg2
 import os
+import statistics
 from dotenv import load_dotenv
 from results_and_configuration_info import get_config_results
-from stability_info import get_stability_results, calculate_stability
-from combined_info import get_all_results_data, calculate_averages
+from stability_info import get_stability_results
+from combined_info import get_all_results_data
+from config_rollups import _moments, rollup_mean, rollup_stdev
 
 load_dotenv()
 
@@ -103,30 +105,6 @@ class TestGetStabilityResults:
         assert "configid" in result[0]
         assert "std_dev" in result[0]
 
-    #Checks stdev is zero when only 1 entry of errors for a system prompt
-    def test_single_entry_returns_zero(self):
-        data = [{"configid": 1, "error": 5, "fixes": 2, "high-quality-errors": 1}]
-        result = calculate_stability(data)
-        assert result[0]["std_dev"] == 0
-
-    #Checks stdev is non-zero when more than 1 entries of errors for a system prompt
-    def test_different_errors_return_nonzeron(self):
-        data = [
-            {"configid": 1, "error": 2, "fixes": 1, "high-quality-errors": 1},
-            {"configid": 1, "error": 8, "fixes": 1, "high-quality-errors": 1},
-        ]
-        result = calculate_stability(data)
-        assert result[0]["std_dev"] > 0
-
-    #Checks that when multiple system prompts are entered, the list contains the same amount
-    def test_multiple_systemprompts_returned_seperatetly(self):
-        data = [
-            {"configid": 1, "error": 3, "fixes": 1, "high-quality-errors": 1},
-            {"configid": 2, "error": 5, "fixes": 2, "high-quality-errors": 2},
-        ]
-        result = calculate_stability(data)
-        assert len(result) == 2
-
 class TestGetAllResultsData:
 
     #Checks averages is calculated across keys for same system prompt
@@ -142,4 +120,33 @@ class TestGetAllResultsData:
         assert item["fixes"] == 3.0       
         assert item["time"] == 60.0      
         assert item["errors"] == 5.0     
-        assert item["high-quality"] == 2.0  
\ No newline at end of file
+        assert item["high-quality"] == 2.0  
+
+class TestConfigRollupMath:
+
+    #Checks (count, mean, M2) give the same mean / sample std dev as the raw values
+    def test_moments_match_raw_values(self):
+        values = [2, 4, 4, 4, 5, 5, 7, 9]
+        count = len(values)
+        m2 = sum((v - 5.0) ** 2 for v in values)
+        assert rollup_mean(count, 5.0) == 5.0
+        assert rollup_stdev(count, m2) == pytest.approx(2.1380899)
+
+    #Checks the row merge record_result runs in SQL keeps a large offset exact, unlike sums of squares
+    def test_merge_keeps_precision(self):
+        values = [1e9 + v for v in (4, 7, 13, 16)]
+        count, mean, m2 = 0, 0.0, 0.0
+        for value in values:
+            n, x, x_m2 = _moments(value)
+            delta = x - mean
+            mean = mean + delta * n / max(count + n, 1)
+            m2 = m2 + x_m2 + delta ** 2 * count * n / max(count + n, 1)
+            count += n
+        assert rollup_mean(count, mean) == 1e9 + 10
+        assert rollup_stdev(count, m2) == pytest.approx(statistics.stdev(values))
+        assert _moments(None) == (0, 0.0, 0.0)
+
+    #Checks empty and single-run rollups behave like SQL AVG / STDDEV_SAMP
+    def test_small_counts(self):
+        assert rollup_mean(0, 0.0) is None
+        assert rollup_stdev(1, 0.0) is None
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import httpx
+from mcp.mcp_client import MCPClient, client_settings, iter_sse_data
+
+
+def sse_body(*texts):
+    lines = []
+    for text in texts:
+        message = {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": text}]}}
+        lines.append("event: message")
+        lines.append("data: " + json.dumps(message))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+#Checks every call goes through the one shared httpx client and the SSE messages are combined
+def test_call_tool_reuses_client():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, text=sse_body("first", "second"))
+
+    async def run():
+        client = MCPClient("http://mcp.test/mcp", "token", http_client=mock_client(handler))
+        shared = client.client
+        first = await client.call_tool("debug", "hi")
+        await client.call_tool("debug", "again")
+        assert client.client is shared
+        await client.aclose()
+        return first
+
+    result = asyncio.run(run())
+    assert result["result"]["content"][0]["text"] == "first\n\nsecond\n\n"
+    assert len(requests) == 2
+    assert requests[0].headers["Authorization"] == "Bearer token"
+
+#Checks a closed client is replaced instead of failing the next call
+def test_client_recreated_after_close():
+    async def run():
+        client = MCPClient("http://mcp.test/mcp", "token")
+        first = client.client
+        await client.aclose()
+        second = client.client
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is not second
+
+#Checks SSE events are split on blank lines and multi-line data is joined
+def test_iter_sse_data():
+    async def lines():
+        for line in ["event: message", "data: {\"a\":", "data: 1}", "", ": comment", "", "data: last"]:
+            yield line
+
+    async def collect():
+        return [data async for data in iter_sse_data(lines())]
+
+    assert asyncio.run(collect()) == ['{"a":\n1}', "last"]
+
+#Checks messages are yielded one by one, without waiting for the whole response
+def test_stream_tool_yields_messages():
+    def handler(request):
+        return httpx.Response(200, text=sse_body("one", "two") + "\ndata: not json\n\n")
+
+    async def run():
+        client = MCPClient("http://mcp.test/mcp", "token", http_client=mock_client(handler))
+        messages = [m async for m in client.stream_tool("debug", "hi")]
+        await client.aclose()
+        return messages
+
+    messages = asyncio.run(run())
+    assert [m["result"]["content"][0]["text"] for m in messages] == ["one", "two"]
+
+#Checks the pool fits a full benchmark plus the job queue, and waiting for it is not cut off at the connect timeout
+def test_client_settings_pool(monkeypatch):
+    for name in ("MCP_MAX_CONNECTIONS", "MCP_POOL_TIMEOUT", "MCP_READ_TIMEOUT", "MCP_CONNECT_TIMEOUT"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("BENCHMARK_MAX_CONCURRENCY", "16")
+    monkeypatch.setenv("MCP_JOB_WORKERS", "4")
+    settings = client_settings()
+    assert settings["limits"].max_connections == 20
+    assert settings["timeout"].connect == 10
+    assert settings["timeout"].pool == 1800
+
+    monkeypatch.setenv("MCP_JOB_WORKERS", "8")
+    monkeypatch.setenv("MCP_POOL_TIMEOUT", "60")
+    settings = client_settings()
+    assert settings["limits"].max_connections == 24
+    assert settings["timeout"].pool == 60
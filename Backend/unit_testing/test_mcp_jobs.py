@@ -0,0 +1,106 @@
+import asyncio
+from mcp import mcp_jobs
+from mcp.mcp_jobs import JobQueue
+
+
+class FakeJobStore:
+    """In-memory stand-in for the mcp_jobs table."""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def create_job(self, tool_name, prompt):
+        job_id = len(self.jobs) + 1
+        self.jobs[job_id] = {"tool_name": tool_name, "prompt": prompt, "status": "queued"}
+        return job_id
+
+    def start_job(self, job_id, worker_id):
+        job = self.jobs[job_id]
+        if job["status"] != "queued":
+            return None
+        job.update(status="running", worker_id=worker_id, heartbeats=0)
+        return job["tool_name"], job["prompt"]
+
+    def heartbeat_job(self, job_id, worker_id):
+        if self.jobs[job_id].get("worker_id") == worker_id:
+            self.jobs[job_id]["heartbeats"] += 1
+
+    def finish_job(self, job_id, worker_id, result=None, error=None):
+        job = self.jobs[job_id]
+        if job.get("worker_id") == worker_id and job["status"] == "running":
+            job.update(status="failed" if error else "succeeded", result=result, error=error)
+
+    def requeue_unfinished_jobs(self, lease_seconds):
+        return [i for i, job in self.jobs.items() if job["status"] == "queued"]
+
+    def requeue_expired_jobs(self, lease_seconds):
+        return []
+
+
+class FakeClient:
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def call_tool(self, tool_name, prompt):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.02)
+        self.active -= 1
+        if prompt == "boom":
+            raise RuntimeError("agent crashed")
+        return {"result": {"content": [{"type": "text", "text": prompt}]}}
+
+
+#Checks submit returns at once, at most `workers` calls run together and failures are stored
+def test_job_queue_runs_jobs(monkeypatch):
+    store = FakeJobStore()
+
+    async def fake_run_db(func, *args):
+        return getattr(store, func.__name__)(*args)
+
+    monkeypatch.setattr(mcp_jobs, "run_db", fake_run_db)
+    client = FakeClient()
+
+    async def run():
+        queue = JobQueue(workers=2, client=client)
+        await queue.start()
+        ids = [await queue.submit("debug", p) for p in ("a", "b", "boom", "c")]
+        assert all(store.jobs[i]["status"] in ("queued", "running") for i in ids)
+        await queue.queue.join()
+        await queue.stop()
+        return ids
+
+    ids = asyncio.run(run())
+    assert client.max_active == 2
+    assert store.jobs[ids[0]]["status"] == "succeeded"
+    assert store.jobs[ids[0]]["result"]["result"]["content"][0]["text"] == "a"
+    assert store.jobs[ids[2]]["status"] == "failed"
+    assert store.jobs[ids[2]]["error"] == "agent crashed"
+
+#Checks a job another live process already runs is skipped, and a long call keeps renewing its lease
+def test_job_queue_respects_leases(monkeypatch):
+    store = FakeJobStore()
+
+    async def fake_run_db(func, *args):
+        return getattr(store, func.__name__)(*args)
+
+    monkeypatch.setattr(mcp_jobs, "run_db", fake_run_db)
+    taken = store.create_job("debug", "other")
+    store.start_job(taken, "other-process")
+    client = FakeClient()
+
+    async def run():
+        queue = JobQueue(workers=1, client=client, lease_seconds=0.015, worker_id="this-process")
+        await queue.start()
+        await queue.run_job(taken)
+        job_id = await queue.submit("debug", "mine")
+        await queue.queue.join()
+        await queue.stop()
+        return job_id
+
+    job_id = asyncio.run(run())
+    assert store.jobs[taken]["status"] == "running"
+    assert store.jobs[taken]["worker_id"] == "other-process"
+    assert store.jobs[job_id]["status"] == "succeeded"
+    assert store.jobs[job_id]["heartbeats"] >= 1
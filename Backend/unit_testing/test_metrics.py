@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+import main
+from metrics import Histogram, RequestDbTime, _request_db_time, record_query, registry
+
+
+#Checks observations land in the right cumulative buckets
+def test_histogram_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [(0.1, 1), (1.0, 3), ("+Inf", 4)]
+    assert histogram.count == 4
+
+#Checks statement time is added to the request that ran it
+def test_record_query_adds_to_current_request():
+    db = RequestDbTime()
+    token = _request_db_time.set(db)
+    try:
+        record_query(0.25)
+        record_query(0.25)
+    finally:
+        _request_db_time.reset(token)
+    assert db.queries == 2
+    assert db.seconds == 0.5
+
+#Checks requests are counted per route template and exposed on /metrics
+def test_metrics_endpoint_counts_route_template():
+    registry.reset()
+    client = TestClient(main.app)
+    client.get("/api/cache/stats")
+    client.get("/api/cache/stats")
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/api/cache/stats",status="200"} 2' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/cache/stats"} 2' in body
+    assert 'http_requests_in_flight{route="/api/cache/stats"} 0' in body
+
+#Checks SQL run while a streamed body is sent is counted, and the request stays in flight until then
+def test_streamed_body_db_time():
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from metrics import metrics_middleware
+
+    app = FastAPI()
+    app.middleware("http")(metrics_middleware)
+    in_flight = []
+
+    @app.get("/export")
+    def export():
+        def rows():
+            for row in (b"a", b"b"):
+                record_query(0.25)
+                in_flight.append(registry.in_flight["/export"])
+                yield row
+        return StreamingResponse(rows())
+
+    registry.reset()
+    assert TestClient(app).get("/export").content == b"ab"
+    assert in_flight == [1, 1]
+    assert registry.in_flight["/export"] == 0
+    assert registry.db_time[("GET", "/export")].sum == 0.5
+    assert registry.db_queries[("GET", "/export")] == 2
@@ -0,0 +1,105 @@
+import pytest
+from migrate import MIGRATIONS, MigrationRequired, require_unique_project_index, pending_migrations, run_migrations, sync_sequences
+
+
+class FakeCursor:
+    def __init__(self, applied):
+        self.applied = applied
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def fetchall(self):
+        return [(v,) for v in self.applied]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def cursor(self):
+        return self.cur
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+#Checks versions are unique so no step can be skipped or recorded twice
+def test_versions_are_unique():
+    versions = [m[0] for m in MIGRATIONS]
+    assert len(versions) == len(set(versions))
+
+#Checks only versions not yet recorded are returned, in order
+def test_pending_migrations():
+    steps = [(3, "c", "SELECT 3"), (1, "a", "SELECT 1"), (2, "b", "SELECT 2")]
+    assert [m[0] for m in pending_migrations({2}, steps)] == [1, 3]
+    assert pending_migrations({1, 2, 3}, steps) == []
+
+#Checks a run applies and records only the pending steps
+def test_run_migrations_applies_pending_only():
+    called = []
+    steps = [(1, "a", "SELECT 'step one'"), (2, "b", lambda cur: called.append(cur))]
+    cur = FakeCursor(applied=[1])
+    assert run_migrations(FakeConnection(cur), steps) == [2]
+    assert called == [cur]
+    sql = [s for s, _ in cur.statements]
+    assert "SELECT 'step one'" not in sql
+    assert ("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (2, "b")) in cur.statements
+
+#Checks an up-to-date database leaves the sequences alone, and syncing never moves them back
+def test_sequences_only_move_forward():
+    cur = FakeCursor(applied=[m[0] for m in MIGRATIONS])
+    assert run_migrations(FakeConnection(cur), MIGRATIONS) == []
+    assert not any("setval" in s for s, _ in cur.statements)
+
+    cur = FakeCursor(applied=[])
+    sync_sequences(cur)
+    assert cur.statements and all("GREATEST" in s and "pg_sequence_last_value" in s for s, _ in cur.statements)
+
+#Checks startup stops at a data-changing step only when it would actually change rows
+@pytest.mark.parametrize("affected, applied", [([("https://github.com/a/b", [1, 2])], [3]), ([], [3, 4, 5])])
+def test_startup_manual_migration(monkeypatch, affected, applied):
+    import migrate
+    monkeypatch.setattr(migrate, "MANUAL_MIGRATIONS", {4: lambda cur: affected})
+    called = []
+    steps = [(3, "schema", lambda cur: called.append("schema")),
+             (4, "merge", lambda cur: called.append("merge")),
+             (5, "later", lambda cur: called.append("later"))]
+    if affected:
+        with pytest.raises(MigrationRequired, match="python migrate.py"):
+            run_migrations(FakeConnection(FakeCursor(applied=[])), steps, allow_manual=False)
+        assert called == ["schema"]
+    else:
+        assert run_migrations(FakeConnection(FakeCursor(applied=[])), steps, allow_manual=False) == applied
+        assert called == ["schema", "merge", "later"]
+
+#Checks the CLI applies data-changing steps without asking
+def test_cli_applies_manual_migration(monkeypatch):
+    import migrate
+    monkeypatch.setattr(migrate, "MANUAL_MIGRATIONS", {4: lambda cur: [("u", [1, 2])]})
+    steps = [(4, "merge", lambda cur: None)]
+    assert run_migrations(FakeConnection(FakeCursor(applied=[])), steps) == [4]
+
+#Checks startup refuses to run ingest without the unique github_url index
+def test_require_unique_project_index():
+    class IndexCursor(FakeCursor):
+        def __init__(self, exists):
+            super().__init__(applied=[])
+            self.exists = exists
+
+        def fetchone(self):
+            return (self.exists,)
+
+    require_unique_project_index(IndexCursor(True))
+    with pytest.raises(MigrationRequired, match="projects_github_url_key"):
+        require_unique_project_index(IndexCursor(False))
@@ -0,0 +1,28 @@
+import pytest
+from fastapi import HTTPException
+from pagination import build_page, clamp_limit, decode_cursor, encode_cursor, MAX_PAGE_SIZE
+
+
+#Checks a cursor decodes back to the id it was built from
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+    assert decode_cursor(None) == 0
+
+#Checks a tampered cursor is rejected with 400
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor!")
+    assert exc.value.status_code == 400
+
+#Checks the page size is capped
+def test_clamp_limit():
+    assert clamp_limit(10**6) == MAX_PAGE_SIZE
+    assert clamp_limit(0) == 1
+
+#Checks next_cursor is only set when an extra row was fetched
+def test_build_page():
+    rows = [{"error_id": i} for i in (1, 2, 3)]
+    page = build_page(rows, 2, "error_id")
+    assert page["items"] == rows[:2]
+    assert decode_cursor(page["next_cursor"]) == 2
+    assert build_page(rows[:2], 2, "error_id")["next_cursor"] is None
@@ -0,0 +1,80 @@
+import pytest
+import projects_info
+from projects_info import find_or_create_project, remember_project
+from response_cache import TTLCache
+
+
+class FakeCursor:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.calls = 0
+
+    def execute(self, sql, params=None):
+        self.calls += 1
+
+    def fetchone(self):
+        return self.rows.pop(0) if len(self.rows) > 1 else self.rows[0]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(projects_info, "project_id_cache", TTLCache(maxsize=8))
+
+
+#Checks a committed project is served from the cache once remembered
+def test_remembered_project_is_cached():
+    cur = FakeCursor((5,))
+    assert find_or_create_project(cur, "p", "https://github.com/a/b", 3) == 5
+    remember_project("https://github.com/a/b", 5)
+    assert find_or_create_project(cur, "p", "https://github.com/a/b", 3) == 5
+    assert cur.calls == 1
+
+#Checks an existing project (no row from INSERT ... DO NOTHING) is read back with a SELECT
+def test_existing_project_is_selected():
+    cur = FakeCursor(None, (4,))
+    assert find_or_create_project(cur, "p", "https://github.com/a/d", 0) == 4
+    assert cur.calls == 2
+
+#Checks lookups inside an uncommitted transaction never fill the cache themselves
+def test_lookup_does_not_cache_before_commit():
+    cur = FakeCursor((9,))
+    find_or_create_project(cur, "p", "https://github.com/a/c", 0)
+    find_or_create_project(cur, "p", "https://github.com/a/c", 0)
+    assert cur.calls == 2
+
+#Checks a batch whose commit fails caches none of the projects it created
+def test_save_reports_caches_only_after_commit(monkeypatch):
+    import ingest_service
+
+    class FakeConnection:
+        def __init__(self, fail):
+            self.fail = fail
+
+        def cursor(self):
+            return self
+
+        def execute(self, sql, params=None):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, *exc):
+            if exc_type is None and self.fail:
+                raise RuntimeError("commit failed")
+            return False
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(ingest_service, "ingest_report", lambda cur, **r: {"project_id": r["project_id"]})
+    reports = [{"github_url": "https://github.com/a/x", "project_id": 11}]
+
+    monkeypatch.setattr(ingest_service, "get_conn", lambda: FakeConnection(fail=True))
+    with pytest.raises(RuntimeError):
+        ingest_service.save_reports(reports)
+    assert projects_info.project_id_cache.get("https://github.com/a/x") == (False, None)
+
+    monkeypatch.setattr(ingest_service, "get_conn", lambda: FakeConnection(fail=False))
+    ingest_service.save_reports(reports)
+    assert projects_info.project_id_cache.get("https://github.com/a/x") == (True, 11)
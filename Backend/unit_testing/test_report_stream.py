@@ -0,0 +1,107 @@
+import json
+import pytest
+import ingest_service
+from report_stream import ReportStreamParser
+from ingest_service import StreamingReportWriter, apply_report_events
+
+
+REPORT = {
+    "project_name": "UserService",
+    "project_github_url": "https://github.com/company/user-service",
+    "number_of_fixes": 1,
+    "total_time_spent_minutes": 20,
+    "number_of_errors_from_raygun": 3,
+    "errors": [
+        {"error_id": "1", "error_type": "KeyError", "was_fixed": True},
+        {"error_id": "2", "error_type": "TypeError", "was_fixed": False},
+        {"error_id": "3", "error_type": "ValueError", "was_fixed": False},
+    ],
+    "summary": {"errors_fixed": 1, "recommendations": ["a", "b"]},
+}
+
+
+def parse_in_chunks(raw, size):
+    parser = ReportStreamParser()
+    events = []
+    for i in range(0, len(raw), size):
+        events += parser.feed(raw[i:i + size])
+    return events + parser.close()
+
+
+class TestReportStreamParser:
+
+    #Checks the parsed fields and errors match json.loads for any chunk size
+    @pytest.mark.parametrize("size", [1, 5, 64, 100000])
+    def test_matches_json_loads(self, size):
+        raw = json.dumps(REPORT, indent=2).encode()
+        events = parse_in_chunks(raw, size)
+        fields = {e[1]: e[2] for e in events if e[0] == "field"}
+        errors = [e[1] for e in events if e[0] == "error"]
+        assert errors == REPORT["errors"]
+        assert fields == {k: v for k, v in REPORT.items() if k != "errors"}
+
+    #Checks a number split across two chunks is not cut short
+    def test_number_split_across_chunks(self):
+        parser = ReportStreamParser()
+        assert parser.feed(b'{"number_of_fixes": 12') == []
+        events = parser.feed(b'34}') + parser.close()
+        assert events == [("field", "number_of_fixes", 1234)]
+
+    #Checks brackets and escaped quotes inside strings do not end an element early, whatever the chunk size
+    @pytest.mark.parametrize("size", [1, 3, 7])
+    def test_strings_with_brackets_and_escapes(self, size):
+        errors = [{"message": 'KeyError: "}]\\" [x]', "lines": [[1, 2], {"a": "\\"}]}, "\"q\""]
+        events = parse_in_chunks(json.dumps({"errors": errors}).encode(), size)
+        assert [e[1] for e in events] == errors
+
+    #Checks a large element is decoded once, not again for every chunk it spans
+    def test_large_element_decoded_once(self):
+        parser = ReportStreamParser()
+        calls = []
+        raw_decode = parser._decoder.raw_decode
+        parser._decoder.raw_decode = lambda *args: calls.append(args[1]) or raw_decode(*args)
+        raw = json.dumps({"errors": [{"stack": ["frame"] * 20000}]}).encode()
+        for i in range(0, len(raw), 100):
+            parser.feed(raw[i:i + 100])
+        parser.close()
+        # The "errors" key, then the element
+        assert len(calls) == 2
+
+    #Checks a syntax error inside an element fails as soon as the element is complete
+    def test_syntax_error_fails_early(self):
+        parser = ReportStreamParser()
+        with pytest.raises(ValueError, match="Invalid JSON"):
+            parser.feed(b'{"errors": [{"a": 1 x}, {"b": ')
+
+    #Checks truncated or malformed files are rejected
+    @pytest.mark.parametrize("raw", [b'{"a": 1', b'{"errors": [1,]}', b'[1]', b'{"a": 1} x', b'{"errors": [{"a": "b'])
+    def test_rejects_invalid_json(self, raw):
+        with pytest.raises(ValueError):
+            parse_in_chunks(raw, 4)
+
+
+class TestStreamingReportWriter:
+
+    #Checks errors that come before the project fields are still saved with the right ids
+    def test_errors_before_project_fields(self, monkeypatch):
+        batches = []
+        monkeypatch.setattr(ingest_service, "find_or_create_project", lambda cur, *a: 7)
+        monkeypatch.setattr(ingest_service, "insert_configuration_row", lambda cur, *a: 70)
+        monkeypatch.setattr(ingest_service, "insert_result_row", lambda cur, *a: 700)
+        monkeypatch.setattr(ingest_service, "ERROR_BATCH_SIZE", 2)
+
+        def insert_error_rows(cur, errors, project_id, config_id, run_time):
+            batches.append((len(errors), project_id, config_id))
+            return len(errors)
+
+        monkeypatch.setattr(ingest_service, "insert_error_rows", insert_error_rows)
+
+        report = {"errors": REPORT["errors"], **{k: v for k, v in REPORT.items() if k != "errors"}}
+        writer = StreamingReportWriter(cur=None, prompt="p")
+        apply_report_events(writer, parse_in_chunks(json.dumps(report).encode(), 16))
+        saved = writer.finish()
+
+        assert batches == [(2, 7, 70), (1, 7, 70)]
+        assert saved["inserted_errors"] == 3
+        assert saved["total_errors"] == 3
+        assert saved["results_id"] == 700
@@ -0,0 +1,84 @@
+import time
+import pytest
+import response_cache
+from response_cache import TTLCache, cached_response, invalidate_project
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    cache = TTLCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(response_cache, "response_cache", cache)
+    return cache
+
+
+class TestTTLCache:
+
+    #Checks the least recently used entry is evicted first
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == (True, 1)
+        assert cache.get("b") == (False, None)
+        assert cache.stats()["evictions"] == 1
+
+    #Checks entries expire after the ttl
+    def test_ttl_expiry(self):
+        cache = TTLCache(maxsize=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") == (False, None)
+
+
+class TestCachedResponse:
+
+    #Checks repeated calls for a project are served from the cache until it is invalidated
+    def test_hit_and_invalidate(self, fresh_cache):
+        calls = []
+
+        @cached_response("combined")
+        def handler(project_id):
+            calls.append(project_id)
+            return [{"configid": 1}]
+
+        handler(project_id=5)
+        handler(project_id=5)
+        handler(project_id=6)
+        assert calls == [5, 6]
+
+        invalidate_project(5)
+        handler(project_id=5)
+        handler(project_id=6)
+        assert calls == [5, 6, 5]
+        assert fresh_cache.stats()["hits"] == 2
+
+    #Checks error responses are not cached
+    def test_errors_not_cached(self, fresh_cache):
+        calls = []
+
+        @cached_response("detected")
+        def handler(projectid):
+            calls.append(projectid)
+            return {"error": "db down"}
+
+        handler(projectid=1)
+        handler(projectid=1)
+        assert len(calls) == 2
+
+    #Checks a result computed while the project was invalidated is not cached
+    def test_invalidated_during_miss(self, fresh_cache):
+        calls = []
+
+        @cached_response("combined")
+        def handler(project_id):
+            calls.append(project_id)
+            if len(calls) == 1:
+                invalidate_project(project_id)   # an ingest lands mid-computation
+            return [{"configid": len(calls)}]
+
+        assert handler(project_id=8) == [{"configid": 1}]
+        assert handler(project_id=8) == [{"configid": 2}]
+        assert handler(project_id=8) == [{"configid": 2}]
+        assert calls == [8, 8]
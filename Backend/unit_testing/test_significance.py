@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+import significance
+from significance import bootstrap_means, compare_configurations, group_samples, pair_statistics
+
+
+def _columns(fixes, duration=None, false_positives=None):
+    n = len(fixes)
+    return {
+        "fixes": fixes,
+        "duration": duration if duration is not None else [None] * n,
+        "false_positives": false_positives if false_positives is not None else [None] * n,
+    }
+
+#Checks CI bounds interpolate like numpy.percentile and p-values count both tails
+def test_pair_statistics_match_numpy():
+    rng = np.random.default_rng(0)
+    left, right = rng.normal(size=(20, 1000)), rng.normal(0.1, 1, size=(20, 1000))
+    low, high, p_values = pair_statistics(left, right, 0.9)
+    diffs = left - right
+    assert np.allclose(low, np.percentile(diffs, 5, axis=1))
+    assert np.allclose(high, np.percentile(diffs, 95, axis=1))
+    expected = np.minimum(1, 2 * np.minimum((diffs <= 0).mean(axis=1), (diffs >= 0).mean(axis=1)))
+    assert np.allclose(p_values, expected)
+
+#Checks resampling is reproducible for a seed and centred on the sample mean
+def test_bootstrap_means():
+    values = np.arange(10, dtype=float)
+    means = bootstrap_means(values, 5000, 1)
+    assert means.shape == (5000,)
+    assert np.array_equal(means, bootstrap_means(values, 5000, 1))
+    assert means.mean() == pytest.approx(4.5, abs=0.1)
+
+#Checks NULLs are dropped and configurations with fewer than two runs are left out
+def test_group_samples():
+    order, samples = group_samples([1, 2, 1, 2, 3], _columns([1, 5, 3, None, 2]))
+    assert order == [1, 2, 3]
+    assert samples[(1, "fixes")].tolist() == [1.0, 3.0]
+    assert (2, "fixes") not in samples and (3, "fixes") not in samples
+
+#Checks a clear difference is significant, identical configurations are not
+def test_compare_configurations():
+    rng = np.random.default_rng(0)
+    ids = [1] * 30 + [2] * 30 + [3] * 30
+    fixes = np.concatenate((rng.normal(10, 1, 30), rng.normal(10, 1, 30), rng.normal(20, 1, 30)))
+    baseline, comparisons = compare_configurations(ids, _columns(fixes), resamples=2000)
+    assert baseline is None
+    by_pair = {(c["config_a"], c["config_b"]): c for c in comparisons}
+    assert set(by_pair) == {(1, 2), (1, 3), (2, 3)}
+
+    far = by_pair[(1, 3)]
+    assert far["diff"] == pytest.approx(far["mean_a"] - far["mean_b"])
+    assert far["ci_low"] < far["diff"] < far["ci_high"] < 0
+    assert far["p_value"] < 0.01
+    assert by_pair[(1, 2)]["p_value"] > 0.05
+
+    _, again = compare_configurations(ids, _columns(fixes), resamples=2000)
+    assert again == comparisons
+
+#Checks large projects fall back to comparing every configuration against the best-sampled one
+def test_compare_configurations_caps_pairs(monkeypatch):
+    monkeypatch.setenv("SIGNIFICANCE_MAX_PAIRS", "2")
+    ids = [5, 5, 6, 6, 6, 7, 7]
+    baseline, comparisons = compare_configurations(ids, _columns([1, 2, 3, 4, 5, 6, 7]), resamples=200)
+    assert baseline == 6
+    assert [(c["config_a"], c["config_b"]) for c in comparisons] == [(6, 5), (6, 7)]
+
+#Checks the fallback skips configurations with too few runs to compare
+def test_fallback_baseline_has_samples(monkeypatch):
+    monkeypatch.setenv("SIGNIFICANCE_MAX_PAIRS", "1")
+    baseline, comparisons = compare_configurations([1, 2, 2, 3, 3], _columns([1, 2, 3, 4, 5]), resamples=200)
+    assert baseline == 2
+    assert [(c["config_a"], c["config_b"]) for c in comparisons] == [(2, 3)]
+
+#Checks an explicit baseline that is not in the project is rejected instead of giving an empty answer
+def test_unknown_baseline():
+    with pytest.raises(ValueError, match="99"):
+        compare_configurations([1, 1, 2, 2], _columns([1, 2, 3, 4]), baseline=99)
+
+#Checks the worker processes are never forked from the server
+def test_process_pool_does_not_fork(monkeypatch):
+    monkeypatch.setenv("SIGNIFICANCE_WORKERS", "2")
+    try:
+        pool = significance._get_process_pool()
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        significance.close_process_pool()
+
+#Checks the endpoint only reads the results through run_db and bootstraps outside it
+def test_endpoint_bootstraps_outside_run_db(monkeypatch):
+    from fastapi.testclient import TestClient
+    import get_ai_data
+    from main import app
+    from response_cache import response_cache
+
+    db_calls = []
+    async def fake_run_db(func, *args):
+        db_calls.append(func)
+        return func(*args)
+    monkeypatch.setattr(get_ai_data, "run_db", fake_run_db)
+    monkeypatch.setattr(get_ai_data, "load_project_results", lambda pid: ([1, 1, 2, 2], _columns([1, 2, 3, 4]), None))
+    response_cache.clear()
+
+    body = TestClient(app).get("/get_significance_data?project_id=8&resamples=200").json()
+    assert db_calls == [get_ai_data.load_project_results]
+    assert body["resamples"] == 200
+    assert [(c["config_a"], c["config_b"]) for c in body["comparisons"]] == [(1, 2)]
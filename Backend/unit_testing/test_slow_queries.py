@@ -0,0 +1,83 @@
+import slow_queries
+from slow_queries import SlowQueryLog, can_explain, check
+
+
+#Checks only side-effect-free SELECTs may be re-run under EXPLAIN ANALYZE
+def test_can_explain():
+    assert can_explain("SELECT * FROM results WHERE project_id = %s")
+    assert can_explain("  select count(*) from error_records")
+    assert not can_explain("INSERT INTO results VALUES (1)")
+    assert not can_explain("SELECT setval('results_results_id_seq', 5)")
+    assert not can_explain("SELECT * INTO copy FROM results")
+    assert not can_explain("WITH d AS (DELETE FROM results RETURNING *) SELECT * FROM d")
+    assert not can_explain("SELECT * FROM mcp_jobs WHERE status = 'queued' FOR UPDATE SKIP LOCKED")
+    assert not can_explain("select 1 from projects for  share")
+
+#Checks the log keeps one entry per statement, the most recent ones, slowest first
+def test_log_is_distinct_and_bounded():
+    log = SlowQueryLog(size=2)
+    assert log.record("SELECT 1", None, 0.6) is True
+    assert log.record("SELECT   1", (1,), 0.5) is False   # same statement, not slower
+    log.record("SELECT 2", None, 0.9)
+    log.record("SELECT 3", None, 0.7)
+    entries = log.entries()
+    assert [e["statement"] for e in entries] == ["SELECT 2", "SELECT 3"]
+
+#Checks statements under the threshold are not logged
+def test_check_threshold(monkeypatch):
+    log = SlowQueryLog(size=5)
+    monkeypatch.setattr(slow_queries, "slow_query_log", log)
+    monkeypatch.setenv("SLOW_QUERY_MS", "100")
+
+    class Cursor:
+        name = None
+
+    check(Cursor(), "SELECT fast", None, 0.05)
+    check(Cursor(), "SELECT slow", ("x",), 0.2)
+    entries = log.entries()
+    assert [e["statement"] for e in entries] == ["SELECT slow"]
+    assert entries[0]["last_params"] == "<1 redacted>"
+
+    monkeypatch.setenv("SLOW_QUERY_LOG_PARAMS", "1")
+    check(Cursor(), "SELECT slow", ("x",), 0.3)
+    assert log.entries()[0]["last_params"] == "('x',)"
+
+#Checks statements with inlined rows (execute_values) share one entry and never log their data
+def test_inlined_values_are_templated(monkeypatch, capsys):
+    log = SlowQueryLog(size=5)
+    monkeypatch.setattr(slow_queries, "slow_query_log", log)
+    monkeypatch.setenv("SLOW_QUERY_MS", "100")
+
+    class Cursor:
+        name = None
+
+    for secret in ("token-1", "token-2"):
+        statement = f"INSERT INTO error_records (error_name) VALUES ('{secret}'),('x')".encode()
+        check(Cursor(), statement, None, 0.2)
+    check(Cursor(), "SELECT * FROM projects WHERE github_url = 'https://secret'", None, 0.2)
+
+    entries = log.entries()
+    assert sorted(e["statement"] for e in entries) == [
+        "INSERT INTO error_records (error_name) VALUES ...",
+        "SELECT * FROM projects WHERE github_url = '?'",
+    ]
+    assert "token" not in capsys.readouterr().out and "secret" not in str(entries)
+
+#Checks the debug endpoint is hidden unless enabled, and clearing needs DELETE
+def test_debug_endpoint(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    monkeypatch.delenv("DEBUG_ENDPOINTS", raising=False)
+    assert client.get("/debug/slow_queries").status_code == 404
+    assert client.delete("/debug/slow_queries").status_code == 404
+
+    log = SlowQueryLog(size=5)
+    log.record("SELECT slow", None, 0.9)
+    monkeypatch.setattr("main.slow_query_log", log)
+    monkeypatch.setenv("DEBUG_ENDPOINTS", "1")
+    assert len(client.get("/debug/slow_queries?clear=true").json()["queries"]) == 1
+    assert len(log.entries()) == 1
+    assert client.delete("/debug/slow_queries").status_code == 200
+    assert log.entries() == []
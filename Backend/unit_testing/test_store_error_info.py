@@ -0,0 +1,22 @@
+from store_error_info import build_error_rows
+
+
+class TestBuildErrorRows:
+
+    #Checks valid errors become insert rows with normalised ids
+    def test_builds_rows(self):
+        errors = [{"error_id": 123, "error_type": "KeyError", "was_fixed": True}]
+        rows = build_error_rows(errors, project_id="4", config_id=7, run_time="2")
+        assert rows == [("123", "KeyError", True, 4, 7, 2)]
+
+    #Checks entries without a name or type, or that are not objects, are skipped
+    def test_skips_invalid_entries(self):
+        errors = [
+            {"error_id": "1", "error_type": "TypeError"},
+            {"error_id": "", "error_type": "TypeError"},
+            {"error_id": "2"},
+            "not an error",
+        ]
+        rows = build_error_rows(errors, project_id=1, config_id=1, run_time=1)
+        assert len(rows) == 1
+        assert rows[0][2] is False
@@ -0,0 +1,56 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+from starlette.responses import StreamingResponse
+from streaming import json_array_stream
+from response_cache import _cacheable
+from results_and_configuration_info import config_resultnew_row
+
+
+#Checks the chunks join into one valid JSON array, whatever the chunk size
+def test_json_array_stream_is_valid_json():
+    rows = [(i, "gpt", Decimal("1.5")) for i in range(5)]
+    chunks = list(json_array_stream(rows, config_resultnew_row, chunk_rows=2))
+    assert len(chunks) == 5  # "[" + 3 chunks + "]"
+    data = json.loads(b"".join(chunks))
+    assert [d["results_id"] for d in data] == list(range(5))
+    assert data[0]["fixes"] == 1.5
+
+#Checks an empty result is still an array, and datetimes are encoded
+def test_json_array_stream_edge_cases():
+    assert b"".join(json_array_stream([], config_resultnew_row)) == b"[]"
+    when = datetime(2026, 1, 2, 3, 4, 5)
+    out = json.loads(b"".join(json_array_stream([when], lambda r: {"at": r})))
+    assert out == [{"at": "2026-01-02T03:04:05"}]
+
+#Checks streamed responses are never kept in the response cache
+def test_streaming_response_not_cached():
+    assert not _cacheable(StreamingResponse(iter([b"[]"])))
+    assert _cacheable([])
+
+#Checks a stream holds one run_db limiter token until it is finished, and closes its generator
+def test_stream_db_holds_limiter_token(monkeypatch):
+    import anyio
+    import database
+
+    closed = []
+
+    def chunks():
+        try:
+            yield b"["
+            yield b"]"
+        finally:
+            closed.append(True)
+
+    async def run():
+        limiter = anyio.CapacityLimiter(2)
+        monkeypatch.setattr(database, "_db_limiter", limiter)
+        seen = []
+        async for chunk in database.stream_db(chunks()):
+            seen.append((chunk, limiter.borrowed_tokens))
+        return seen, limiter.borrowed_tokens
+
+    seen, after = anyio.run(run)
+    assert seen == [(b"[", 1), (b"]", 1)]
+    assert after == 0
+    assert closed == [True]
@@ -0,0 +1,78 @@
+import json
+from fastapi.testclient import TestClient
+import upload_ai_data
+from main import app
+
+
+REPORT = {
+    "project_name": "UserService",
+    "project_github_url": "https://github.com/company/user-service",
+    "number_of_fixes": 1,
+    "total_time_spent_minutes": 20,
+    "number_of_errors_from_raygun": 2,
+    "errors": [{"error_id": "1", "error_type": "KeyError", "was_fixed": True}],
+}
+
+
+def fake_save_reports(reports):
+    return [{"success": True, "project_id": 1, "config_id": i} for i, _ in enumerate(reports)]
+
+
+class TestBulkSave:
+
+    #Checks every line gets a result and invalid lines do not stop the rest
+    def test_per_line_summary(self, monkeypatch):
+        monkeypatch.setattr(upload_ai_data, "save_reports", fake_save_reports)
+        body = "\n".join([
+            json.dumps(REPORT),
+            "{not json",
+            "",
+            json.dumps({"json_data": REPORT, "prompt": "p2", "test_round": 3}),
+            json.dumps({"project_name": "missing fields"}),
+        ])
+        client = TestClient(app)
+        response = client.post("/save_json_data/bulk?prompt=p1", content=body)
+        data = response.json()
+
+        assert data["total_reports"] == 4
+        assert data["saved_reports"] == 2
+        assert [r["line"] for r in data["results"]] == [1, 2, 4, 5]
+        assert [r["success"] for r in data["results"]] == [True, False, True, False]
+
+    #Checks reports are written in batches of BULK_BATCH_SIZE
+    def test_batches(self, monkeypatch):
+        calls = []
+
+        def save(reports):
+            calls.append(len(reports))
+            return fake_save_reports(reports)
+
+        monkeypatch.setattr(upload_ai_data, "save_reports", save)
+        monkeypatch.setattr(upload_ai_data, "BULK_BATCH_SIZE", 2)
+        body = "\n".join(json.dumps(REPORT) for _ in range(5))
+        client = TestClient(app)
+        client.post("/save_json_data/bulk", content=body)
+        assert calls == [2, 2, 1]
+
+    #Checks a line can override the prompt and test round
+    def test_line_overrides_prompt(self):
+        line = json.dumps({"json_data": REPORT, "prompt": "p2", "test_round": 3}).encode()
+        args = upload_ai_data.parse_bulk_line(line, "p1", 1)
+        assert args["prompt"] == "p2"
+        assert args["run_time"] == 3
+        assert args["errors"][0]["error_type"] == "KeyError"
+
+    #Checks lines are split correctly whatever the chunk boundaries, including long lines over many chunks
+    def test_iter_ndjson_lines_chunking(self):
+        import asyncio
+        body = b"a\n\nbcd\n" + b"x" * 5000 + b"\nlast"
+
+        async def collect(size):
+            async def chunks():
+                for i in range(0, len(body), size):
+                    yield body[i:i + size]
+            return [line async for line in upload_ai_data.iter_ndjson_lines(chunks())]
+
+        expected = body.split(b"\n")
+        for size in (1, 3, 64, len(body)):
+            assert asyncio.run(collect(size)) == expected
@@ -1,15 +1,14 @@
 
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, UploadFile, File, Form, Request
 import json
 from typing import Optional, List
-from pydantic import BaseModel
-from store_error_info import save_error_records
+from pydantic import BaseModel, ValidationError
 from datetime import datetime
 
 
-from results_and_configuration_info import insert_configurations, insert_fixes
-from store_error_info import save_error_records
-from projects_info import insert_project
+from database import run_db
+from response_cache import invalidate_project
+from ingest_service import save_report, save_reports, save_report_stream, save_system_prompt
 
 
 
@@ -47,6 +46,20 @@ class SaveJsonRequest(BaseModel):
     test_round: Optional[int] = 1  # Add test_round to SaveJsonRequest
 
 
+#Maps a validated report to the keyword arguments of ingest_service.save_report
+def report_ingest_args(report: DebugReport, prompt, test_round):
+    return {
+        "project_name": report.project_name,
+        "github_url": report.project_github_url,
+        "number_of_errors": report.number_of_errors_from_raygun,
+        "prompt": prompt,
+        "number_of_fixes": report.number_of_fixes,
+        "duration": report.total_time_spent_minutes,
+        "run_time": test_round if test_round else 1,
+        "errors": [error.model_dump() for error in report.errors],
+    }
+
+
 @router.post("/save_json_data")
 async def save_json_data(request: SaveJsonRequest):
     """
@@ -61,42 +74,13 @@ async def save_json_data(request: SaveJsonRequest):
         print(f"Received JSON report for project: {report.project_name}")
         print(f"Full report data: {report.dict()}")
         
-        # Insert project into 'projects' table
-        project_id = insert_project(
-            project_name=report.project_name,
-            github_url=report.project_github_url,
-            number_of_errors=report.number_of_errors_from_raygun
-        )
-        print(f"Inserted project with ID: {project_id}")
-        
-        # Insert configuration
-        config_id = insert_configurations(
-            system_prompt=prompt,
-            model="",
-            project_id=project_id
-        )
-        print(f"Inserted configuration with ID: {config_id}")
-        
-        # Insert results/fixes into 'results' table
-        insert_fixes(
-            number_of_fixes=report.number_of_fixes,
-            duration=report.total_time_spent_minutes,
-            tokens=0,
-            project_id=project_id,
-            config_id=config_id,
-            run_time=test_round if test_round else 1
-        )
-        print(f"Inserted fixes: {report.number_of_fixes}")
-        
-        # Insert error records (array of errors) into error_records table
-        errors_list = [error.dict() for error in report.errors]
-        inserted_errors = save_error_records(
-            errors_list, 
-            project_id=project_id, 
-            config_id=config_id,
-            run_time=test_round if test_round else 1
-        )
-        print(f"Inserted {inserted_errors} error records")
+        # Project, configuration, result and error records in one transaction
+        saved = await run_db(save_report, **report_ingest_args(report, prompt, test_round))
+        project_id = saved["project_id"]
+        config_id = saved["config_id"]
+        invalidate_project(project_id)
+        inserted_errors = saved["inserted_errors"]
+        print(f"Saved project {project_id}, configuration {config_id}, {inserted_errors} error records")
         
         return {
             "success": True,
@@ -117,6 +101,101 @@ async def save_json_data(request: SaveJsonRequest):
         }
 
 
+# Reports written per transaction by /save_json_data/bulk
+BULK_BATCH_SIZE = 100
+# Longest NDJSON line accepted, so one bad line cannot exhaust memory
+BULK_MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+#Splits a byte stream into lines without reading the whole body first.
+#Only bytes not searched yet are scanned for a newline, so a line spanning many chunks stays linear.
+async def iter_ndjson_lines(chunks):
+    buffer = bytearray()
+    scanned = 0
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", scanned)
+            if end == -1:
+                break
+            yield bytes(buffer[start:end])
+            start = scanned = end + 1
+        if start:
+            del buffer[:start]
+        scanned = len(buffer)
+        if len(buffer) > BULK_MAX_LINE_BYTES:
+            raise ValueError(f"NDJSON line longer than {BULK_MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield bytes(buffer)
+
+
+#Validates one NDJSON line: a bare DebugReport or a SaveJsonRequest with its own prompt / test_round
+def parse_bulk_line(line: bytes, prompt, test_round):
+    data = json.loads(line)
+    if isinstance(data, dict) and "json_data" in data:
+        request = SaveJsonRequest.model_validate(data)
+        return report_ingest_args(request.json_data, request.prompt, request.test_round)
+    return report_ingest_args(DebugReport.model_validate(data), prompt, test_round)
+
+
+async def _flush_bulk_batch(batch, results):
+    line_numbers = [n for n, _ in batch]
+    try:
+        outcomes = await run_db(save_reports, [args for _, args in batch])
+    except Exception as e:
+        outcomes = [{"success": False, "error": str(e)}] * len(batch)
+    for line_number, outcome in zip(line_numbers, outcomes):
+        results.append({"line": line_number, **outcome})
+    for project_id in {o.get("project_id") for o in outcomes if o["success"]}:
+        invalidate_project(project_id)
+
+
+@router.post("/save_json_data/bulk")
+async def save_json_data_bulk(request: Request, prompt: Optional[str] = "", test_round: Optional[int] = 1):
+    """
+    Save many debug reports sent as newline-delimited JSON (one DebugReport per line).
+    Lines are validated as they stream in and written BULK_BATCH_SIZE reports
+    per transaction. Returns a success / error entry for every non-empty line.
+    """
+    results = []
+    batch = []
+    line_number = 0
+
+    try:
+        async for line in iter_ndjson_lines(request.stream()):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_number, parse_bulk_line(line, prompt, test_round)))
+            except (ValueError, ValidationError) as e:
+                results.append({"line": line_number, "success": False, "error": str(e)})
+                continue
+
+            if len(batch) >= BULK_BATCH_SIZE:
+                await _flush_bulk_batch(batch, results)
+                batch = []
+
+        if batch:
+            await _flush_bulk_batch(batch, results)
+    except ValueError as e:
+        # Body could not be split into lines; keep what was already saved
+        if batch:
+            await _flush_bulk_batch(batch, results)
+        results.append({"line": line_number + 1, "success": False, "error": str(e)})
+
+    saved = sum(1 for r in results if r["success"])
+    print(f"[/save_json_data/bulk] Saved {saved} of {len(results)} reports")
+    return {
+        "success": saved == len(results),
+        "total_reports": len(results),
+        "saved_reports": saved,
+        "failed_reports": len(results) - saved,
+        "results": sorted(results, key=lambda r: r["line"]),
+    }
+
+
 @router.post("/upload_ai_data")
 async def upload_ai_json(file: UploadFile = File(...), prompt: Optional[str] = Form(None)):
     filename = file.filename
@@ -125,67 +204,26 @@ async def upload_ai_json(file: UploadFile = File(...), prompt: Optional[str] = F
         "error": "Only .json files are allowed"
         }
         
-    raw = await file.read()
-    data = json.loads(raw)
-  
-    
-    parsed_data = {
-        "project_name": data.get("project_name"),
-        "project_github_url": data.get("project_github_url"),
-        "task_prompt_timestamp": data.get("task_prompt_timestamp"),
-        "total_time_spent_minutes": data.get("total_time_spent_minutes"),
-        "number_of_errors_from_raygun": data.get("number_of_errors_from_raygun"),
-        "errors": data.get("errors"),
-        "prompt": prompt,
-        "fixes": data.get("number_of_fixes"),
-        "run_time":data.get("run_time")
-    }
-
-    # Insert project into 'projects' table
-    project_id = insert_project(
-        project_name=parsed_data.get("project_name"),
-        github_url=parsed_data.get("project_github_url"),
-        number_of_errors=parsed_data.get("number_of_errors_from_raygun", 0)
-    )
-    #Calls function from store_configurations_info file to insert configuration into db
-    
-    config_id = insert_configurations(
-        system_prompt=parsed_data.get("prompt"),
-        model = "",
-        project_id = project_id,
-    )
-
-    #Calls function from store_results_info file to insert results into db
-    insert_fixes(
-    number_of_fixes=parsed_data.get("fixes", 0),
-    duration=parsed_data.get("total_time_spent_minutes", 0),
-    tokens = 0,
-    project_id = project_id,
-    config_id = config_id, 
-    run_time = parsed_data.get("run_time", 0)
-    )
-
-    errors = parsed_data.get("errors", [])
-    run_time =  parsed_data.get("run_time")
-    inserted = save_error_records(errors,project_id=project_id, config_id=config_id ,run_time=run_time)
-
-
+    # The upload is already spooled to disk by Starlette; parse and save it
+    # chunk by chunk instead of loading the whole report into memory
+    saved = await run_db(save_report_stream, file.file, prompt)
+    invalidate_project(saved["project_id"])
 
     return {
         "success": True,
         "message": "file received",
-        "total_errors_in_file": len(errors),
-        "inserted_new_rows": inserted
+        "total_errors_in_file": saved["total_errors"],
+        "inserted_new_rows": saved["inserted_errors"]
         
    }
 
 @router.post("/upload_system_prompt")
 async def upload_system_prompt(projectid: int, prompt: Optional[str] = Form(None)):
-    config_id = insert_configurations(system_prompt= prompt, model="", project_id =projectid)
-    results_id = insert_fixes(0, 0, 0, projectid, config_id, 0)
+    saved = await run_db(save_system_prompt, project_id=projectid, prompt=prompt)
+    invalidate_project(projectid)
     return {
         "success": True,
-        "configid": config_id,
-        "resultid": results_id
+        "configid": saved["config_id"],
+        "resultid": saved["results_id"]
     }
 
@@ -1,12 +1,15 @@
 import { useEffect, useState } from "react";
 import NavBar from './components/NavBar';
 import { useParams } from 'react-router-dom';
+import { fetchPage } from './api/pagination';
 
 export default function Errors() {
   const { configurationId, run_time } = useParams();
   const [errors, setErrors] = useState([]);
   const [loading, setLoading] = useState(true);
   const [errMsg, setErrMsg] = useState("");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
 
   useEffect(() => {
@@ -23,23 +26,10 @@ export default function Errors() {
   url = url + "?configuration_id=" + configurationId + "&run_time=" + run_time;
 }
         console.log("[Errors] Fetching from URL:", url);
-        const res = await fetch(url);
-        console.log("[Errors] Response status:", res.status, "OK:", res.ok);
-        
-        if (!res.ok) {
-          let errorBody = "";
-          try {
-            errorBody = await res.text();
-            console.log("[Errors] Error response body:", errorBody);
-          } catch (e) {
-            console.log("[Errors] Could not read error body:", e.message);
-          }
-          throw new Error(`HTTP ${res.status}: ${errorBody || "Server error"}`);
-        }
-
-        const data = await res.json();
-        console.log("[Errors] Fetched errors successfully:", data.length, "records");
-        setErrors(data);
+        const page = await fetchPage(url);
+        console.log("[Errors] Fetched errors successfully:", page.items.length, "records");
+        setErrors(page.items);
+        setNextCursor(page.next_cursor);
       } catch (e) {
         console.error("[Errors] Fetch failed:", e);
         setErrMsg(e?.message ?? "Failed to load errors");
@@ -50,6 +40,25 @@ export default function Errors() {
     load();
   }, [configurationId, API_BASE_URL]);
 
+  // Appends the next page of error records
+  async function loadMore() {
+    let url = `${API_BASE_URL}/api/errors`;
+    if (configurationId && run_time) {
+      url = url + "?configuration_id=" + configurationId + "&run_time=" + run_time;
+    }
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage(url, nextCursor);
+      setErrors((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (e) {
+      console.error("[Errors] Loading more failed:", e);
+      setErrMsg(e?.message ?? "Failed to load errors");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   if (loading) return <div style={{ padding: 16 }}>Loading…</div>;
   if (errMsg) return (
     <div style={{ padding: 16, color: "red" }}>
@@ -100,6 +109,11 @@ export default function Errors() {
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <button className="error-button" style={{ marginTop: 12 }} onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? "Loading…" : "Load more"}
+          </button>
+        )}
       </div>
     </>
   );
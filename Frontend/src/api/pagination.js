@@ -0,0 +1,28 @@
+// Paged endpoints return { items, next_cursor }.
+// Appends ?cursor= / &cursor= to the url for the next page.
+export function withCursor(url, cursor) {
+  if (!cursor) return url;
+  const separator = url.includes("?") ? "&" : "?";
+  return `${url}${separator}cursor=${encodeURIComponent(cursor)}`;
+}
+
+// Fetches one page: { items, next_cursor }
+export async function fetchPage(url, cursor) {
+  const res = await fetch(withCursor(url, cursor));
+  if (!res.ok) {
+    throw new Error(`HTTP ${res.status}: ${await res.text()}`);
+  }
+  return res.json();
+}
+
+// Follows next_cursor until the last page and returns every item
+export async function fetchAllPages(url) {
+  const items = [];
+  let cursor = null;
+  do {
+    const page = await fetchPage(url, cursor);
+    items.push(...page.items);
+    cursor = page.next_cursor;
+  } while (cursor);
+  return items;
+}
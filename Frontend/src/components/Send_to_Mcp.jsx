@@ -328,6 +328,58 @@ function validateDebugReport(data) {
   return true;
 }
 
+// Read the Server-Sent Events of /api/mcp/call_tool/stream as they arrive.
+// onMessage is called with the text of every MCP result message; the return
+// value has the same shape as the /api/mcp/call_tool response.
+async function readMcpStream(response, onMessage) {
+  if (!response.ok) {
+    throw new Error(`MCP stream failed with status ${response.status}`);
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const texts = [];
+  let buffer = "";
+
+  const handleEvent = (rawEvent) => {
+    let eventName = "message";
+    const dataLines = [];
+    for (const line of rawEvent.split("\n")) {
+      if (line.startsWith("event:")) eventName = line.slice(6).trim();
+      else if (line.startsWith("data:")) dataLines.push(line.slice(5).replace(/^ /, ""));
+    }
+    if (dataLines.length === 0) return;
+    const data = JSON.parse(dataLines.join("\n"));
+    if (eventName === "error") {
+      throw new Error(data.error || "MCP stream error");
+    }
+    const text = data?.result?.content?.[0]?.text;
+    if (eventName === "message" && typeof text === "string") {
+      texts.push(text);
+      onMessage(text);
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true }).replace(/\r\n/g, "\n");
+    let boundary = buffer.indexOf("\n\n");
+    while (boundary !== -1) {
+      handleEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf("\n\n");
+    }
+  }
+  if (buffer.trim()) handleEvent(buffer);
+
+  return {
+    success: true,
+    data: texts.length
+      ? { result: { content: [{ type: "text", text: texts.map((t) => t + "\n\n").join("") }] } }
+      : null,
+  };
+}
+
 function Send_to_Mcp(data) {
   const [prompt, setPrompt] = useState(null);
   const [status, setStatus] = useState(null);
@@ -338,6 +390,8 @@ function Send_to_Mcp(data) {
   const [showSaveButton, setShowSaveButton] = useState(false);
   const [saveStatus, setSaveStatus] = useState("");
   const [testRound, setTestRound] = useState(1);
+  // Text received so far while the agent is still running
+  const [liveOutput, setLiveOutput] = useState("");
 
   function handlePromptChange(event) {
     var inputprompt = event.target.value;
@@ -357,7 +411,7 @@ function Send_to_Mcp(data) {
 
     try {
       var response = await fetch(
-        import.meta.env.VITE_API_BASE_URL + "/api/mcp/call_tool",
+        import.meta.env.VITE_API_BASE_URL + "/api/mcp/call_tool/stream",
         {
           method: "POST",
           headers: { "Content-Type": "application/json" },
@@ -368,7 +422,12 @@ function Send_to_Mcp(data) {
         },
       );
 
-      var receiveddata = await response.json();
+      setStatus("Receiving..");
+      setLiveOutput("");
+      var receiveddata = await readMcpStream(response, (text) => {
+        setLiveOutput((prev) => prev + text + "\n\n");
+      });
+      setLiveOutput("");
 
       console.log("Received data from AI:", receiveddata);
       
@@ -484,6 +543,7 @@ function Send_to_Mcp(data) {
       setPrompt("");
     } catch (error) {
       console.error("Error in handleSendPrompt:", error);
+      setLiveOutput("");
       setStatus("Failed to send message. Please try again.");
     }
   }
@@ -580,6 +640,12 @@ function Send_to_Mcp(data) {
             <ReactMarkdown>{message.content}</ReactMarkdown>
           </div>
         ))}
+        {liveOutput && (
+          <div>
+            <strong>Github Code Fixer:</strong>
+            <ReactMarkdown>{liveOutput}</ReactMarkdown>
+          </div>
+        )}
       </div>
 
       {/* Save Report Section - shown when JSON is detected */}
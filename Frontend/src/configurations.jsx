@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import NavBar from "./components/NavBar";
+import { fetchAllPages } from "./api/pagination";
 import ExpandableText from "./components/ExpandableText";
 
 import './configuration.css';
@@ -18,8 +19,7 @@ function Configurations() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const configResponse = await fetch(`${API_BASE_URL}/get_config_data_forResults?project_id=${projectId}`);
-        const configData = await configResponse.json();
+        const configData = await fetchAllPages(`${API_BASE_URL}/get_config_data_forResults?project_id=${projectId}`);
         setConfigurations(configData);
         setLoading(false);
       } catch (err) {
@@ -42,39 +42,24 @@ const Dashboard = () => {
   useEffect(() => {
     let mounted = true;
 
-    async function fetchBoth() {
+    async function fetchDashboard() {
       setLoading(true);
       setError(null);
       try {
-        const [r1, r2, r3, r4, r5, r6, r7] = await Promise.all([
-          fetch(
-            `http://localhost:8000/api/results/detected_errors?projectid=${projectId}`,
-          ),
-          fetch(
-            `http://localhost:8000/api/results/high_quality_errors?projectid=${projectId}`,
-          ),
-          fetch(`${API_BASE_URL}/get_config_data?project_id=${projectId}`),
-          fetch(`${API_BASE_URL}/get_performance_data?project_id=${projectId}`),
-          fetch(`${API_BASE_URL}/get_config_data_new?project_id=${projectId}`),
-          fetch(`${API_BASE_URL}/get_combined_data?project_id=${projectId}`),
-          fetch(`${API_BASE_URL}/get_stability_data?project_id=${projectId}`),
-        ]);
-
-        const data = await r1.json();
-        const data2 = await r2.json();
-        const data3 = await r3.json();
-        const data4 = await r4.json();
-        const data5 = await r5.json();
-        const data6 = await r6.json();
-        const data7 = await r7.json();
-
-        setDetectedData(data);
-        setHighData(data2);
-        setAccuracydata(data3);
-        setFixdata(data4);
-        setModeldata(data5);
-        setCombinedata(data6);
-        setStabilitydata(data7);
+        const response = await fetch(
+          `${API_BASE_URL}/api/dashboard/${projectId}`,
+        );
+        const data = await response.json();
+        if (data.error) throw new Error(data.error);
+        if (!mounted) return;
+
+        setDetectedData(data.detected_errors);
+        setHighData(data.high_quality_errors);
+        setAccuracydata(data.config_data);
+        setFixdata(data.performance_data);
+        setModeldata(data.config_data_new);
+        setCombinedata(data.combined_data);
+        setStabilitydata(data.stability_data);
       } catch (err) {
         if (mounted) setError(err.message || String(err));
       } finally {
@@ -82,7 +67,7 @@ const Dashboard = () => {
       }
     }
 
-    fetchBoth();
+    fetchDashboard();
     return () => {
       mounted = false;
     };